@@ -0,0 +1,90 @@
+import concurrent.futures
+import logging
+import threading
+import typing
+
+if typing.TYPE_CHECKING:
+    from connectors.binance_futures import BinanceFuturesClient
+
+logger = logging.getLogger()
+
+# Upper bound on a single wait, so strategies started in between are picked up
+MAX_WAIT = 1.0
+# Strategies whose bar closed together are checked in parallel, their signals make REST requests
+BAR_CLOSE_WORKERS = 4
+
+
+class BarClock:
+    def __init__(self, client: "BinanceFuturesClient", workers: int = BAR_CLOSE_WORKERS):
+        self._client = client
+        self._workers = workers
+
+        self._running = False
+        self._wake = threading.Event()
+        self._pool: typing.Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._pending: typing.Dict[int, concurrent.futures.Future] = dict()
+
+    def start(self):
+        if self._running:
+            return
+
+        self._running = True
+        self._pool = concurrent.futures.ThreadPoolExecutor(self._workers, thread_name_prefix="bar-close")
+
+        t = threading.Thread(target=self._run, name="bar-clock", daemon=True)
+        t.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+    def _next_close(self, now: int) -> typing.Optional[int]:
+        # Candles are aligned on the epoch, the next boundary of a timeframe is the next multiple of its length
+        tf_lengths = {strat.tf_equiv for strat in list(self._client.strategies.values())}
+
+        if len(tf_lengths) == 0:
+            return None
+
+        return min((now // tf_length + 1) * tf_length for tf_length in tf_lengths)
+
+    def _run(self):
+        while self._running:
+            # Exchange time, so the boundary matches the candles the exchange builds
+            now = self._client.time_sync.now_ms()
+            next_close = self._next_close(now)
+
+            if next_close is None:
+                self._wake.wait(MAX_WAIT)
+                continue
+
+            self._wake.wait(min((next_close - now) / 1000, MAX_WAIT))
+
+            if not self._running or self._client.time_sync.now_ms() < next_close:
+                continue
+
+            # Only the boundary is detected here, the candles are closed and the strategies checked by the workers
+            for b_index, strat in list(self._client.strategies.items()):
+                if next_close % strat.tf_equiv != 0:
+                    continue
+
+                pending = self._pending.get(b_index)
+                if pending is not None and not pending.done():
+                    logger.warning("%s %s bar closed while the previous one is still being checked",
+                                   strat.contract.symbol, strat.tf)
+                    continue
+
+                self._pending[b_index] = self._pool.submit(self._close_bar, strat, next_close)
+
+            for b_index in list(self._pending):
+                if b_index not in self._client.strategies:
+                    del self._pending[b_index]
+
+    @staticmethod
+    def _close_bar(strat, timestamp: int):
+        try:
+            strat.on_bar_close(timestamp)
+        except Exception as e:
+            logger.error("Error while closing the %s %s bar: %s", strat.contract.symbol, strat.tf, e)
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+# Run as a script from any directory, the application modules live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import indicator_kernels
+
+SIZES = [1000, 100000, 1000000]
+SPANS = [12, 26, 200]
+REPEAT = 5
+
+
+def best_time(func) -> float:
+    func()
+
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def main():
+    try:
+        import pandas as pd
+    except ImportError:
+        pd = None
+        print("pandas not installed, skipping the ewm reference")
+
+    backends = ["numpy", "python"]
+
+    try:
+        indicator_kernels.set_backend("numba")
+        backends.insert(0, "numba")
+    except ImportError:
+        print("numba not installed, skipping the JIT kernel")
+
+    for size in SIZES:
+        closes = np.cumsum(np.random.randn(size)) + 10000
+
+        for span in SPANS:
+            results = dict()
+            reference = None
+
+            if pd is not None:
+                series = pd.Series(closes)
+                results["pandas"] = best_time(lambda: series.ewm(span=span).mean())
+                reference = series.ewm(span=span).mean().values
+
+            for backend in backends:
+                if backend == "python" and size > 100000:
+                    continue
+
+                results[backend] = best_time(lambda: indicator_kernels.ema(closes, span, backend))
+
+                if reference is not None:
+                    error = np.max(np.abs(indicator_kernels.ema(closes, span, backend) - reference))
+                    assert error < 1e-6, f"{backend} EMA differs from pandas by {error}"
+
+            timings = "  ".join(f"{name} {seconds * 1000:9.3f} ms" for name, seconds in results.items())
+            print(f"{size:>8} values, span {span:>3}: {timings}")
+
+
+if __name__ == "__main__":
+    main()
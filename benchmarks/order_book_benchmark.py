@@ -0,0 +1,71 @@
+import os
+import random
+import sys
+import time
+
+# Run as a script from any directory, the application modules live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from order_book import OrderBook
+
+LEVELS = 1000
+EVENTS = 20000
+UPDATES_PER_EVENT = 10
+
+
+def make_snapshot(mid: float, tick: float) -> dict:
+    return {"lastUpdateId": 1,
+            "bids": [[str(round(mid - (i + 1) * tick, 2)), str(random.uniform(0.1, 5))] for i in range(LEVELS)],
+            "asks": [[str(round(mid + (i + 1) * tick, 2)), str(random.uniform(0.1, 5))] for i in range(LEVELS)]}
+
+
+def make_diffs(mid: float, tick: float) -> list:
+    diffs = []
+    update_id = 1
+
+    for _ in range(EVENTS):
+        # Updates are concentrated near the top of the book, as on the real stream
+        bids = [[str(round(mid - int(random.expovariate(0.05) + 1) * tick, 2)),
+                 str(0 if random.random() < 0.2 else random.uniform(0.1, 5))] for _ in range(UPDATES_PER_EVENT // 2)]
+        asks = [[str(round(mid + int(random.expovariate(0.05) + 1) * tick, 2)),
+                 str(0 if random.random() < 0.2 else random.uniform(0.1, 5))] for _ in range(UPDATES_PER_EVENT // 2)]
+
+        diffs.append({"e": "depthUpdate", "s": "BTCUSDT", "U": update_id + 1, "u": update_id + 1, "pu": update_id,
+                      "b": bids, "a": asks})
+        update_id += 1
+
+    return diffs
+
+
+def main():
+    random.seed(1)
+
+    book = OrderBook("BTCUSDT")
+    book.load_snapshot(make_snapshot(20000, 0.1))
+    diffs = make_diffs(20000, 0.1)
+
+    start = time.perf_counter()
+    for diff in diffs:
+        book.on_diff(diff)
+    elapsed = time.perf_counter() - start
+
+    print(f"{EVENTS / elapsed:,.0f} diff events/sec, {EVENTS * UPDATES_PER_EVENT / elapsed:,.0f} level updates/sec "
+          f"({len(book.bids)} bids, {len(book.asks)} asks)")
+
+    start = time.perf_counter()
+    for _ in range(10000):
+        book.best_bid()
+        book.best_ask()
+    elapsed = time.perf_counter() - start
+    print(f"{10000 / elapsed:,.0f} best bid/ask queries/sec")
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        book.expected_fill("buy", 25)
+    elapsed = time.perf_counter() - start
+    print(f"{1000 / elapsed:,.0f} expected slippage queries/sec, buy 25: {book.expected_fill('buy', 25)}")
+    print(f"max buy quantity within 0.01% slippage: {book.max_quantity('buy', 0.01):.3f}")
+
+
+if __name__ == '__main__':
+    main()
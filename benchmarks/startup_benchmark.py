@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+
+# Run as a script from any directory, the application modules live in the repository root
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# Modules imported when the application starts, before any strategy is activated
+MODULES = ["connectors.binance_futures", "interface.root_component", "headless"]
+TOP = 20
+
+
+def import_times(module: str) -> list:
+    # -X importtime writes one line per imported module to stderr: self time | cumulative time | name (in us)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, cwd=REPO_ROOT)
+
+    if result.returncode != 0:
+        print(result.stderr.splitlines()[-1] if result.stderr else f"Failed to import {module}")
+        return []
+
+    times = []
+
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times.append((int(cumulative_us), int(self_us), name.rstrip()))
+
+    return times
+
+
+def main():
+    for module in MODULES:
+        times = import_times(module)
+
+        if len(times) == 0:
+            continue
+
+        total = max(t[0] for t in times)
+        print(f"{module}: {total / 1000:.1f} ms")
+
+        for cumulative_us, self_us, name in sorted(times, reverse=True)[:TOP]:
+            print(f"  {cumulative_us / 1000:8.1f} ms cumulative {self_us / 1000:8.1f} ms self  {name}")
+
+        heavy = [name.strip() for _, _, name in times if name.strip() in ("pandas", "numpy")]
+        if len(heavy) > 0:
+            print(f"  Heavy modules loaded at startup: {', '.join(heavy)}")
+
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import collections
 import logging
 import requests
 import time
@@ -14,15 +15,51 @@ import json
 import threading
 
 from models import *
-from strategies import BreakoutStrategy, TechnicalStrategy
+from database import TradeJournal
+from events import UiEventQueue
+from log_buffer import RingLog
+from snapshot import StateSnapshot, SNAPSHOT_INTERVAL
+from order_book import OrderBook
+from risk import RiskEngine, RiskLimits
+from time_sync import TimeSync
+from profiler import SamplingProfiler
+from indicators import IndicatorCache
+from bar_clock import BarClock
+from order_template import OrderTemplate
+from execution import ExecutionEngine
+from memory import MemoryMonitor
+
+if typing.TYPE_CHECKING:
+    from scanner import MarketScanner
+    from strategies import Strategy
+    from pnl import PnlEngine
 
 logger = logging.getLogger()
 
 socket_url = "wss://fstream.binance.com"
 
+MAX_MARKET_SLIPPAGE_PCT = 0.5
+FIRST_TICK_TARGET_MS = 5000
+SCAN_SIGNALS_KEPT = 200
+
+# Streams per SUBSCRIBE message and delay between messages, Binance accepts 10 incoming messages per second
+WS_SUBSCRIBE_BATCH = 200
+WS_SUBSCRIBE_DELAY = 0.2
+# The connection is restarted when no message at all arrives for this long
+WS_STALL_TIMEOUT = 15
+# Streams that push at a regular pace are resubscribed when silent for longer than their timeout
+STREAM_TIMEOUTS = {"depth@100ms": 30, "kline": 30}
+
 
 class BinanceFuturesClient:
-    def __init__(self, public_key: str, secret_key: str, testnet: bool):
+    def __init__(self, public_key: str, secret_key: str, testnet: bool,
+                 snapshot_path: typing.Optional[str] = "state.snapshot", recv_window: typing.Optional[int] = None,
+                 tick_archive_path: typing.Optional[str] = None, journal_path: str = "database.db",
+                 retention_limits: typing.Optional[typing.Dict[str, int]] = None,
+                 risk_limits: typing.Optional[RiskLimits] = None):
+        self._started_at = time.perf_counter()
+        self.first_tick_ms: typing.Optional[float] = None
+
         if testnet:
             self._base_url = "https://testnet.binancefuture.com"
             self._wss_url = "wss://stream.binancefuture.com/ws"
@@ -33,27 +70,108 @@ class BinanceFuturesClient:
         self._ws_id = 1
         self.ws: websocket.WebSocketApp
         self.reconnect = True
+        self.ws_connected = False
+        self._subscriptions: typing.Set[str] = set()
+        self._subscriptions_lock = threading.Lock()
+        self._last_msg_time = 0.0
+        self._stream_last_msg: typing.Dict[str, float] = dict()
+        self._connect_started: typing.Optional[float] = None
+        self._disconnected_at: typing.Optional[float] = None
+        self.ws_metrics = {"reconnects": 0, "last_connect_time_s": None, "last_downtime_s": None,
+                           "total_downtime_s": 0.0, "stalls": 0}
         self._public_key = public_key
         self._secret_key = secret_key
+        # Keyed once, each signature copies it instead of hashing the key again
+        self._hmac = hmac.new(secret_key.encode(), digestmod=hashlib.sha256)
+        self._order_templates: typing.Dict[str, OrderTemplate] = dict()
         self.prices = dict()
+        self.order_books: typing.Dict[str, OrderBook] = dict()
+        self._bootstrapping: typing.Set[str] = set()
+        self._bootstrapping_lock = threading.Lock()
+        self.ui_events = UiEventQueue()
+        self.journal = TradeJournal(journal_path)
+        self.risk = RiskEngine(risk_limits)
+        self.scanners: typing.List["MarketScanner"] = []
+        self.scan_signals: typing.Deque[typing.Dict] = collections.deque(maxlen=SCAN_SIGNALS_KEPT)
+        self.indicators = IndicatorCache()
+        self.tick_archive: typing.Optional["TickArchive"] = None
+        self.execution = ExecutionEngine(self)
+        # Created with the first strategy, see subscribe_mark_price
+        self.pnl: typing.Optional["PnlEngine"] = None
+
+        if tick_archive_path is not None:
+            from tick_archive import TickArchive
+
+            self.tick_archive = TickArchive(tick_archive_path)
+
+        self._quotes_lock = threading.Lock()
+        self._quotes_fetch_pending = False
         self._headers = {'X-MBX-APIKEY': self._public_key}
-        self.contracts = self.get_contracts()
+        self.recv_window = recv_window
+
+        self.time_sync = TimeSync(self.get_server_time)
+        self.time_sync.sample()
+        self.time_sync.start()
+
+        self._snapshot_path = snapshot_path
+        self.snapshot = StateSnapshot.load(snapshot_path) if snapshot_path is not None else None
+
+        if self.snapshot is not None and self.snapshot.contracts_fresh():
+            self.contracts = self.snapshot.contracts
+        else:
+            self.contracts = self.get_contracts()
+
         self.balances = self.get_balances()
 
-        self.logs = []
-        self.strategies: typing.Dict[int, typing.Union[TechnicalStrategy, BreakoutStrategy]] = dict()
+        self.logs = RingLog()
+        self.strategies: typing.Dict[int, "Strategy"] = dict()
 
-        t = threading.Thread(target=self._start_ws)
+        self._subscriptions.update(self._stream_names(list(self.contracts.values()), "bookTicker"))
+
+        self.profiler = SamplingProfiler()
+
+        self.bar_clock = BarClock(self)
+        self.bar_clock.start()
+
+        self.memory = MemoryMonitor(self, retention_limits)
+        self.memory.start()
+
+        # Named so the profiler can tell the websocket thread apart
+        t = threading.Thread(target=self._start_ws, name="websocket")
+        t.start()
+
+        if self._snapshot_path is not None:
+            t = threading.Thread(target=self._snapshot_loop, daemon=True)
+            t.start()
+
+        t = threading.Thread(target=self._watchdog_loop, daemon=True)
         t.start()
 
         logger.info('Binance Futures Client successfully initialized')
 
     def _add_log(self, msg: str):
         logger.info("%s", msg)
-        self.logs.append({"log": msg, "displayed": False})
+        self.logs.append(msg)
+
+    def _add_timestamp(self, data: typing.Dict):
+        data['timestamp'] = self.time_sync.now_ms()
+
+        if self.recv_window is not None:
+            data['recvWindow'] = self.recv_window
 
     def _generate_signature(self, data: typing.Dict) -> str:
-        return hmac.new(self._secret_key.encode(), urlencode(data).encode(), hashlib.sha256).hexdigest()
+        signer = self._hmac.copy()
+        signer.update(urlencode(data).encode())
+        return signer.hexdigest()
+
+    def order_template(self, contract: Contract) -> OrderTemplate:
+        template = self._order_templates.get(contract.symbol)
+
+        if template is None:
+            template = OrderTemplate(contract)
+            self._order_templates[contract.symbol] = template
+
+        return template
 
     def _make_request(self, method: str, endpoint: str, data):
         if method == "GET":
@@ -80,8 +198,19 @@ class BinanceFuturesClient:
         if response.status_code == 200:
             return response.json()
         else:
+            error = response.json()
             logger.error("Error while making %s request to %s: %s (error code %s)",
-                         method, endpoint, response.json(), response.status_code)
+                         method, endpoint, error, response.status_code)
+
+            # -1021: timestamp outside of recvWindow, the local clock drifted since the last sample
+            if isinstance(error, dict) and error.get('code') == -1021:
+                threading.Thread(target=self.time_sync.sample, args=(True,), daemon=True).start()
+
+    def get_server_time(self) -> typing.Optional[int]:
+        server_time = self._make_request("GET", "/fapi/v1/time", dict())
+
+        if server_time is not None:
+            return server_time['serverTime']
 
     def get_contracts(self) -> typing.Dict[str, Contract]:
         exchange_info = self._make_request("GET", "/fapi/v1/exchangeInfo", dict())
@@ -93,12 +222,16 @@ class BinanceFuturesClient:
 
             return contracts
 
-    def get_historical_candles(self, contract: Contract, interval: str) -> typing.List[Candle]:
+    def get_historical_candles(self, contract: Contract, interval: str,
+                               start_time: typing.Optional[int] = None) -> typing.List[Candle]:
         data = dict()
         data['symbol'] = contract.symbol
         data['interval'] = interval
         data['limit'] = 1000
 
+        if start_time is not None:
+            data['startTime'] = start_time
+
         raw_candles = self._make_request("GET", "/fapi/v1/klines", data)
 
         candles = []
@@ -123,9 +256,116 @@ class BinanceFuturesClient:
 
             return self.prices[contract.symbol]
 
+    def get_all_bid_ask(self) -> typing.Dict[str, typing.Dict[str, float]]:
+        ob_data = self._make_request("GET", "/fapi/v1/ticker/bookTicker", dict())
+
+        if ob_data is not None:
+            for ticker in ob_data:
+                self._update_quote(ticker['symbol'], float(ticker["bidPrice"]), float(ticker["askPrice"]))
+
+        return self.prices
+
+    def request_quotes(self, symbols: typing.List[str]):
+        missing = []
+
+        for symbol in symbols:
+            if symbol in self.prices:
+                self.ui_events.push_latest("price", symbol,
+                                           (symbol, self.prices[symbol]['bid'], self.prices[symbol]['ask']))
+            else:
+                missing.append(symbol)
+
+        if len(missing) == 0:
+            return
+
+        # Quotes not yet received from the websocket are fetched off the UI thread, in one request for all symbols
+        with self._quotes_lock:
+            if self._quotes_fetch_pending:
+                return
+            self._quotes_fetch_pending = True
+
+        t = threading.Thread(target=self._fetch_missing_quotes, daemon=True)
+        t.start()
+
+    def _fetch_missing_quotes(self):
+        with self._quotes_lock:
+            self._quotes_fetch_pending = False
+
+        self.get_all_bid_ask()
+
+    def get_order_book_snapshot(self, contract: Contract, limit: int = 1000) -> typing.Optional[typing.Dict]:
+        data = dict()
+        data['symbol'] = contract.symbol
+        data['limit'] = limit
+
+        return self._make_request("GET", "/fapi/v1/depth", data)
+
+    def subscribe_order_book(self, contract: Contract):
+        if contract.symbol in self.order_books:
+            return
+
+        self.order_books[contract.symbol] = OrderBook(contract.symbol)
+        self.subscribe_channel([contract], "depth@100ms")
+
+        t = threading.Thread(target=self._bootstrap_order_book, args=(contract,), daemon=True)
+        t.start()
+
+    def _bootstrap_order_book(self, contract: Contract):
+        # Diffs received meanwhile are buffered by the book and replayed on top of the REST snapshot.
+        # A single bootstrap runs per symbol, the book asks for another one if its buffer fills up before it succeeds.
+        with self._bootstrapping_lock:
+            if contract.symbol in self._bootstrapping:
+                return
+            self._bootstrapping.add(contract.symbol)
+
+        try:
+            for attempt in range(5):
+                snapshot = self.get_order_book_snapshot(contract)
+
+                if snapshot is not None and self.order_books[contract.symbol].load_snapshot(snapshot):
+                    logger.info("%s order book synchronized", contract.symbol)
+                    return
+
+                time.sleep(2 ** attempt)
+
+            logger.error("Could not synchronize the %s order book", contract.symbol)
+        finally:
+            with self._bootstrapping_lock:
+                self._bootstrapping.discard(contract.symbol)
+
+    def subscribe_mark_price(self, contract: Contract):
+        if self.pnl is None:
+            from pnl import PnlEngine
+
+            self.pnl = PnlEngine(self.prices, self.ui_events)
+            self.pnl.start()
+
+        self.subscribe_channel([contract], "markPrice@1s")
+
+    def start_scanner(self, timeframe: str, symbols: typing.Optional[typing.List[str]] = None,
+                      **params) -> "MarketScanner":
+        from scanner import MarketScanner
+
+        if symbols is None:
+            symbols = list(self.contracts.keys())
+
+        scanner = MarketScanner(symbols, timeframe, **params)
+
+        t = threading.Thread(target=self._load_scanner, args=(scanner,), daemon=True)
+        t.start()
+
+        return scanner
+
+    def _load_scanner(self, scanner: "MarketScanner"):
+        scanner.load(self)
+        self.scanners.append(scanner)
+        self.subscribe_channel([self.contracts[symbol] for symbol in scanner.symbols], "kline_" + scanner.tf)
+
+        self._add_log(f"Scanner started on {len(scanner.symbols)} symbols {scanner.tf}")
+
     def get_balances(self) -> typing.Dict[str, Balance]:
         data = dict()
-        data['timestamp'] = int(time.time() * 1000)
+        self._add_timestamp(data)
         data['signature'] = self._generate_signature(data)
 
         balances = dict()
@@ -141,15 +381,17 @@ class BinanceFuturesClient:
     def place_order(self, contract: Contract, order_type: str, quantity: float,
                     side: str, price=None, tif=None) -> OrderStatus:
 
+        template = self.order_template(contract)
+
         data = dict()
         data['symbol'] = contract.symbol
         data['side'] = side.upper()
-        data['quantity'] = quantity
+        data['quantity'] = template.format(template.quantize_quantity(quantity, order_type.upper() == "MARKET"))
         data['type'] = order_type
-        data['timestamp'] = int(time.time() * 1000)
+        self._add_timestamp(data)
 
         if price is not None:
-            data['price'] = price
+            data['price'] = template.format(template.quantize_price(price))
 
         if tif is not None:
             data['timeInForce'] = tif
@@ -160,12 +402,13 @@ class BinanceFuturesClient:
 
         if order_status is not None:
             order_status = OrderStatus(order_status)
+            self.journal.record_order(contract, order_status, data['timestamp'], data['side'], order_type, quantity)
 
         return order_status
 
     def cancel_order(self, contract: Contract, order_id: int) -> OrderStatus:
         data = dict()
-        data['timestamp'] = int(time.time() * 1000)
+        self._add_timestamp(data)
         data['symbol'] = contract.symbol
         data['orderId'] = order_id
         data['signature'] = self._generate_signature(data)
@@ -174,12 +417,13 @@ class BinanceFuturesClient:
 
         if order_status is not None:
             order_status = OrderStatus(order_status)
+            self.journal.record_order(contract, order_status, data['timestamp'])
 
         return order_status
 
     def get_order_status(self, contract: Contract, order_id: int) -> OrderStatus:
         data = dict()
-        data['timestamp'] = int(time.time() * 1000)
+        self._add_timestamp(data)
         data['symbol'] = contract.symbol
         data['orderId'] = order_id
         data['signature'] = self._generate_signature(data)
@@ -188,9 +432,24 @@ class BinanceFuturesClient:
 
         if order_status is not None:
             order_status = OrderStatus(order_status)
+            self.journal.record_order(contract, order_status, data['timestamp'])
 
         return order_status
 
+    def save_snapshot(self):
+        if self._snapshot_path is None:
+            return
+
+        try:
+            StateSnapshot.capture(self).save(self._snapshot_path)
+        except (OSError, RuntimeError) as e:
+            logger.error("Error while saving the state snapshot: %s", e)
+
+    def _snapshot_loop(self):
+        while self.reconnect:
+            time.sleep(SNAPSHOT_INTERVAL)
+            self.save_snapshot()
+
     def _start_ws(self):
         self.ws = websocket.WebSocketApp(self._wss_url, on_open=self._on_open, on_close=self._on_close,
                                          on_error=self._on_error,
@@ -199,74 +458,241 @@ class BinanceFuturesClient:
         while True:
             try:
                 if self.reconnect:
+                    self._connect_started = time.monotonic()
                     self.ws.run_forever()
                 else:
                     break
             except Exception as e:
                 logger.error("Websocket error in run_forever() method: %s", e)
+
+            self._mark_disconnected()
             time.sleep(2)
 
     def _on_open(self, ws):
-        logger.info("Binance websocket connection established.")
-        self.subscribe_channel(list(self.contracts.values()), "bookTicker")
+        now = time.monotonic()
+
+        self.ws_connected = True
+        self._last_msg_time = now
+        self._stream_last_msg.clear()
+        self.ws_metrics['last_connect_time_s'] = now - self._connect_started
+
+        if self._disconnected_at is not None:
+            downtime = now - self._disconnected_at
+            self._disconnected_at = None
+
+            self.ws_metrics['reconnects'] += 1
+            self.ws_metrics['last_downtime_s'] = downtime
+            self.ws_metrics['total_downtime_s'] += downtime
+
+            logger.warning("Binance websocket reconnected after %.1f s (handshake %.2f s)", downtime,
+                           self.ws_metrics['last_connect_time_s'])
+        else:
+            logger.info("Binance websocket connection established.")
+
+        with self._subscriptions_lock:
+            streams = sorted(self._subscriptions)
+
+        # Everything subscribed before the connection dropped is restored, not only the bookTicker streams
+        self._send_subscription("SUBSCRIBE", streams)
+
+        if self.ws_metrics['reconnects'] > 0:
+            t = threading.Thread(target=self._backfill, daemon=True)
+            t.start()
 
     def _on_close(self, ws, close_status_code, close_msg):
         logger.warning("Binance websocket connection closed.")
-        self.ws_connected = False
+        self._mark_disconnected()
+
+    def _mark_disconnected(self):
+        if self.ws_connected:
+            self.ws_connected = False
+            self._disconnected_at = time.monotonic()
+
+    def _backfill(self):
+        # Trades missed while disconnected are recovered from the REST candles, order books from a new snapshot
+        for symbol, book in list(self.order_books.items()):
+            book.invalidate()
+            self._bootstrap_order_book(self.contracts[symbol])
+
+        for b_index, strat in list(self.strategies.items()):
+            try:
+                strat.backfill()
+            except Exception as e:
+                logger.error("Error while backfilling %s %s candles: %s", strat.contract.symbol, strat.tf, e)
+
+    def _watchdog_loop(self):
+        while self.reconnect:
+            time.sleep(1)
+
+            if not self.ws_connected:
+                continue
+
+            now = time.monotonic()
+
+            if now - self._last_msg_time > WS_STALL_TIMEOUT:
+                logger.warning("No websocket message for %.0f s, reconnecting", now - self._last_msg_time)
+                self.ws_metrics['stalls'] += 1
+                self._mark_disconnected()
+                self.ws.close()
+                continue
+
+            with self._subscriptions_lock:
+                streams = list(self._subscriptions)
+
+            stalled = []
+
+            for stream in streams:
+                channel = stream.split("@", 1)[1]
+                timeout = STREAM_TIMEOUTS.get(channel.split("_")[0])
+
+                if timeout is not None and now - self._stream_last_msg.get(stream, self._last_msg_time) > timeout:
+                    stalled.append(stream)
+                    self._stream_last_msg[stream] = now
+
+            if len(stalled) > 0:
+                logger.warning("Resubscribing to %s silent streams: %s", len(stalled), ", ".join(stalled[:10]))
+                self.ws_metrics['stalls'] += 1
+                self._send_subscription("UNSUBSCRIBE", stalled)
+                self._send_subscription("SUBSCRIBE", stalled)
 
     def _on_error(self, ws, msg: str):
         logger.error("Binance websocket error: %s", msg)
 
+    def _record_first_tick(self):
+        self.first_tick_ms = (time.perf_counter() - self._started_at) * 1000
+
+        if self.first_tick_ms > FIRST_TICK_TARGET_MS:
+            logger.warning("First market data tick %.0f ms after startup (target %s ms)", self.first_tick_ms,
+                           FIRST_TICK_TARGET_MS)
+        else:
+            logger.info("First market data tick %.0f ms after startup", self.first_tick_ms)
+
     def _on_message(self, ws, msg: str):
         data = json.loads(msg)
 
+        now = time.monotonic()
+        self._last_msg_time = now
+
         if "e" in data:
+            if self.first_tick_ms is None:
+                self._record_first_tick()
+
+            if data['e'] == "kline":
+                self._stream_last_msg[f"{data['s'].lower()}@kline_{data['k']['i']}"] = now
+            elif data['e'] == "depthUpdate":
+                self._stream_last_msg[f"{data['s'].lower()}@depth@100ms"] = now
+
             if data['e'] == "bookTicker":
                 symbol = data['s']
+                bid = float(data["b"])
+                ask = float(data["a"])
 
-                if symbol not in self.prices:
-                    self.prices[symbol] = {"bid": float(data["b"]), "ask": float(data["a"])}
-                else:
-                    self.prices[symbol]['bid'] = float(data["b"])
-                    self.prices[symbol]['ask'] = float(data["a"])
-                try:
-                    for b_index, strat in self.strategies.items():
-                        if strat.contract.symbol == symbol:
-                            for trade in strat.trades:
-                                if trade.status == "open" and trade.entry_prize is not None:
-                                    if trade.side == 'long':
-                                        trade.pnl = (self.prices[symbol]['bid'] - trade.entry_prize) * trade.quantity
-                                    elif trade.side == 'short':
-                                        trade.pnl = (trade.entry_prize - self.prices[symbol]['bid']) * trade.quantity
-                except RuntimeError as e:
-                    logger.error(f"Error while looping through the Binance Strategies: {e}")
+                if self.tick_archive is not None and symbol in self.contracts:
+                    self.tick_archive.append_book_tick(self.contracts[symbol], data.get('T', data['E']), bid, ask,
+                                                       float(data['B']), float(data['A']))
+
+                # The PnL of open trades is recomputed by the PnL engine on its own interval, not per quote
+                self._update_quote(symbol, bid, ask)
+
+            elif data['e'] == "markPriceUpdate":
+                if self.pnl is not None:
+                    self.pnl.on_mark_price(data['s'], float(data['p']), float(data['r'] or 0), data['T'], data['E'])
 
             elif data['e'] == "aggTrade":
 
                 symbol = data['s']
 
+                if self.tick_archive is not None and symbol in self.contracts:
+                    self.tick_archive.append_trade(self.contracts[symbol], data['T'], float(data['p']),
+                                                   float(data['q']), data['m'])
+
+                self._on_market_trade(symbol, float(data['p']), float(data['q']), data['T'])
+
                 for key, strat in self.strategies.items():
                     if strat.contract.symbol == symbol:
-                        res = strat.parse_trades(float(data['p']), float(data['q']), data['T'])
-                        strat.check_trade(res)
+                        strat.on_trade(float(data['p']), float(data['q']), data['T'])
+
+            elif data['e'] == "kline":
+                kline = data['k']
+
+                if not kline['x']:
+                    return
+
+                for scanner in self.scanners:
+                    if scanner.tf != kline['i']:
+                        continue
+
+                    signals = scanner.on_kline(data['s'], kline['t'], float(kline['o']), float(kline['h']),
+                                               float(kline['l']), float(kline['c']), float(kline['v']))
+
+                    # Shown in the log panel of the interface and kept for GET /scanner in headless mode
+                    for signal in (signals or [])[:5]:
+                        self._add_log(f"Scanner {signal.kind} {'long' if signal.direction == 1 else 'short'} "
+                                      f"signal on {signal.symbol} {scanner.tf} (score {signal.score:.2f})")
+                        self.scan_signals.append({"time": kline['t'], "timeframe": scanner.tf,
+                                                  "symbol": signal.symbol, "kind": signal.kind,
+                                                  "direction": signal.direction, "score": signal.score,
+                                                  "close": signal.close})
+
+            elif data['e'] == "depthUpdate":
+                symbol = data['s']
+
+                if symbol in self.order_books and not self.order_books[symbol].on_diff(data):
+                    t = threading.Thread(target=self._bootstrap_order_book, args=(self.contracts[symbol],),
+                                         daemon=True)
+                    t.start()
+
+    def _on_market_trade(self, symbol: str, price: float, quantity: float, timestamp: int):
+        # Extension point for the paper trading client, which fills resting orders against the trade stream
+        pass
+
+    def _update_quote(self, symbol: str, bid: float, ask: float) -> bool:
+        if symbol not in self.prices:
+            self.prices[symbol] = {"bid": bid, "ask": ask}
+        elif self.prices[symbol]['bid'] == bid and self.prices[symbol]['ask'] == ask:
+            return False
+        else:
+            self.prices[symbol]['bid'] = bid
+            self.prices[symbol]['ask'] = ask
+
+        self.ui_events.push_latest("price", symbol, (symbol, bid, ask))
+        self.execution.on_quote(symbol)
+
+        return True
+
+    def _stream_names(self, contracts: typing.List[Contract], channel: str) -> typing.List[str]:
+        return [contract.symbol.lower() + "@" + channel for contract in contracts]
 
     def subscribe_channel(self, contracts: typing.List[Contract], channel: str):
-        data = dict()
-        data['method'] = "SUBSCRIBE"
-        data['params'] = []
+        streams = self._stream_names(contracts, channel)
 
-        for contract in contracts:
-            data['params'].append(contract.symbol.lower() + "@" + channel)
-        data['id'] = self._ws_id
-        try:
-            self.ws.send(json.dumps(data))
-        except Exception as e:
-            logger.error("Websocket error while subscribing to %s %s updates: %s", len(contracts), channel, e)
-            return None
+        with self._subscriptions_lock:
+            new_streams = [stream for stream in streams if stream not in self._subscriptions]
+            self._subscriptions.update(new_streams)
+
+        # Streams subscribed while disconnected are sent when the connection opens
+        if self.ws_connected and len(new_streams) > 0:
+            self._send_subscription("SUBSCRIBE", new_streams)
+
+    def _send_subscription(self, method: str, streams: typing.List[str]):
+        for start in range(0, len(streams), WS_SUBSCRIBE_BATCH):
+            if start > 0:
+                time.sleep(WS_SUBSCRIBE_DELAY)
+
+            data = dict()
+            data['method'] = method
+            data['params'] = streams[start:start + WS_SUBSCRIBE_BATCH]
+            data['id'] = self._ws_id
+
+            try:
+                self.ws.send(json.dumps(data))
+            except Exception as e:
+                logger.error("Websocket error while sending %s for %s streams: %s", method, len(data['params']), e)
+                return
 
-        self._ws_id += 1
+            self._ws_id += 1
 
-    def get_trade_size(self, contract: Contract, price: float, balance_pct: float):
+    def get_trade_size(self, contract: Contract, price: float, balance_pct: float, side: typing.Optional[str] = None):
         balance = self.get_balances()
 
         if balance is not None:
@@ -279,7 +705,24 @@ class BinanceFuturesClient:
 
         trade_size = (balance * balance_pct / 100) / price
 
-        trade_size = round(round(trade_size / contract.lot_size) * contract.lot_size, 8)
+        book = self.order_books.get(contract.symbol)
+
+        if side is not None and book is not None and book.synced:
+            max_size = book.max_quantity(side, MAX_MARKET_SLIPPAGE_PCT)
+
+            if trade_size > max_size:
+                logger.warning("%s trade size %s reduced to %s to keep the expected slippage under %s%%",
+                               contract.symbol, trade_size, max_size, MAX_MARKET_SLIPPAGE_PCT)
+                trade_size = max_size
+
+        template = self.order_template(contract)
+        quantity = template.quantize_quantity(trade_size, market=True)
+
+        if quantity == 0 or not template.meets_notional(quantity, price):
+            logger.warning("%s trade size %s is below the minimum quantity or notional", contract.symbol, trade_size)
+            return None
+
+        trade_size = float(quantity)
 
         logger.info("Binance Futures current USDT balance = %s, trade size = %s", balance, trade_size)
 
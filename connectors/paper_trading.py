@@ -0,0 +1,229 @@
+import logging
+import threading
+import typing
+
+from models import *
+from connectors.binance_futures import BinanceFuturesClient
+
+logger = logging.getLogger()
+
+
+class PaperTradingClient(BinanceFuturesClient):
+    def __init__(self, public_key: str = "", secret_key: str = "", testnet: bool = False,
+                 initial_balance: float = 10000, taker_fee_pct: float = 0.04, maker_fee_pct: float = 0.02,
+                 slippage_pct: float = 0, latency_ms: int = 0, snapshot_path: typing.Optional[str] = "paper.snapshot",
+                 journal_path: str = "paper.db", **kwargs):
+        # Market data comes from the real stream, orders and balances never reach the exchange.
+        # Set before the parent constructor, which already asks for the balances.
+        self.taker_fee_pct = taker_fee_pct
+        self.maker_fee_pct = maker_fee_pct
+        self.slippage_pct = slippage_pct
+        self.latency_ms = latency_ms
+
+        self.wallet_balance = initial_balance
+        self.fees_paid = 0.0
+        self.positions: typing.Dict[str, typing.List[float]] = dict()
+
+        self._orders: typing.Dict[int, typing.Dict] = dict()
+        self._open_orders: typing.Dict[str, typing.List[int]] = dict()
+        self._next_order_id = 1
+        self._paper_lock = threading.RLock()
+
+        super().__init__(public_key, secret_key, testnet, snapshot_path=snapshot_path, journal_path=journal_path,
+                         **kwargs)
+
+    def _order_info(self, order: typing.Dict) -> typing.Dict:
+        return {"orderId": order['order_id'], "status": order['status'], "avgPrice": order['avg_price'],
+                "executedQty": order['executed_qty']}
+
+    def get_balances(self) -> typing.Dict[str, Balance]:
+        with self._paper_lock:
+            unrealized_pnl = 0.0
+            initial_margin = 0.0
+
+            for symbol, (quantity, entry_price) in self.positions.items():
+                quote = self.prices.get(symbol)
+                if quote is None:
+                    continue
+
+                mark_price = (quote['bid'] + quote['ask']) / 2
+                unrealized_pnl += (mark_price - entry_price) * quantity
+                initial_margin += abs(quantity) * mark_price
+
+            return {"USDT": Balance({"initialMargin": initial_margin, "maintMargin": 0,
+                                     "marginBalance": self.wallet_balance + unrealized_pnl,
+                                     "walletBalance": self.wallet_balance, "unrealizedProfit": unrealized_pnl})}
+
+    def place_order(self, contract: Contract, order_type: str, quantity: float,
+                    side: str, price=None, tif=None) -> OrderStatus:
+        timestamp = self.time_sync.now_ms()
+        # Same rounding as the real exchange would require
+        quantity = float(self.order_template(contract).quantize_quantity(quantity, order_type.upper() == "MARKET"))
+
+        with self._paper_lock:
+            order = {"order_id": self._next_order_id, "contract": contract, "side": side.upper(),
+                     "type": order_type.upper(), "quantity": quantity, "price": price, "tif": tif, "status": "NEW",
+                     "avg_price": 0, "executed_qty": 0, "active_at": timestamp + self.latency_ms}
+            self._next_order_id += 1
+
+            self._orders[order['order_id']] = order
+            self._open_orders.setdefault(contract.symbol, []).append(order['order_id'])
+
+            if self.latency_ms == 0:
+                order['arrived'] = True
+                self._try_fill(order, aggressive=True)
+
+            order_status = OrderStatus(self._order_info(order))
+
+        self.journal.record_order(contract, order_status, timestamp, order['side'], order_type, quantity)
+
+        return order_status
+
+    def cancel_order(self, contract: Contract, order_id: int) -> OrderStatus:
+        with self._paper_lock:
+            order = self._orders.get(order_id)
+
+            if order is None:
+                return None
+
+            if order['status'] == "NEW":
+                order['status'] = "CANCELED"
+                self._open_orders[contract.symbol].remove(order_id)
+
+            order_status = OrderStatus(self._order_info(order))
+
+        self.journal.record_order(contract, order_status, self.time_sync.now_ms())
+
+        return order_status
+
+    def get_order_status(self, contract: Contract, order_id: int) -> OrderStatus:
+        with self._paper_lock:
+            order = self._orders.get(order_id)
+
+            if order is None:
+                return None
+
+            order_status = OrderStatus(self._order_info(order))
+
+        self.journal.record_order(contract, order_status, self.time_sync.now_ms())
+
+        return order_status
+
+    def _market_price(self, order: typing.Dict) -> typing.Optional[float]:
+        symbol = order['contract'].symbol
+        book = self.order_books.get(symbol)
+
+        # Walking the local order book gives the price impact of the order size, the quote is a fallback
+        if book is not None and book.synced:
+            fill = book.expected_fill(order['side'], order['quantity'])
+            if fill is not None:
+                return fill[0]
+
+        quote = self.prices.get(symbol)
+
+        if quote is None:
+            return None
+
+        return quote['ask'] if order['side'] == "BUY" else quote['bid']
+
+    def _try_fill(self, order: typing.Dict, aggressive: bool, trade_price: typing.Optional[float] = None):
+        # aggressive: the order just became active and takes liquidity if it can,
+        # otherwise a resting limit order is filled as maker when the market trades through its price
+        is_buy = order['side'] == "BUY"
+
+        if order['type'] == "MARKET":
+            price = self._market_price(order)
+            if price is None:
+                return
+            fill_price = price * (1 + self.slippage_pct / 100) if is_buy else price * (1 - self.slippage_pct / 100)
+            self._fill(order, fill_price, self.taker_fee_pct)
+            return
+
+        limit = float(order['price'])
+
+        if aggressive:
+            if order['tif'] == "GTX":
+                # Post-only: like the exchange, the order expires rather than taking liquidity
+                quote = self.prices.get(order['contract'].symbol)
+                if quote is not None and (limit >= quote['ask'] if is_buy else limit <= quote['bid']):
+                    self._expire(order)
+                return
+
+            price = self._market_price(order)
+            if price is not None and (price <= limit if is_buy else price >= limit):
+                self._fill(order, price, self.taker_fee_pct)
+            return
+
+        if trade_price is not None and (trade_price < limit if is_buy else trade_price > limit):
+            self._fill(order, limit, self.maker_fee_pct)
+
+    def _fill(self, order: typing.Dict, price: float, fee_pct: float):
+        symbol = order['contract'].symbol
+        quantity = order['quantity'] if order['side'] == "BUY" else -order['quantity']
+
+        fee = abs(quantity) * price * fee_pct / 100
+        self.wallet_balance -= fee
+        self.fees_paid += fee
+
+        position_qty, entry_price = self.positions.get(symbol, (0.0, 0.0))
+
+        if position_qty == 0 or (position_qty > 0) == (quantity > 0):
+            new_qty = position_qty + quantity
+            entry_price = (position_qty * entry_price + quantity * price) / new_qty
+        else:
+            closed_qty = min(abs(quantity), abs(position_qty))
+            self.wallet_balance += closed_qty * (price - entry_price) * (1 if position_qty > 0 else -1)
+            new_qty = position_qty + quantity
+
+            if abs(quantity) > abs(position_qty):
+                entry_price = price
+
+        if abs(new_qty) < order['contract'].lot_size / 2:
+            self.positions.pop(symbol, None)
+        else:
+            self.positions[symbol] = [new_qty, entry_price]
+
+        order['status'] = "FILLED"
+        order['avg_price'] = price
+        order['executed_qty'] = order['quantity']
+        self._open_orders[symbol].remove(order['order_id'])
+
+        logger.info("Paper %s %s %s %s filled at %s (fee %.4f)", order['type'], order['side'], order['quantity'],
+                    symbol, price, fee)
+
+    def _expire(self, order: typing.Dict):
+        order['status'] = "EXPIRED"
+        self._open_orders[order['contract'].symbol].remove(order['order_id'])
+
+        logger.info("Paper post-only %s %s %s at %s expired, it would have crossed the spread", order['side'],
+                    order['quantity'], order['contract'].symbol, order['price'])
+
+    def _process_orders(self, symbol: str, trade_price: typing.Optional[float] = None):
+        if len(self._open_orders.get(symbol, [])) == 0:
+            return
+
+        now = self.time_sync.now_ms()
+
+        with self._paper_lock:
+            for order_id in list(self._open_orders.get(symbol, [])):
+                order = self._orders[order_id]
+
+                if order['active_at'] > now:
+                    continue
+
+                # The first check after the latency elapsed is the moment the order reaches the simulated exchange
+                aggressive = not order.get('arrived', False)
+                order['arrived'] = True
+
+                self._try_fill(order, aggressive, trade_price)
+
+    def _update_quote(self, symbol: str, bid: float, ask: float) -> bool:
+        updated = super()._update_quote(symbol, bid, ask)
+
+        if updated:
+            self._process_orders(symbol)
+
+        return updated
+
+    def _on_market_trade(self, symbol: str, price: float, quantity: float, timestamp: int):
+        self._process_orders(symbol, price)
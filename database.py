@@ -1,6 +1,18 @@
+import logging
+import queue
 import sqlite3
+import threading
 import typing
 
+from models import *
+
+if typing.TYPE_CHECKING:
+    from execution import Execution
+
+logger = logging.getLogger()
+
+JOURNAL_BATCH_SIZE = 500
+
 
 class WorkspaceData:
     def __init__(self):
@@ -8,6 +20,8 @@ class WorkspaceData:
         self.conn.row_factory = sqlite3.Row
         self.cursor = self.conn.cursor()
 
+        self.cursor.execute("PRAGMA journal_mode=WAL")
+
         self.cursor.execute("CREATE TABLE IF NOT EXISTS watchlist(symbol TEXT, exchange TEXT)")
         self.cursor.execute(
             "CREATE TABLE IF NOT EXISTS strategies(strategy_type TEXT, contract TEXT, timeframe TEXT, balance_pct REAL, take_profit REAL, stop_loss REAL, extra_params TEXT)")
@@ -32,3 +46,157 @@ class WorkspaceData:
         data = self.cursor.fetchall()
 
         return data
+
+
+class TradeJournal:
+    def __init__(self, path: str = "database.db"):
+        self._path = path
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.cursor = self.conn.cursor()
+        self._read_lock = threading.Lock()
+
+        self.cursor.execute("PRAGMA journal_mode=WAL")
+
+        self.cursor.execute(
+            "CREATE TABLE IF NOT EXISTS trades(trade_id TEXT PRIMARY KEY, time INTEGER, symbol TEXT, exchange TEXT, "
+            "strategy TEXT, timeframe TEXT, side TEXT, entry_price REAL, status TEXT, pnl REAL, quantity REAL, "
+            "entry_id INTEGER)")
+        self.cursor.execute(
+            "CREATE TABLE IF NOT EXISTS orders(order_id INTEGER, time INTEGER, symbol TEXT, side TEXT, "
+            "order_type TEXT, quantity REAL, status TEXT, avg_price REAL, PRIMARY KEY (symbol, order_id))")
+        self.cursor.execute(
+            "CREATE TABLE IF NOT EXISTS fills(order_id INTEGER, time INTEGER, symbol TEXT, price REAL, "
+            "quantity REAL, PRIMARY KEY (symbol, order_id))")
+        self.cursor.execute(
+            "CREATE TABLE IF NOT EXISTS executions(execution_id TEXT PRIMARY KEY, time INTEGER, symbol TEXT, "
+            "side TEXT, algo TEXT, quantity REAL, filled_qty REAL, arrival_price REAL, avg_price REAL, "
+            "slippage_bps REAL, child_orders INTEGER, duration_ms INTEGER, status TEXT)")
+
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS trades_strategy_time ON trades(strategy, time)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS trades_symbol_time ON trades(symbol, time)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS trades_status ON trades(status)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS orders_symbol_time ON orders(symbol, time)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS fills_symbol_time ON fills(symbol, time)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS executions_algo_time ON executions(algo, time)")
+
+        self.conn.commit()
+
+        self._queue = queue.Queue()
+
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _write_loop(self):
+        conn = sqlite3.connect(self._path)
+        cursor = conn.cursor()
+
+        while True:
+            statement = self._queue.get()
+
+            if statement is None:
+                break
+
+            batch = [statement]
+
+            # Group commit: everything queued while the previous transaction was running goes into this one
+            while len(batch) < JOURNAL_BATCH_SIZE:
+                try:
+                    statement = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if statement is None:
+                    self._queue.put(None)
+                    break
+                batch.append(statement)
+
+            try:
+                for sql_statement, params in batch:
+                    cursor.execute(sql_statement, params)
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error("Error while writing %s statements to the trade journal: %s", len(batch), e)
+                conn.rollback()
+
+        conn.close()
+
+    def record_trade(self, trade: Trade, timeframe: str):
+        self._queue.put(("INSERT OR REPLACE INTO trades (trade_id, time, symbol, exchange, strategy, timeframe, side, "
+                         "entry_price, status, pnl, quantity, entry_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (trade.trade_id, trade.time, trade.contract.symbol, trade.contract.exchange, trade.strategy,
+                          timeframe, trade.side, trade.entry_prize, trade.status, trade.pnl, trade.quantity,
+                          trade.entry_id)))
+
+    def record_order(self, contract: Contract, order_status: OrderStatus, timestamp: int, side: str = None,
+                     order_type: str = None, quantity: float = None):
+        self._queue.put(("INSERT INTO orders (order_id, time, symbol, side, order_type, quantity, status, avg_price) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (symbol, order_id) DO UPDATE SET "
+                         "status = excluded.status, avg_price = excluded.avg_price",
+                         (order_status.order_id, timestamp, contract.symbol, side, order_type, quantity,
+                          order_status.status, order_status.avg_price)))
+
+        if order_status.status == "filled":
+            self._queue.put(("INSERT OR IGNORE INTO fills (order_id, time, symbol, price, quantity) "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             (order_status.order_id, timestamp, contract.symbol, order_status.avg_price,
+                              order_status.executed_qty)))
+
+    def record_execution(self, execution: "Execution"):
+        self._queue.put(("INSERT OR REPLACE INTO executions (execution_id, time, symbol, side, algo, quantity, "
+                         "filled_qty, arrival_price, avg_price, slippage_bps, child_orders, duration_ms, status) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (execution.execution_id, execution.start_ms, execution.contract.symbol, execution.side,
+                          execution.algo, execution.quantity, execution.filled_qty, execution.arrival_price,
+                          execution.avg_price, execution.slippage_bps, execution.child_orders,
+                          execution.end_ms - execution.start_ms, execution.status)))
+
+    def get_trades(self, strategy: typing.Optional[str] = None, symbol: typing.Optional[str] = None,
+                   status: typing.Optional[str] = None, start_time: typing.Optional[int] = None,
+                   end_time: typing.Optional[int] = None) -> typing.List[sqlite3.Row]:
+        conditions = []
+        params = []
+
+        for column, value in (("strategy", strategy), ("symbol", symbol), ("status", status)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+
+        if start_time is not None:
+            conditions.append("time >= ?")
+            params.append(start_time)
+
+        if end_time is not None:
+            conditions.append("time < ?")
+            params.append(end_time)
+
+        sql_statement = "SELECT * FROM trades"
+
+        if len(conditions) > 0:
+            sql_statement += " WHERE " + " AND ".join(conditions)
+
+        with self._read_lock:
+            self.cursor.execute(sql_statement + " ORDER BY time", params)
+            data = self.cursor.fetchall()
+
+        return data
+
+    def has_trade(self, trade_id: str) -> bool:
+        with self._read_lock:
+            self.cursor.execute("SELECT 1 FROM trades WHERE trade_id = ?", (trade_id,))
+            data = self.cursor.fetchone()
+
+        return data is not None
+
+    def get_open_trades(self, strategy: str, symbol: str, timeframe: str) -> typing.List[sqlite3.Row]:
+        with self._read_lock:
+            self.cursor.execute("SELECT * FROM trades WHERE strategy = ? AND symbol = ? AND timeframe = ? "
+                                "AND status = 'open' ORDER BY time", (strategy, symbol, timeframe))
+            data = self.cursor.fetchall()
+
+        return data
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join()
+        self.conn.close()
@@ -0,0 +1,54 @@
+import queue
+import threading
+import typing
+
+
+class UiEventQueue:
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._latest = dict()
+        self._lock = threading.Lock()
+
+        self.enabled = True
+
+    def push(self, event_type: str, data: typing.Any):
+        if not self.enabled:
+            return
+
+        self._queue.put((event_type, False, data))
+
+    def push_latest(self, event_type: str, key: typing.Hashable, data: typing.Any):
+        # Only the most recent value per key is delivered: a burst of updates for the same symbol or trade
+        # between two UI ticks costs a single widget update.
+        if not self.enabled:
+            return
+
+        with self._lock:
+            pending = (event_type, key) in self._latest
+            self._latest[(event_type, key)] = data
+
+        if not pending:
+            self._queue.put((event_type, True, key))
+
+    def drain(self, max_events: int) -> typing.List[typing.Tuple[str, typing.Any]]:
+        events = []
+
+        while len(events) < max_events:
+            try:
+                event_type, coalesced, data = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if coalesced:
+                with self._lock:
+                    data = self._latest.pop((event_type, data))
+
+            events.append((event_type, data))
+
+        return events
+
+    def empty(self) -> bool:
+        return self._queue.empty()
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
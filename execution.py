@@ -0,0 +1,369 @@
+import collections
+import decimal
+import logging
+import threading
+import typing
+import uuid
+
+from models import *
+
+if typing.TYPE_CHECKING:
+    from connectors.binance_futures import BinanceFuturesClient
+
+logger = logging.getLogger()
+
+EXECUTION_ALGOS = ("market", "twap", "iceberg", "post_only")
+EXECUTION_TICK = 0.2
+EXECUTION_POLL_MS = 1000
+EXECUTION_REPRICE_MS = 500
+EXECUTION_HISTORY = 200
+# Requests have no timeout, stop does not wait forever for a step stuck on one
+EXECUTION_STOP_WAIT = 10
+# Child orders the exchange refused or that could not be sent, before the execution is given up
+EXECUTION_MAX_FAILURES = 3
+
+DONE_STATUSES = ("filled", "canceled", "expired", "rejected")
+
+
+class Execution:
+    def __init__(self, contract: Contract, side: str, quantity: float, algo: str, arrival_price: float,
+                 start_ms: int, params: typing.Dict,
+                 on_done: typing.Optional[typing.Callable[["Execution"], None]] = None):
+        self.execution_id = uuid.uuid4().hex
+        self.contract = contract
+        self.side = side.upper()
+        self.quantity = quantity
+        self.algo = algo
+        self.params = params
+        self.on_done = on_done
+
+        # Mid price when the parent order was submitted, the reference of the slippage
+        self.arrival_price = arrival_price
+        self.start_ms = start_ms
+        self.end_ms: typing.Optional[int] = None
+        self.status = "working"
+
+        self.filled_qty = 0.0
+        self.filled_notional = 0.0
+        self.child_orders = 0
+        self.failed_orders = 0
+        self.slices_sent = 0
+        self.swept = False
+
+        # The child order currently working: order_id, type, quantity, price, executed, notional, placed_at, polled_at
+        self.child: typing.Optional[typing.Dict] = None
+
+    @property
+    def remaining(self) -> float:
+        return max(self.quantity - self.filled_qty, 0)
+
+    @property
+    def avg_price(self) -> typing.Optional[float]:
+        if self.filled_qty == 0:
+            return None
+
+        return self.filled_notional / self.filled_qty
+
+    @property
+    def slippage_bps(self) -> typing.Optional[float]:
+        # Positive when the fills are worse than the arrival price
+        if self.avg_price is None or self.arrival_price == 0:
+            return None
+
+        sign = 1 if self.side == "BUY" else -1
+
+        return sign * (self.avg_price - self.arrival_price) / self.arrival_price * 10000
+
+    def info(self) -> typing.Dict:
+        return {"execution_id": self.execution_id, "symbol": self.contract.symbol, "side": self.side,
+                "algo": self.algo, "quantity": self.quantity, "filled_qty": self.filled_qty,
+                "arrival_price": self.arrival_price, "avg_price": self.avg_price, "slippage_bps": self.slippage_bps,
+                "child_orders": self.child_orders, "failed_orders": self.failed_orders, "status": self.status,
+                "start_ms": self.start_ms, "end_ms": self.end_ms}
+
+
+class ExecutionEngine:
+    def __init__(self, client: "BinanceFuturesClient", tick: float = EXECUTION_TICK):
+        self.client = client
+        self._tick = tick
+
+        self._active: typing.Dict[str, Execution] = dict()
+        self._symbols: typing.Counter[str] = collections.Counter()
+        self.history: typing.Deque[Execution] = collections.deque(maxlen=EXECUTION_HISTORY)
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread: typing.Optional[threading.Thread] = None
+
+    def submit(self, contract: Contract, side: str, quantity: float, algo: str = "market",
+               on_done: typing.Optional[typing.Callable[[Execution], None]] = None, **params) -> Execution:
+        # duration (s): TWAP horizon, and how long iceberg / post-only orders rest before the rest is sent at market
+        # slices: number of TWAP child orders. clip_pct: visible size of an iceberg, in % of the parent quantity.
+        if algo not in EXECUTION_ALGOS:
+            raise ValueError(f"Unknown execution algo {algo}")
+
+        quote = self.client.prices.get(contract.symbol)
+        arrival_price = (quote['bid'] + quote['ask']) / 2 if quote is not None else 0
+
+        execution = Execution(contract, side, quantity, algo, arrival_price, self.client.time_sync.now_ms(),
+                              params, on_done)
+
+        with self._lock:
+            self._active[execution.execution_id] = execution
+            self._symbols[contract.symbol] += 1
+
+        logger.info("%s execution of %s %s %s started (arrival price %s)", algo, execution.side, quantity,
+                    contract.symbol, arrival_price)
+
+        self.start()
+        self._wake.set()
+
+        return execution
+
+    def on_quote(self, symbol: str):
+        # Resting orders are re-priced as soon as the best bid/ask moves rather than at the next tick
+        if self._symbols.get(symbol, 0) > 0:
+            self._wake.set()
+
+    def working(self) -> int:
+        return len(self._active)
+
+    def resize_history(self, maxlen: int) -> int:
+        # Returns the number of executions dropped
+        if maxlen == self.history.maxlen:
+            return 0
+
+        dropped = max(len(self.history) - maxlen, 0)
+        self.history = collections.deque(self.history, maxlen=maxlen)
+
+        return dropped
+
+    def start(self):
+        if self._running:
+            return
+
+        self._running = True
+
+        self._thread = threading.Thread(target=self._run, name="execution", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+
+        # The engine thread may be stepping an execution, its child orders are only canceled once it is done
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(EXECUTION_STOP_WAIT)
+            if self._thread.is_alive():
+                logger.warning("Execution thread still busy after %s seconds, canceling its orders anyway",
+                               EXECUTION_STOP_WAIT)
+
+        with self._lock:
+            executions = list(self._active.values())
+
+        for execution in executions:
+            if execution.child is not None:
+                self._cancel_child(execution)
+            self._finish(execution, "canceled")
+
+    def _run(self):
+        while self._running:
+            self._wake.wait(self._tick)
+            self._wake.clear()
+
+            with self._lock:
+                executions = list(self._active.values())
+
+            for execution in executions:
+                try:
+                    self._step(execution)
+                except Exception as e:
+                    logger.error("Error while working the %s execution on %s: %s", execution.algo,
+                                 execution.contract.symbol, e)
+
+    def _step(self, execution: Execution):
+        now = self.client.time_sync.now_ms()
+        child = execution.child
+
+        if child is not None and now - child['polled_at'] >= EXECUTION_POLL_MS:
+            child['polled_at'] = now
+            order_status = self.client.get_order_status(execution.contract, child['order_id'])
+            if order_status is not None:
+                self._account(execution, order_status)
+
+        template = self.client.order_template(execution.contract)
+
+        if template.quantize_quantity(execution.remaining, market=True) == 0:
+            if execution.child is not None:
+                self._cancel_child(execution)
+            self._finish(execution, "filled")
+            return
+
+        if execution.child is None and execution.failed_orders >= EXECUTION_MAX_FAILURES:
+            logger.error("%s execution on %s failed: %s child orders could not be placed", execution.algo,
+                         execution.contract.symbol, execution.failed_orders)
+            self._finish(execution, "failed")
+            return
+
+        if execution.algo == "market":
+            if execution.child is None and execution.child_orders == 0:
+                self._place(execution, "MARKET", execution.remaining)
+            elif execution.child is None:
+                self._finish(execution, "canceled")
+        elif execution.algo == "twap":
+            self._step_twap(execution, now)
+        else:
+            self._step_passive(execution, now)
+
+    def _step_twap(self, execution: Execution, now: int):
+        slices = max(int(execution.params.get('slices', 5)), 1)
+        duration_ms = execution.params.get('duration', 60) * 1000
+
+        if execution.child is not None:
+            return
+
+        if execution.slices_sent > slices:
+            self._finish(execution, "canceled")
+            return
+
+        if execution.slices_sent == slices:
+            # Leftover of slices rounded down to the step size, or of orders that did not fill
+            execution.slices_sent += 1
+            self._place(execution, "MARKET", execution.remaining)
+            return
+
+        if now < execution.start_ms + execution.slices_sent * duration_ms / slices:
+            return
+
+        quantity = execution.remaining / (slices - execution.slices_sent)
+        execution.slices_sent += 1
+
+        if self.client.order_template(execution.contract).quantize_quantity(quantity, market=True) == 0:
+            # Slice below the minimum quantity, it is carried over to the next one
+            return
+
+        self._place(execution, "MARKET", quantity)
+
+    def _step_passive(self, execution: Execution, now: int):
+        child = execution.child
+        deadline = execution.start_ms + execution.params.get('duration', 60) * 1000
+
+        if now >= deadline:
+            # Whatever did not fill passively in time is taken at market
+            if child is not None and child['type'] == "LIMIT":
+                self._cancel_child(execution)
+            if execution.child is None and not execution.swept:
+                execution.swept = True
+                self._place(execution, "MARKET", execution.remaining)
+            elif execution.child is None:
+                self._finish(execution, "canceled")
+            return
+
+        price = self._passive_price(execution)
+
+        if price is None:
+            return
+
+        if child is not None:
+            if child['price'] != price and now - child['placed_at'] >= EXECUTION_REPRICE_MS:
+                self._cancel_child(execution)
+            return
+
+        quantity = execution.remaining
+
+        if execution.algo == "iceberg":
+            # A clip below the minimum quantity would be refused by the exchange, it is sent at the minimum
+            clip = execution.quantity * execution.params.get('clip_pct', 20) / 100
+            min_qty = float(self.client.order_template(execution.contract).min_qty)
+            quantity = min(quantity, max(clip, min_qty))
+
+        self._place(execution, "LIMIT", quantity, price)
+
+    def _passive_price(self, execution: Execution) -> typing.Optional[float]:
+        # Joins the best bid when buying and the best ask when selling, never crossing the spread
+        quote = self.client.prices.get(execution.contract.symbol)
+
+        if quote is None:
+            return None
+
+        template = self.client.order_template(execution.contract)
+
+        if execution.side == "BUY":
+            return float(template.quantize_price(quote['bid'], decimal.ROUND_DOWN))
+
+        return float(template.quantize_price(quote['ask'], decimal.ROUND_UP))
+
+    def _place(self, execution: Execution, order_type: str, quantity: float, price: typing.Optional[float] = None):
+        # GTX: post-only, the exchange expires the order instead of letting it take liquidity
+        tif = "GTX" if order_type == "LIMIT" else None
+        self.client.risk.record_order()
+        order_status = self.client.place_order(execution.contract, order_type, quantity, execution.side, price, tif)
+
+        if order_status is None:
+            execution.failed_orders += 1
+            return
+
+        now = self.client.time_sync.now_ms()
+
+        execution.child_orders += 1
+        execution.child = {"order_id": order_status.order_id, "type": order_type, "quantity": quantity,
+                           "price": price, "executed": 0.0, "notional": 0.0, "placed_at": now, "polled_at": now}
+
+        self._account(execution, order_status)
+
+    def _cancel_child(self, execution: Execution):
+        order_status = self.client.cancel_order(execution.contract, execution.child['order_id'])
+
+        if order_status is None:
+            # Already filled or expired, the exchange refuses the cancel
+            order_status = self.client.get_order_status(execution.contract, execution.child['order_id'])
+
+        if order_status is not None:
+            self._account(execution, order_status)
+
+    def _account(self, execution: Execution, order_status: OrderStatus):
+        child = execution.child
+        notional = order_status.executed_qty * order_status.avg_price
+
+        if order_status.executed_qty > child['executed']:
+            execution.filled_qty += order_status.executed_qty - child['executed']
+            execution.filled_notional += notional - child['notional']
+            child['executed'] = order_status.executed_qty
+            child['notional'] = notional
+
+        if order_status.status in DONE_STATUSES:
+            execution.child = None
+
+    def _finish(self, execution: Execution, status: str):
+        with self._lock:
+            if self._active.pop(execution.execution_id, None) is None:
+                return
+            self._symbols[execution.contract.symbol] -= 1
+
+        execution.status = status
+        execution.end_ms = self.client.time_sync.now_ms()
+        self.history.append(execution)
+
+        self.client.journal.record_execution(execution)
+
+        logger.info("%s execution of %s %s %s %s: %s filled at %s, slippage %s bps, %s child orders", execution.algo,
+                    execution.side, execution.quantity, execution.contract.symbol, execution.status,
+                    execution.filled_qty, execution.avg_price, execution.slippage_bps, execution.child_orders)
+
+        if execution.on_done is not None:
+            execution.on_done(execution)
+
+    def stats(self) -> typing.Dict[str, typing.Dict]:
+        # Fill quality of the recent executions, per algo
+        per_algo = collections.defaultdict(list)
+
+        for execution in list(self.history):
+            if execution.slippage_bps is not None:
+                per_algo[execution.algo].append(execution)
+
+        return {algo: {"executions": len(executions),
+                       "avg_slippage_bps": sum(e.slippage_bps for e in executions) / len(executions),
+                       "worst_slippage_bps": max(e.slippage_bps for e in executions),
+                       "avg_duration_ms": sum(e.end_ms - e.start_ms for e in executions) / len(executions)}
+                for algo, executions in per_algo.items()}
@@ -0,0 +1,250 @@
+import json
+import logging
+import signal
+import threading
+import time
+import typing
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from connectors.binance_futures import BinanceFuturesClient
+from database import WorkspaceData
+from strategies import STRATEGY_REGISTRY, TF_EQUIV
+
+logger = logging.getLogger()
+
+
+class HeadlessRunner:
+    def __init__(self, binance: BinanceFuturesClient, host: str = "127.0.0.1", port: int = 8600):
+        self.binance = binance
+        self.host = host
+        self.port = port
+
+        # Nothing drains the UI event queue without a Tk window
+        self.binance.ui_events.enabled = False
+
+        self.db = WorkspaceData()
+        self._configs: typing.Dict[int, typing.Dict] = dict()
+        self._lock = threading.Lock()
+        self._server: typing.Optional[ThreadingHTTPServer] = None
+
+        for b_index, row in enumerate(self.db.get('strategies')):
+            self._configs[b_index] = dict(row)
+
+    def start_strategy(self, b_index: int) -> typing.Tuple[bool, str]:
+        with self._lock:
+            if b_index not in self._configs:
+                return False, f"Unknown strategy {b_index}"
+
+            if b_index in self.binance.strategies:
+                return False, f"Strategy {b_index} already running"
+
+            config = self._configs[b_index]
+
+            if config['strategy_type'] not in STRATEGY_REGISTRY:
+                return False, f"Unknown strategy type {config['strategy_type']}"
+
+            strategy_class = STRATEGY_REGISTRY[config['strategy_type']]
+
+            symbol, exchange = config['contract'].split("_")
+
+            if symbol not in self.binance.contracts:
+                return False, f"Unknown contract {symbol}"
+
+            try:
+                balance_pct = float(config['balance_pct'])
+                take_profit = float(config['take_profit'])
+                stop_loss = float(config['stop_loss'])
+            except (TypeError, ValueError):
+                return False, f"Missing balance_pct, take_profit or stop_loss parameter for strategy {b_index}"
+
+            extra_params = json.loads(config['extra_params'])
+
+            error = strategy_class.check_config(config['timeframe'], extra_params)
+
+            if error is not None:
+                return False, f"{error} for strategy {b_index}"
+
+            new_strat = strategy_class(self.binance, self.binance.contracts[symbol], exchange, config['timeframe'],
+                                       balance_pct, take_profit, stop_loss, extra_params)
+
+            if not new_strat.start(b_index):
+                return False, f"No historical data retrived for {symbol}"
+
+        logger.info("%s strategy on %s / %s started", config['strategy_type'], symbol, config['timeframe'])
+
+        return True, "started"
+
+    def stop_strategy(self, b_index: int) -> typing.Tuple[bool, str]:
+        with self._lock:
+            if b_index not in self.binance.strategies:
+                return False, f"Strategy {b_index} is not running"
+
+            self.binance.strategies[b_index].stop(b_index)
+
+        logger.info("Strategy %s stopped", b_index)
+
+        return True, "stopped"
+
+    def status(self) -> typing.Dict:
+        strategies = []
+
+        for b_index, config in self._configs.items():
+            strat = self.binance.strategies.get(b_index)
+
+            status = {"id": b_index, "strategy_type": config['strategy_type'], "contract": config['contract'],
+                      "timeframe": config['timeframe'], "running": strat is not None}
+
+            if strat is not None:
+                trades = list(strat.trades)
+                status["open_trades"] = sum(1 for trade in trades if trade.status == "open")
+                status["pnl"] = sum(trade.pnl for trade in trades)
+
+                if self.binance.pnl is not None:
+                    status["pnl_breakdown"] = self.binance.pnl.strategy_pnl().get(strat.risk_key)
+
+            strategies.append(status)
+
+        return {"strategies": strategies, "server_time_offset_ms": self.binance.time_sync.offset_ms,
+                "rtt_ms": self.binance.time_sync.rtt_ms, "first_tick_ms": self.binance.first_tick_ms,
+                "profiler_running": self.binance.profiler.running, "websocket": self.binance.ws_metrics,
+                "execution": self.binance.execution.stats(), "risk": self.binance.risk.status(),
+                "account_pnl": self.binance.pnl.account() if self.binance.pnl is not None else None}
+
+    def start_scanner(self, timeframe: str) -> typing.Tuple[bool, str]:
+        if timeframe not in TF_EQUIV:
+            return False, f"Unknown timeframe {timeframe}"
+
+        if any(scanner.tf == timeframe for scanner in self.binance.scanners):
+            return False, f"A {timeframe} scanner is already running"
+
+        scanner = self.binance.start_scanner(timeframe)
+
+        return True, f"loading {len(scanner.symbols)} symbols"
+
+    def start_profiler(self) -> typing.Tuple[bool, str]:
+        if not self.binance.profiler.start():
+            return False, "Profiler already running"
+
+        return True, "started"
+
+    def stop_profiler(self) -> typing.Tuple[bool, typing.Dict]:
+        profiler = self.binance.profiler
+
+        if not profiler.stop():
+            return False, {"message": "Profiler is not running"}
+
+        folded_path, summary_path = profiler.dump(f"profile_{int(time.time())}")
+
+        return True, {"message": "stopped", "samples": profiler.samples, "folded": folded_path,
+                      "summary": summary_path,
+                      "top": [{"function": label, "self": self_count, "total": total_count}
+                              for label, self_count, total_count in profiler.summary()]}
+
+    def serve_forever(self):
+        runner = self
+
+        class ControlHandler(BaseHTTPRequestHandler):
+            def _reply(self, code: int, body: typing.Dict):
+                payload = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                if self.path == "/status":
+                    self._reply(200, runner.status())
+                elif self.path == "/scanner":
+                    self._reply(200, {"scanners": [scanner.tf for scanner in runner.binance.scanners],
+                                      "signals": list(runner.binance.scan_signals)})
+                elif self.path == "/memory":
+                    self._reply(200, runner.binance.memory.report())
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def do_POST(self):
+                # POST /strategies/<id>/start, POST /strategies/<id>/stop, POST /profiler/start, POST /profiler/stop,
+                # POST /memory/snapshot, POST /memory/stop, POST /scanner/start/<timeframe>
+                parts = self.path.strip("/").split("/")
+
+                if parts == ["memory", "snapshot"]:
+                    self._reply(200, {"ok": True, "top": runner.binance.memory.snapshot()})
+                    return
+
+                if len(parts) == 3 and parts[:2] == ["scanner", "start"]:
+                    ok, msg = runner.start_scanner(parts[2])
+                    self._reply(200 if ok else 400, {"ok": ok, "message": msg})
+                    return
+
+                if parts == ["memory", "stop"]:
+                    ok = runner.binance.memory.stop_tracing()
+                    message = "stopped" if ok else "Tracing is not running"
+                    self._reply(200 if ok else 400, {"ok": ok, "message": message})
+                    return
+
+                if len(parts) == 2 and parts[0] == "profiler" and parts[1] in ("start", "stop"):
+                    if parts[1] == "start":
+                        ok, msg = runner.start_profiler()
+                        self._reply(200 if ok else 400, {"ok": ok, "message": msg})
+                    else:
+                        ok, body = runner.stop_profiler()
+                        self._reply(200 if ok else 400, dict(body, ok=ok))
+                    return
+
+                if len(parts) != 3 or parts[0] != "strategies" or not parts[1].isdigit() \
+                        or parts[2] not in ("start", "stop"):
+                    self._reply(404, {"error": "not found"})
+                    return
+
+                if parts[2] == "start":
+                    ok, msg = runner.start_strategy(int(parts[1]))
+                else:
+                    ok, msg = runner.stop_strategy(int(parts[1]))
+
+                self._reply(200 if ok else 400, {"ok": ok, "message": msg})
+
+            def log_message(self, format: str, *args):
+                logger.debug("Control request: " + format, *args)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), ControlHandler)
+
+        logger.info("Headless control server listening on %s:%s", self.host, self.port)
+
+        self._server.serve_forever()
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+        self.binance.reconnect = False
+        self.binance.ws.close()
+        self.binance.execution.stop()
+        self.binance.save_snapshot()
+        self.binance.journal.close()
+        if self.binance.tick_archive is not None:
+            self.binance.tick_archive.close()
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt()
+
+
+def run_headless(binance: BinanceFuturesClient, host: str, port: int, autostart: bool = True):
+    runner = HeadlessRunner(binance, host, port)
+
+    if autostart:
+        for b_index in list(runner._configs):
+            ok, msg = runner.start_strategy(b_index)
+            if not ok:
+                logger.warning("Could not start strategy %s: %s", b_index, msg)
+
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+
+    try:
+        runner.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runner.shutdown()
@@ -0,0 +1,148 @@
+import math
+import typing
+
+import numpy as np
+
+INDICATOR_BACKENDS = ("numba", "numpy", "python")
+
+_backend: typing.Optional[str] = None
+_numba_loop: typing.Optional[typing.Callable] = None
+
+
+def _ewm_loop(values, alpha, adjust, min_periods, out):
+    # Same recursion as pandas ewm().mean(): with adjust the weights of the past values are normalised,
+    # without it the first value seeds the average
+    decay = 1 - alpha
+    num = 0.0
+    den = 0.0
+
+    for i in range(len(values)):
+        if adjust:
+            num = values[i] + decay * num
+            den = 1.0 + decay * den
+            out[i] = num / den
+        else:
+            num = values[i] if i == 0 else decay * num + alpha * values[i]
+            out[i] = num
+
+        if i < min_periods - 1:
+            out[i] = math.nan
+
+    return out
+
+
+def _linear_recurrence(values: np.ndarray, decay: float) -> np.ndarray:
+    # s[t] = values[t] + decay * s[t - 1], evaluated in closed form a block at a time:
+    # s[t] = decay^t * cumsum(values[j] * decay^-j) + carry * decay^(t + 1).
+    # Blocks are kept short enough for decay^-j to stay far from overflowing.
+    if decay == 0 or len(values) == 0:
+        return values.astype(np.float64)
+
+    block = min(max(int(150 / -math.log10(decay)), 1), len(values))
+    powers = decay ** np.arange(block)
+    inverse_powers = 1 / powers
+    next_powers = powers * decay
+
+    result = np.empty(len(values))
+    carry = 0.0
+
+    for start in range(0, len(values), block):
+        size = min(block, len(values) - start)
+        out = result[start:start + size]
+
+        np.cumsum(values[start:start + size] * inverse_powers[:size], out=out)
+        out *= powers[:size]
+        out += carry * next_powers[:size]
+        carry = out[-1]
+
+    return result
+
+
+def _ewm_numpy(values: np.ndarray, alpha: float, adjust: bool, min_periods: int) -> np.ndarray:
+    decay = 1 - alpha
+
+    if adjust:
+        # Sum of the weights, decay^(t + 1) is only computed until it becomes negligible
+        powers = np.zeros(len(values))
+        if decay > 0:
+            significant = min(len(values), int(20 / -math.log10(decay)) + 1)
+            powers[:significant] = decay ** np.arange(1, significant + 1)
+
+        weights = (1 - powers) / alpha
+        result = _linear_recurrence(values, decay) / weights
+    else:
+        seeded = alpha * values
+        seeded[:1] = values[:1]
+        result = _linear_recurrence(seeded, decay)
+
+    result[:max(min_periods - 1, 0)] = np.nan
+
+    return result
+
+
+def set_backend(name: str):
+    global _backend, _numba_loop
+
+    if name not in INDICATOR_BACKENDS:
+        raise ValueError(f"Unknown indicator backend {name}")
+
+    if name == "numba" and _numba_loop is None:
+        import numba
+
+        _numba_loop = numba.njit(cache=True)(_ewm_loop)
+
+    _backend = name
+
+
+def get_backend() -> str:
+    # Numba is optional and slow to import, it is only looked for when an indicator is first computed
+    if _backend is None:
+        try:
+            set_backend("numba")
+        except ImportError:
+            set_backend("numpy")
+
+    return _backend
+
+
+def ewm_mean(values: typing.Sequence[float], alpha: float, adjust: bool = True, min_periods: int = 0,
+             backend: typing.Optional[str] = None) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    backend = backend or get_backend()
+
+    if backend == "numba":
+        if _numba_loop is None:
+            set_backend("numba")
+        return _numba_loop(values, alpha, adjust, min_periods, np.empty(len(values)))
+    elif backend == "numpy":
+        return _ewm_numpy(values, alpha, adjust, min_periods)
+    else:
+        return np.array(_ewm_loop(values.tolist(), alpha, adjust, min_periods, [0.0] * len(values)))
+
+
+def ema(values: typing.Sequence[float], span: int, backend: typing.Optional[str] = None) -> np.ndarray:
+    return ewm_mean(values, 2 / (span + 1), backend=backend)
+
+
+def rsi_series(closes: typing.Sequence[float], length: int, backend: typing.Optional[str] = None) -> np.ndarray:
+    delta = np.diff(np.asarray(closes, dtype=np.float64))
+
+    avg_gain = ewm_mean(np.maximum(delta, 0), 1 / length, min_periods=length, backend=backend)
+    avg_loss = ewm_mean(np.maximum(-delta, 0), 1 / length, min_periods=length, backend=backend)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+
+    return np.round(100 - 100 / (1 + rs), 2)
+
+
+def macd_series(closes: typing.Sequence[float], ema_fast: int, ema_slow: int, ema_signal: int,
+                backend: typing.Optional[str] = None) -> typing.Tuple[np.ndarray, np.ndarray]:
+    macd_line = ema(closes, ema_fast, backend) - ema(closes, ema_slow, backend)
+
+    return macd_line, ema(macd_line, ema_signal, backend)
+
+
+def warm_up():
+    # Picks the backend and, with Numba, compiles the kernel so the first real call is not delayed
+    ewm_mean([0.0, 0.0], 0.5)
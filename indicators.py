@@ -0,0 +1,52 @@
+import typing
+
+from models import *
+
+
+def rsi(candles: typing.List[Candle], length: int) -> float:
+    # NumPy and the optional Numba backend are only loaded once a strategy needs an indicator
+    from indicator_kernels import rsi_series
+
+    # Value of the last completed candle
+    return float(rsi_series([candle.close for candle in candles], length)[-2])
+
+
+def macd(candles: typing.List[Candle], ema_fast: int, ema_slow: int, ema_signal: int) -> typing.Tuple[float, float]:
+    from indicator_kernels import macd_series
+
+    macd_line, macd_signal = macd_series([candle.close for candle in candles], ema_fast, ema_slow, ema_signal)
+
+    return float(macd_line[-2]), float(macd_signal[-2])
+
+
+INDICATORS: typing.Dict[str, typing.Callable] = {"rsi": rsi, "macd": macd}
+
+# Candles the indicators are computed over. Strategies keep histories of different lengths, the same trailing window
+# gives them the same value. Long enough for the exponential averages to forget their start.
+INDICATOR_WINDOW = 1000
+
+
+class IndicatorCache:
+    def __init__(self):
+        # One entry per symbol / timeframe / indicator / parameters, only the value for the latest candles is kept
+        self._values: typing.Dict[typing.Tuple, typing.Tuple[typing.Tuple, typing.Any]] = dict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, symbol: str, timeframe: str, candles: typing.List[Candle], name: str, params: typing.Tuple):
+        key = (symbol, timeframe, name, params)
+        # The values are those of the last completed candle: strategies on the same symbol and timeframe share them
+        # once that candle is the same, the first one to ask computes the value
+        stamp = (candles[-2].timestamp, candles[-2].close)
+
+        cached = self._values.get(key)
+
+        if cached is not None and cached[0] == stamp:
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        value = INDICATORS[name](candles[-INDICATOR_WINDOW:], *params)
+        self._values[key] = (stamp, value)
+
+        return value
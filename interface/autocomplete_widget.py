@@ -1,13 +1,84 @@
+import bisect
 from typing import *
 
 import tkinter as tk
 
+from models import Contract
+
+MAX_RESULTS = 50
+DEBOUNCE_MS = 120
+
+
+class SymbolIndex:
+    def __init__(self, contracts: List[Contract]):
+        self._symbols: List[Tuple[str, str]] = []
+        self._bases: List[Tuple[str, str]] = []
+        self._quotes: List[Tuple[str, str]] = []
+
+        self._last_query = None
+        self._last_candidates: List[str] = []
+
+        self.add(contracts)
+
+    def add(self, contracts: List[Contract]):
+        for contract in contracts:
+            bisect.insort(self._symbols, (contract.symbol, contract.symbol))
+            bisect.insort(self._bases, (contract.base_asset, contract.symbol))
+            bisect.insort(self._quotes, (contract.quote_asset, contract.symbol))
+
+        self._last_query = None
+
+    @staticmethod
+    def _prefix_range(keys: List[Tuple[str, str]], query: str) -> Iterator[str]:
+        idx = bisect.bisect_left(keys, (query, ""))
+
+        while idx < len(keys) and keys[idx][0].startswith(query):
+            yield keys[idx][1]
+            idx += 1
+
+    @staticmethod
+    def _is_subsequence(query: str, symbol: str) -> bool:
+        it = iter(symbol)
+        return all(char in it for char in query)
+
+    def search(self, query: str, limit: int = MAX_RESULTS) -> List[str]:
+        results = dict()
+
+        # Ranked: symbol prefix, base asset prefix, quote asset prefix, then substring and fuzzy matches
+        for keys in (self._symbols, self._bases, self._quotes):
+            for symbol in self._prefix_range(keys, query):
+                if len(results) >= limit:
+                    return list(results)
+                results[symbol] = None
+
+        # Fuzzy matches are only looked for among the symbols starting with the same character, found by bisection,
+        # so a keystroke never scans every symbol. A longer query can only match a subset of what the previous one
+        # matched, so typing narrows the scan further.
+        if self._last_query is not None and query.startswith(self._last_query):
+            candidates = self._last_candidates
+        else:
+            candidates = list(self._prefix_range(self._symbols, query[:1]))
+
+        candidates = [symbol for symbol in candidates if self._is_subsequence(query, symbol)]
+
+        self._last_query = query
+        self._last_candidates = candidates
+
+        for symbol in sorted(candidates, key=lambda s: query not in s):
+            if len(results) >= limit:
+                break
+            results[symbol] = None
+
+        return list(results)
+
 
 class Autocomplete(tk.Entry):
-    def __init__(self, symbols: List[str], *args, **kwargs):
+    def __init__(self, contracts: List[Contract], *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self._symbols = symbols
+        self._index = SymbolIndex(contracts)
+        self._results: List[str] = []
+        self._after_id = None
 
         self._lb: tk.Listbox
         self._lb_open = False
@@ -23,30 +94,55 @@ class Autocomplete(tk.Entry):
     def _changed(self, var_name: str, index: str, mode: str):
         self._var.set(self._var.get().upper())
 
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+
+        self._after_id = self.after(DEBOUNCE_MS, self._update_results)
+
+    def _close_lb(self):
+        # A search still pending, e.g. from the set() of a selection, would open the listbox again
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+
+        if self._lb_open:
+            self._lb.destroy()
+        self._lb_open = False
+        self._results = []
+
+    def _update_results(self):
+        self._after_id = None
+
         if self._var.get() == "":
-            if self._lb_open:
-                self._lb.destroy()
-                self._lb_open = False
-        else:
-            if not self._lb_open:
-                self._lb = tk.Listbox(height=8)
-                self._lb.place(x=self.winfo_x() + self.winfo_width() - 1, y=self.winfo_y() + self.winfo_height())
-                self._lb_open = True
+            self._close_lb()
+            return
 
-            symbols_mached = [symbol for symbol in self._symbols if symbol.startswith(self._var.get())]
+        symbols_mached = self._index.search(self._var.get())
 
-            if len(symbols_mached) > 0:
-                try:
-                    self._lb.delete(0, tk.END)
-                except tk.TclError:
-                    pass
+        if len(symbols_mached) == 0:
+            self._close_lb()
+            return
 
-                for symbol in symbols_mached:
-                    self._lb.insert(tk.END, symbol)
-            else:
-                if self._lb_open:
-                    self._lb.destroy()
-                self._lb_open = False
+        if not self._lb_open:
+            self._lb = tk.Listbox(height=8)
+            self._lb.place(x=self.winfo_x() + self.winfo_width() - 1, y=self.winfo_y() + self.winfo_height())
+            self._lb_open = True
+
+        # Only rewrite the tail of the listbox that differs from the previous results
+        common = 0
+        while common < min(len(self._results), len(symbols_mached)) \
+                and self._results[common] == symbols_mached[common]:
+            common += 1
+
+        try:
+            if common < len(self._results):
+                self._lb.delete(common, tk.END)
+            if common < len(symbols_mached):
+                self._lb.insert(tk.END, *symbols_mached[common:])
+        except tk.TclError:
+            pass
+
+        self._results = symbols_mached
 
     def _up_down(self, event: tk.Event):
         if self._lb_open:
@@ -71,7 +167,6 @@ class Autocomplete(tk.Entry):
     def _select(self, event: tk.Event):
         if self._lb_open:
             self._var.set(self._lb.get(tk.ACTIVE))
-            self._lb.destroy()
-            self._lb_open = False
+            self._close_lb()
             self.icursor(tk.END)
 
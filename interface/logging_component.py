@@ -6,9 +6,11 @@ from interface.styling import *
 
 
 class Logging(tk.Frame):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, max_lines: int = 500, **kwargs):
         super().__init__(*args, **kwargs)
 
+        self.max_lines = max_lines
+
         self.logging_text = tk.Text(self, height=10, width=60, state=tk.DISABLED, bg=BG_COLOR, fg=FG_COLOR_2,
                                     font=GLOBAL_FONT, highlightthickness=0, bd=0)
         self.logging_text.pack(side=tk.TOP)
@@ -16,4 +18,6 @@ class Logging(tk.Frame):
     def add_log(self, message: str):
         self.logging_text.configure(state=tk.NORMAL)
         self.logging_text.insert("1.0", datetime.utcnow().strftime("%a %H:%M:%S :: ") + message + "\n")
+        # Newest lines are at the top, the oldest ones past the limit are dropped from the bottom
+        self.logging_text.delete(f"{self.max_lines + 1}.0", tk.END)
         self.logging_text.configure(state=tk.DISABLED)
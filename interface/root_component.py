@@ -1,5 +1,8 @@
+import collections
 import json
 import logging
+import time
+import typing
 
 import tkinter as tk
 from tkinter.messagebox import askquestion
@@ -12,8 +15,15 @@ from interface.watch_list_component import WatchList
 from interface.trades_component import TradesWatch
 from interface.strategy_component import StrategyEditor
 
+from strategies import STRATEGY_REGISTRY
+from memory import MEMORY_CHECK_INTERVAL
+
 logger = logging.getLogger()
 
+UI_BATCH_SIZE = 200
+UI_BUSY_INTERVAL = 20
+UI_IDLE_INTERVAL = 250
+
 
 class Root(tk.Tk):
     def __init__(self, binance:BinanceFuturesClient):
@@ -32,16 +42,24 @@ class Root(tk.Tk):
         self.main_menu.add_cascade(label="Workspace", menu=self.workspace_menu)
         self.workspace_menu.add_command(label="Save workspace", command=self._save_workspace)
 
+        self.debug_menu = tk.Menu(self.main_menu, tearoff=False)
+        self.main_menu.add_cascade(label="Debug", menu=self.debug_menu)
+        self.debug_menu.add_command(label="Start profiler", command=self._toggle_profiler)
+        self.debug_menu.add_command(label="Memory report", command=self._memory_report)
+        self.debug_menu.add_command(label="Memory snapshot", command=self._memory_snapshot)
+        self.debug_menu.add_command(label="Stop allocation tracing", command=self._stop_memory_tracing)
+
         self._left_frame = tk.Frame(self, bg=BG_COLOR)
         self._left_frame.pack(side=tk.LEFT)
 
         self._right_frame = tk.Frame(self, bg=BG_COLOR)
         self._right_frame.pack(side=tk.RIGHT)
 
-        self._watch_list_frame = WatchList(self.binance.contracts, self._left_frame, bg=BG_COLOR)
+        self._watch_list_frame = WatchList(self.binance, self._left_frame, bg=BG_COLOR)
         self._watch_list_frame.pack(side=tk.TOP)
 
-        self.logging_frame = Logging(self._left_frame, bg=BG_COLOR)
+        self.logging_frame = Logging(self._left_frame, max_lines=self.binance.memory.limits['ui_log_lines'],
+                                     bg=BG_COLOR)
         self.logging_frame.pack(side=tk.TOP)
 
         self._strategy_editor_frame = StrategyEditor(self, self.binance, self._right_frame, bg=BG_COLOR)
@@ -51,6 +69,7 @@ class Root(tk.Tk):
         self._trades_watch_frame.pack(side=tk.TOP)
 
         self._updte_ui()
+        self.after(MEMORY_CHECK_INTERVAL * 1000, self._enforce_ui_limits)
 
     def _ask_befor_close(self):
         result = askquestion("Configuration", "Exit?")
@@ -58,67 +77,84 @@ class Root(tk.Tk):
         if result == "yes":
             self.binance.reconnect = False
             self.binance.ws.close()
+            self.binance.execution.stop()
+            self.binance.save_snapshot()
+            self.binance.journal.close()
+            if self.binance.tick_archive is not None:
+                self.binance.tick_archive.close()
 
             self.destroy()
 
+    def _toggle_profiler(self):
+        profiler = self.binance.profiler
+
+        if profiler.running:
+            profiler.stop()
+            folded_path, summary_path = profiler.dump(f"profile_{int(time.time())}")
+            self.logging_frame.add_log(f"Profile saved to {folded_path} and {summary_path}")
+            self.debug_menu.entryconfig(0, label="Start profiler")
+        else:
+            profiler.start()
+            self.logging_frame.add_log("Profiler started")
+            self.debug_menu.entryconfig(0, label="Stop profiler")
+
+    def _count_widgets(self) -> typing.Dict[str, int]:
+        counts = collections.Counter()
+        pending = list(self.winfo_children())
+
+        while len(pending) > 0:
+            widget = pending.pop()
+            counts[widget.winfo_class()] += 1
+            pending.extend(widget.winfo_children())
+
+        return dict(counts, total=sum(counts.values()))
+
+    def _memory_report(self):
+        report = self.binance.memory.report(self._count_widgets())
+
+        for subsystem, values in reversed(list(report.items())):
+            self.logging_frame.add_log(f"{subsystem}: {values}")
+
+    def _memory_snapshot(self):
+        # Newest lines go on top of the log, so the largest change ends up first
+        for line in reversed(self.binance.memory.snapshot()):
+            self.logging_frame.add_log(line)
+
+    def _stop_memory_tracing(self):
+        if self.binance.memory.stop_tracing():
+            self.logging_frame.add_log("Allocation tracing stopped")
+        else:
+            self.logging_frame.add_log("Allocation tracing is not running")
+
+    def _enforce_ui_limits(self):
+        dropped = self._trades_watch_frame.prune(self.binance.memory.limits['ui_trades'])
+
+        if dropped > 0:
+            logger.info("%s closed trades removed from the trades table", dropped)
+
+        self.after(MEMORY_CHECK_INTERVAL * 1000, self._enforce_ui_limits)
+
     def _updte_ui(self):
         # Logs data
-        for log in self.binance.logs:
-            if not log['displayed']:
-                self.logging_frame.add_log(log['log'])
-                log['displayed'] = True
-
-        for client in [self.binance]:
-            try:
-                for b_index, strat in client.strategies.items():
-                    for log in strat.logs:
-                        if not log['displayed']:
-                            self.logging_frame.add_log(log['log'])
-                            log['displayed'] = True
-
-                    for trade in strat.trades:
-                        if trade.time not in self._trades_watch_frame.body_widgets['symbol']:
-                            self._trades_watch_frame.add_trade(trade)
-
-                        if trade.contract.exchange == "binance":
-                            precision = trade.contract.price_decimals
-                        else:
-                            precision = trade.contract.price_decimals
-
-                        pnl_str = "{0:.{prec}f}".format(trade.pnl, prec=precision)
-                        self._trades_watch_frame.body_widgets['pnl_var'][trade.time].set(pnl_str)
-                        self._trades_watch_frame.body_widgets['status_var'][trade.time].set(trade.status.capitalize())
-
-            except RuntimeError as e:
-                logger.error("Errorr while loopin through strategies dictionary: %s", e)
-
-        # WatchList prices data
-        try:
-            for key, value in self._watch_list_frame.body_widgets['symbol'].items():
-                symbol = self._watch_list_frame.body_widgets['symbol'][key].cget('text')
-                exchange = self._watch_list_frame.body_widgets['exchange'][key].cget('text')
-
-                if exchange == "Binance":
-                    if symbol not in self.binance.contracts:
-                        continue
-
-                    if symbol not in self.binance.prices:
-                        self.binance.get_bid_ask(self.binance.contracts[symbol])
-                        continue
-
-                    prices = self.binance.prices[symbol]
-                else:
-                    continue
-
-                if prices['bid'] is not None:
-                    self._watch_list_frame.body_widgets['bid_var'][key].set(prices['bid'])
-
-                if prices['ask'] is not None:
-                    self._watch_list_frame.body_widgets['ask_var'][key].set(prices['ask'])
-        except RuntimeError as e:
-            logger.error("Errorr while loopin through watchlist dictionary: %s", e)
-
-        self.after(1500, self._updte_ui)
+        for log in self.binance.logs.read_new("ui"):
+            self.logging_frame.add_log(log)
+
+        for strat in list(self.binance.strategies.values()):
+            for log in strat.logs.read_new("ui"):
+                self.logging_frame.add_log(log)
+
+        events = self.binance.ui_events.drain(UI_BATCH_SIZE)
+
+        for event_type, data in events:
+            if event_type == "trade":
+                self._trades_watch_frame.update_trade(data)
+            elif event_type == "price":
+                self._watch_list_frame.update_prices(*data)
+
+        if len(events) == UI_BATCH_SIZE:
+            self.after(UI_BUSY_INTERVAL, self._updte_ui)
+        else:
+            self.after(UI_IDLE_INTERVAL, self._updte_ui)
 
     def _save_workspace(self):
         watchlist_symbols = []
@@ -144,10 +180,14 @@ class Root(tk.Tk):
 
             extra_params = dict()
 
-            for params in self._strategy_editor_frame.extra_params[strategy_type]:
-                code_name = params['code_name']
+            if strategy_type in STRATEGY_REGISTRY:
+                for param in STRATEGY_REGISTRY[strategy_type].parameters:
+                    code_name = param.code_name
 
-                extra_params[code_name] = self._strategy_editor_frame.additional_parameters[b_index][code_name]
+                    extra_params[code_name] = self._strategy_editor_frame.additional_parameters[b_index].get(code_name)
+            else:
+                # Strategy from a plugin that is not loaded, its parameters are kept as they were
+                extra_params = self._strategy_editor_frame.additional_parameters[b_index]
 
             strategies.append((strategy_type, contract, timeframe, balance_pct, take_profit, stop_loss,
                                json.dumps(extra_params)))
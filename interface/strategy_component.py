@@ -7,11 +7,13 @@ from interface.styling import *
 from interface.scrollable_frame import ScrollableFrame
 
 from connectors.binance_futures import BinanceFuturesClient
-from strategies import TechnicalStrategy, BreakoutStrategy
+from strategies import STRATEGY_REGISTRY
 from utils import *
 
 from database import WorkspaceData
 
+LAZY_LOAD_BATCH = 20
+
 
 class StrategyEditor(tk.Frame):
     def __init__(self, root, binance: BinanceFuturesClient, *args, **kwargs):
@@ -55,7 +57,7 @@ class StrategyEditor(tk.Frame):
 
         self._base_params = [
             {"code_name": "strategy_type", "widget": tk.OptionMenu, "data_type": str,
-             "values": ["Technical", "Breakout"], "width": 10, "header": "Strategy"},
+             "values": list(STRATEGY_REGISTRY), "width": 10, "header": "Strategy"},
             {"code_name": "contract", "widget": tk.OptionMenu, "data_type": str,
              "values": self._all_contracts, "width": 15, "header": "Contract"},
             {"code_name": "timeframe", "widget": tk.OptionMenu, "data_type": str,
@@ -71,18 +73,6 @@ class StrategyEditor(tk.Frame):
              "text": "X", "bg": "darkred", "command": self._delete_strategy, "header": "", "width": 6},
         ]
 
-        self.extra_params = {
-            "Technical": [
-                {"code_name": "rsi_length", "name": "RSI Periods", "widget": tk.Entry, "data_type": int},
-                {"code_name": "ema_fast", "name": "MACD Fast Length", "widget": tk.Entry, "data_type": int},
-                {"code_name": "ema_slow", "name": "MACD Slow Length", "widget": tk.Entry, "data_type": int},
-                {"code_name": "ema_signal", "name": "MACD Signal Length", "widget": tk.Entry, "data_type": int}
-            ],
-            "Breakout": [
-                {"code_name": "min_volume", "name": "Minimum Volume", "widget": tk.Entry, "data_type": float},
-            ]
-        }
-
         for idx, h in enumerate(self._base_params):
             header = tk.Label(self._headers_frame, text=h["header"], bg=BG_COLOR,
                               fg=FG_COLOR, font=GLOBAL_FONT, width=h["width"], bd=1, relief=tk.FLAT)
@@ -142,9 +132,9 @@ class StrategyEditor(tk.Frame):
 
         self.additional_parameters[b_index] = dict()
 
-        for strat, params in self.extra_params.items():
-            for param in params:
-                self.additional_parameters[b_index][param['code_name']] = None
+        for strategy_class in STRATEGY_REGISTRY.values():
+            for param in strategy_class.parameters:
+                self.additional_parameters[b_index][param.code_name] = None
 
         self._body_index += 1
 
@@ -164,27 +154,24 @@ class StrategyEditor(tk.Frame):
 
         row_nb = 0
 
-        for param in self.extra_params[strat_selected]:
-            code_name = param['code_name']
+        for param in STRATEGY_REGISTRY[strat_selected].parameters:
+            code_name = param.code_name
 
-            temp_label = tk.Label(self._popup_window, bg=BG_COLOR, fg=FG_COLOR, text=param['name'], font=BOLD_FONT)
+            temp_label = tk.Label(self._popup_window, bg=BG_COLOR, fg=FG_COLOR, text=param.name, font=BOLD_FONT)
             temp_label.grid(row=row_nb, column=0)
 
-            if param['widget'] == tk.Entry:
-                self._extra_input[code_name] = tk.Entry(self._popup_window, bg=BG_COLOR_2, justify=tk.CENTER,
-                                                        fg=FG_COLOR, insertbackground=FG_COLOR,
-                                                        highlightthickness=False)
-                self._extra_input[code_name].grid(row=row_nb, column=1)
+            self._extra_input[code_name] = tk.Entry(self._popup_window, bg=BG_COLOR_2, justify=tk.CENTER,
+                                                    fg=FG_COLOR, insertbackground=FG_COLOR,
+                                                    highlightthickness=False)
+            self._extra_input[code_name].grid(row=row_nb, column=1)
 
-                if param['data_type'] == int:
-                    self._extra_input[code_name].config(validate="key", validatecommand=(self._valid_integer, "%P"))
-                elif param['data_type'] == float:
-                    self._extra_input[code_name].config(validate="key", validatecommand=(self._valid_float, "%P"))
+            if param.data_type == int:
+                self._extra_input[code_name].config(validate="key", validatecommand=(self._valid_integer, "%P"))
+            elif param.data_type == float:
+                self._extra_input[code_name].config(validate="key", validatecommand=(self._valid_float, "%P"))
 
-                if self.additional_parameters[b_index][code_name] is not None:
-                    self._extra_input[code_name].insert(tk.END, str(self.additional_parameters[b_index][code_name]))
-            else:
-                continue
+            if self.additional_parameters[b_index].get(code_name) is not None:
+                self._extra_input[code_name].insert(tk.END, str(self.additional_parameters[b_index][code_name]))
 
             row_nb += 1
 
@@ -195,13 +182,13 @@ class StrategyEditor(tk.Frame):
     def _validate_params(self, b_index: int):
         strat_selected = self.body_widgets['strategy_type_var'][b_index].get()
 
-        for param in self.extra_params[strat_selected]:
-            code_name = param['code_name']
+        for param in STRATEGY_REGISTRY[strat_selected].parameters:
+            code_name = param.code_name
 
             if self._extra_input[code_name].get() == "":
                 self.additional_parameters[b_index][code_name] = None
             else:
-                self.additional_parameters[b_index][code_name] = param['data_type'](self._extra_input[code_name].get())
+                self.additional_parameters[b_index][code_name] = param.data_type(self._extra_input[code_name].get())
 
         self._popup_window.destroy()
 
@@ -213,13 +200,19 @@ class StrategyEditor(tk.Frame):
 
         strat_selected = self.body_widgets['strategy_type_var'][b_index].get()
 
-        for param in self.extra_params[strat_selected]:
-            if self.additional_parameters[b_index][param['code_name']] is None:
-                self.root.logging_frame.add_log(f"Missing {param['code_name']} parameter ")
-                return
+        if strat_selected not in STRATEGY_REGISTRY:
+            return
 
-        symbol = self.body_widgets['contract_var'][b_index].get().split('_')[0]
+        strategy_class = STRATEGY_REGISTRY[strat_selected]
         timeframe = self.body_widgets['timeframe_var'][b_index].get()
+
+        error = strategy_class.check_config(timeframe, self.additional_parameters[b_index])
+
+        if error is not None:
+            self.root.logging_frame.add_log(error)
+            return
+
+        symbol = self.body_widgets['contract_var'][b_index].get().split('_')[0]
         exchange = self.body_widgets['contract_var'][b_index].get().split('_')[1]
 
         contract = self._exchages[exchange].contracts[symbol]
@@ -229,26 +222,13 @@ class StrategyEditor(tk.Frame):
         stop_loss = float(self.body_widgets['stop_loss'][b_index].get())
 
         if self.body_widgets['activation'][b_index].cget('text') == "OFF":
-            if strat_selected == "Technical":
-                new_strat = TechnicalStrategy(self._exchages[exchange], contract, exchange, timeframe, balance_pct,
-                                              take_profit, stop_loss, self.additional_parameters[b_index])
-            elif strat_selected == "Breakout":
-                new_strat = BreakoutStrategy(self._exchages[exchange], contract, exchange, timeframe, balance_pct,
-                                             take_profit, stop_loss, self.additional_parameters[b_index])
-            else:
-                return
-
-            new_strat.candles = self._exchages[exchange].get_historical_candles(contract, timeframe)
+            new_strat = strategy_class(self._exchages[exchange], contract, exchange, timeframe, balance_pct,
+                                       take_profit, stop_loss, self.additional_parameters[b_index])
 
-            if len(new_strat.candles) == 0:
+            if not new_strat.start(b_index):
                 self.root.logging_frame.add_log(f"No historical data retrived for {contract.symbol}")
                 return
 
-            if exchange == "Binance":
-                self._exchages[exchange].subscribe_channel([contract], "aggTrade")
-
-            self._exchages[exchange].strategies[b_index] = new_strat
-
             for param in self._base_params:
                 code_name = param['code_name']
 
@@ -258,7 +238,7 @@ class StrategyEditor(tk.Frame):
             self.body_widgets['activation'][b_index].config(bg="darkgreen", text="ON")
             self.root.logging_frame.add_log(f"{strat_selected} strategy on {symbol} / {timeframe} started")
         else:
-            del self._exchages[exchange].strategies[b_index]
+            self._exchages[exchange].strategies[b_index].stop(b_index)
             for param in self._base_params:
                 code_name = param['code_name']
 
@@ -269,14 +249,21 @@ class StrategyEditor(tk.Frame):
             self.root.logging_frame.add_log(f"{strat_selected} strategy on {symbol} / {timeframe} stopped")
 
     def _delete_strategy(self, b_index: int):
+        # Destroyed, not only hidden: grid_forget keeps the widget and its Tcl variables alive
         for element in self._base_params:
-            self.body_widgets[element['code_name']][b_index].grid_forget()
-            del self.body_widgets[element['code_name']][b_index]
+            self.body_widgets[element['code_name']].pop(b_index).destroy()
+
+            if element['widget'] == tk.OptionMenu:
+                del self.body_widgets[element['code_name'] + "_var"][b_index]
+
+        del self.additional_parameters[b_index]
 
     def _load_strategies(self):
-        saved_strategies = self.db.get('strategies')
+        self._load_strategy_rows(self.db.get('strategies'), 0)
 
-        for row in saved_strategies:
+    def _load_strategy_rows(self, saved_strategies: typing.List, start: int):
+        # Rows are built a batch at a time between Tk events, so the window shows up before all rows exist
+        for row in saved_strategies[start:start + LAZY_LOAD_BATCH]:
             self._add_strategy_row()
 
             b_index = self._body_index - 1
@@ -295,3 +282,5 @@ class StrategyEditor(tk.Frame):
                 if value is not None:
                     self.additional_parameters[b_index][param] = value
 
+        if start + LAZY_LOAD_BATCH < len(saved_strategies):
+            self.after(1, lambda: self._load_strategy_rows(saved_strategies, start + LAZY_LOAD_BATCH))
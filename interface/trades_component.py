@@ -1,10 +1,90 @@
 import datetime
+import typing
 
 import tkinter as tk
 
 from interface.styling import *
-from interface.scrollable_frame import ScrollableFrame
 from models import *
+from strategies import STRATEGY_REGISTRY
+
+VISIBLE_ROWS = 10
+
+
+class TradesModel:
+    def __init__(self):
+        self._trades: typing.Dict[str, Trade] = dict()
+        self._rows: typing.List[str] = []
+        self._row_ids: typing.Set[str] = set()
+        self._dirty = False
+
+        self.filters: typing.Dict[str, typing.Optional[str]] = {"strategy": None, "symbol": None, "status": None}
+
+    def _matches(self, trade: Trade) -> bool:
+        if self.filters['strategy'] is not None and trade.strategy != self.filters['strategy']:
+            return False
+        if self.filters['symbol'] is not None and trade.contract.symbol != self.filters['symbol']:
+            return False
+        if self.filters['status'] is not None and trade.status != self.filters['status']:
+            return False
+        return True
+
+    def _rebuild(self):
+        self._rows = [trade_id for trade_id, trade in self._trades.items() if self._matches(trade)]
+        self._row_ids = set(self._rows)
+        self._dirty = False
+
+    def upsert(self, trade: Trade) -> bool:
+        # Returns True when the filtered row set changed
+        is_new = trade.trade_id not in self._trades
+        self._trades[trade.trade_id] = trade
+
+        matches = self._matches(trade)
+
+        if is_new:
+            if matches:
+                self._rows.append(trade.trade_id)
+                self._row_ids.add(trade.trade_id)
+            return matches
+
+        if matches != (trade.trade_id in self._row_ids):
+            self._dirty = True
+            return True
+
+        return False
+
+    def prune(self, max_closed: int) -> int:
+        # Drops the oldest closed trades past max_closed, returns how many were dropped
+        closed = [trade_id for trade_id, trade in self._trades.items() if trade.status == "closed"]
+        excess = len(closed) - max_closed
+
+        if excess <= 0:
+            return 0
+
+        for trade_id in closed[:excess]:
+            del self._trades[trade_id]
+
+        self._dirty = True
+
+        return excess
+
+    def set_filter(self, name: str, value: typing.Optional[str]):
+        self.filters[name] = value
+        self._dirty = True
+
+    def get(self, trade_id: str) -> typing.Optional[Trade]:
+        return self._trades.get(trade_id)
+
+    def page(self, start: int, count: int) -> typing.List[Trade]:
+        if self._dirty:
+            self._rebuild()
+
+        return [self._trades[trade_id] for trade_id in self._rows[start:start + count]]
+
+    def __len__(self) -> int:
+        if self._dirty:
+            self._rebuild()
+
+        return len(self._rows)
 
 
 class TradesWatch(tk.Frame):
@@ -13,6 +93,11 @@ class TradesWatch(tk.Frame):
 
         self._headers = ["time", "symbol", "exchange", "strategy", "side", "quntity", "status", "pnl"]
 
+        self.model = TradesModel()
+
+        self._filters_frame = tk.Frame(self, bg=BG_COLOR)
+        self._filters_frame.pack(side=tk.TOP)
+
         self._table_frame = tk.Frame(self, bg=BG_COLOR)
         self._table_frame.pack(side=tk.TOP)
 
@@ -20,7 +105,30 @@ class TradesWatch(tk.Frame):
 
         self._col_width = 11
 
-        self.body_widgets = dict()
+        self._strategy_filter_var = tk.StringVar(value="All")
+        self._status_filter_var = tk.StringVar(value="All")
+
+        tk.Label(self._filters_frame, text="Strategy", bg=BG_COLOR, fg=FG_COLOR,
+                 font=GLOBAL_FONT).grid(row=0, column=0)
+        # Plugin strategies are registered before the interface is built
+        strategy_filter = tk.OptionMenu(self._filters_frame, self._strategy_filter_var, "All", *STRATEGY_REGISTRY,
+                                        command=lambda value: self._set_filter("strategy", value))
+        strategy_filter.config(width=10, bd=0, indicatoron=0)
+        strategy_filter.grid(row=0, column=1, padx=2)
+
+        tk.Label(self._filters_frame, text="Symbol", bg=BG_COLOR, fg=FG_COLOR,
+                 font=GLOBAL_FONT).grid(row=0, column=2)
+        self._symbol_filter = tk.Entry(self._filters_frame, bg=BG_COLOR_2, fg=FG_COLOR, justify=tk.CENTER,
+                                       insertbackground=FG_COLOR, width=12)
+        self._symbol_filter.bind("<Return>", lambda event: self._set_filter("symbol", event.widget.get().upper()))
+        self._symbol_filter.grid(row=0, column=3, padx=2)
+
+        tk.Label(self._filters_frame, text="Status", bg=BG_COLOR, fg=FG_COLOR,
+                 font=GLOBAL_FONT).grid(row=0, column=4)
+        status_filter = tk.OptionMenu(self._filters_frame, self._status_filter_var, "All", "Open", "Closed",
+                                      command=lambda value: self._set_filter("status", value.lower()))
+        status_filter.config(width=8, bd=0, indicatoron=0)
+        status_filter.grid(row=0, column=5, padx=2)
 
         for idx, h in enumerate(self._headers):
             header = tk.Label(self._headers_frame, text=h.capitalize(), bg=BG_COLOR,
@@ -33,62 +141,118 @@ class TradesWatch(tk.Frame):
 
         self._headers_frame.pack(side=tk.TOP, anchor="nw")
 
-        self._body_frame = ScrollableFrame(self, bg=BG_COLOR, height=250)
+        self._body_frame = tk.Frame(self, bg=BG_COLOR)
         self._body_frame.pack(side=tk.TOP, anchor="nw", fill=tk.X)
 
+        self._rows_frame = tk.Frame(self._body_frame, bg=BG_COLOR)
+        self._rows_frame.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        self._scrollbar = tk.Scrollbar(self._body_frame, orient=tk.VERTICAL, command=self._on_scroll)
+        self._scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self._rows_frame.bind("<Enter>", self._on_activate_mousewheel)
+        self._rows_frame.bind("<Leave>", self._on_deactivate_mousewheel)
+
+        # Only VISIBLE_ROWS rows of widgets exist, scrolling re-binds them to other trades of the model
+        self.body_widgets = dict()
+
         for h in self._headers:
             self.body_widgets[h] = dict()
-            if h in ["status", "pnl"]:
-                self.body_widgets[h + "_var"] = dict()
+            self.body_widgets[h + "_var"] = dict()
+
+        for row in range(VISIBLE_ROWS):
+            for col, h in enumerate(self._headers):
+                self.body_widgets[h + "_var"][row] = tk.StringVar()
+                self.body_widgets[h][row] = tk.Label(self._rows_frame, textvariable=self.body_widgets[h + "_var"][row],
+                                                     bg=BG_COLOR, fg=FG_COLOR_2, font=GLOBAL_FONT,
+                                                     width=self._col_width)
+                self.body_widgets[h][row].grid(row=row, column=col)
+
+        self._top = 0
+        self._row_values: typing.Dict[int, typing.Tuple[str, ...]] = dict()
+        self._visible_ids: typing.Set[str] = set()
+        self._render_pending = False
+
+    def prune(self, max_closed: int) -> int:
+        dropped = self.model.prune(max_closed)
+
+        if dropped > 0:
+            self._schedule_render()
+
+        return dropped
+
+    def update_trade(self, data: Trade):
+        follow = self._top + VISIBLE_ROWS >= len(self.model)
+
+        rows_changed = self.model.upsert(data)
+
+        if rows_changed and follow:
+            self._top = max(len(self.model) - VISIBLE_ROWS, 0)
+
+        if rows_changed or data.trade_id in self._visible_ids:
+            self._schedule_render()
+
+    def _set_filter(self, name: str, value: str):
+        self.model.set_filter(name, None if value in ("", "All", "all") else value)
+        self._top = 0
+        self._schedule_render()
+
+    def _schedule_render(self):
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+
+    def _format_row(self, trade: Trade) -> typing.Tuple[str, ...]:
+        dt_str = datetime.datetime.fromtimestamp(trade.time / 1000).strftime("%b %d %H:%M")
+        pnl_str = "{0:.{prec}f}".format(trade.pnl, prec=trade.contract.price_decimals)
+
+        return (dt_str, trade.contract.symbol, trade.contract.exchange.capitalize(), trade.strategy,
+                trade.side.capitalize(), str(trade.quantity), trade.status.capitalize(), pnl_str)
+
+    def _render(self):
+        self._render_pending = False
 
-        self._body_index = 0
+        total = len(self.model)
+        self._top = min(self._top, max(total - VISIBLE_ROWS, 0))
 
-    def add_trade(self, data: Trade):
-        b_index = self._body_index
+        page = self.model.page(self._top, VISIBLE_ROWS)
+        self._visible_ids = {trade.trade_id for trade in page}
 
-        t_index = data.time
+        for row in range(VISIBLE_ROWS):
+            values = self._format_row(page[row]) if row < len(page) else ("",) * len(self._headers)
 
-        dt_str = datetime.datetime.fromtimestamp(data.time / 1000).strftime("%b %d %H:%M")
+            if self._row_values.get(row) == values:
+                continue
 
-        self.body_widgets['time'][t_index] = tk.Label(self._body_frame.sub_frame, text=dt_str, bg=BG_COLOR,
-                                                      fg=FG_COLOR_2, font=GLOBAL_FONT, width=self._col_width)
-        self.body_widgets['time'][t_index].grid(row=b_index, column=0)
+            for h, value in zip(self._headers, values):
+                self.body_widgets[h + "_var"][row].set(value)
 
-        self.body_widgets['symbol'][t_index] = tk.Label(self._body_frame.sub_frame, text=data.contract.symbol,
-                                                        bg=BG_COLOR, fg=FG_COLOR_2, font=GLOBAL_FONT,
-                                                        width=self._col_width)
-        self.body_widgets['symbol'][t_index].grid(row=b_index, column=1)
+            self._row_values[row] = values
 
-        self.body_widgets['exchange'][t_index] = tk.Label(self._body_frame.sub_frame,
-                                                          text=data.contract.exchange.capitalize(),
-                                                          bg=BG_COLOR, fg=FG_COLOR_2, font=GLOBAL_FONT,
-                                                          width=self._col_width)
-        self.body_widgets['exchange'][t_index].grid(row=b_index, column=2)
+        if total == 0:
+            self._scrollbar.set(0, 1)
+        else:
+            self._scrollbar.set(self._top / total, min((self._top + VISIBLE_ROWS) / total, 1))
 
-        self.body_widgets['strategy'][t_index] = tk.Label(self._body_frame.sub_frame, text=data.strategy, bg=BG_COLOR,
-                                                          fg=FG_COLOR_2, font=GLOBAL_FONT, width=self._col_width)
-        self.body_widgets['strategy'][t_index].grid(row=b_index, column=3)
+    def _scroll_to(self, top: int):
+        top = min(max(top, 0), max(len(self.model) - VISIBLE_ROWS, 0))
 
-        self.body_widgets['side'][t_index] = tk.Label(self._body_frame.sub_frame, text=data.side.capitalize(),
-                                                      bg=BG_COLOR, fg=FG_COLOR_2, font=GLOBAL_FONT,
-                                                      width=self._col_width)
-        self.body_widgets['side'][t_index].grid(row=b_index, column=4)
+        if top != self._top:
+            self._top = top
+            self._schedule_render()
 
-        self.body_widgets['quntity'][t_index] = tk.Label(self._body_frame.sub_frame, text=data.quantity, bg=BG_COLOR,
-                                                         fg=FG_COLOR_2, font=GLOBAL_FONT, width=self._col_width)
-        self.body_widgets['quntity'][t_index].grid(row=b_index, column=5)
+    def _on_scroll(self, action: str, *args):
+        if action == "moveto":
+            self._scroll_to(int(float(args[0]) * len(self.model)))
+        elif action == "scroll":
+            step = VISIBLE_ROWS if args[1] == "pages" else 1
+            self._scroll_to(self._top + int(args[0]) * step)
 
-        self.body_widgets['status_var'][t_index] = tk.StringVar()
-        self.body_widgets['status'][t_index] = tk.Label(self._body_frame.sub_frame,
-                                                        textvariable=self.body_widgets['status_var'][t_index],
-                                                        bg=BG_COLOR, fg=FG_COLOR_2, font=GLOBAL_FONT,
-                                                        width=self._col_width)
-        self.body_widgets['status'][t_index].grid(row=b_index, column=6)
+    def _on_activate_mousewheel(self, event: tk.Event):
+        self._rows_frame.bind_all("<MouseWheel>", self._on_mousewheel)
 
-        self.body_widgets['pnl_var'][t_index] = tk.StringVar()
-        self.body_widgets['pnl'][t_index] = tk.Label(self._body_frame.sub_frame,
-                                                     textvariable=self.body_widgets['pnl_var'][t_index], bg=BG_COLOR,
-                                                     fg=FG_COLOR_2, font=GLOBAL_FONT)
-        self.body_widgets['pnl'][t_index].grid(row=b_index, column=7)
+    def _on_deactivate_mousewheel(self, event: tk.Event):
+        self._rows_frame.unbind_all("<MouseWheel>")
 
-        self._body_index += 1
+    def _on_mousewheel(self, event: tk.Event):
+        self._scroll_to(self._top + int(-1 * (event.delta / 60)))
@@ -3,18 +3,21 @@ import typing
 import tkinter as tk
 
 from models import *
+from connectors.binance_futures import BinanceFuturesClient
 from interface.styling import *
 from interface.autocomplete_widget import Autocomplete
 from interface.scrollable_frame import ScrollableFrame
 
 from database import WorkspaceData
 
+LAZY_LOAD_BATCH = 20
+
 
 class WatchList(tk.Frame):
-    def __init__(self, binance_contracts: typing.Dict[str, Contract], *args, **kwargs):
+    def __init__(self, binance: BinanceFuturesClient, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self.binance_symbols = list(binance_contracts.keys())
+        self._binance = binance
 
         self.db = WorkspaceData()
 
@@ -27,8 +30,8 @@ class WatchList(tk.Frame):
         self._binance_label = tk.Label(self._commands_frame, text="Binance", bg=BG_COLOR, fg=FG_COLOR, font=BOLD_FONT)
         self._binance_label.grid(row=0, column=0)
 
-        self._binance_entry = Autocomplete(self.binance_symbols, self._commands_frame, fg=FG_COLOR, justify=tk.CENTER,
-                                           insertbackground=FG_COLOR, bg=BG_COLOR_2)
+        self._binance_entry = Autocomplete(list(binance.contracts.values()), self._commands_frame, fg=FG_COLOR,
+                                           justify=tk.CENTER, insertbackground=FG_COLOR, bg=BG_COLOR_2)
         self._binance_entry.bind("<Return>", self._add_binance_symol)
         self._binance_entry.grid(row=0, column=1)
 
@@ -60,23 +63,58 @@ class WatchList(tk.Frame):
                 self.body_widgets[h + "_var"] = dict()
 
         self._body_index = 0
+        self._symbol_rows: typing.Dict[str, typing.Set[int]] = dict()
+        self._quotes: typing.Dict[str, typing.Tuple[float, float]] = dict()
 
-        saved_symbols = self.db.get('watchlist')
+        self._load_symbols(self.db.get('watchlist'), 0)
 
-        for s in saved_symbols:
+    def _load_symbols(self, saved_symbols: typing.List, start: int):
+        # Rows are built a batch at a time between Tk events, so the window shows up before all rows exist
+        for s in saved_symbols[start:start + LAZY_LOAD_BATCH]:
             self._add_symbol(s['symbol'], s['exchange'])
 
+        if start + LAZY_LOAD_BATCH < len(saved_symbols):
+            self.after(1, lambda: self._load_symbols(saved_symbols, start + LAZY_LOAD_BATCH))
+        else:
+            self._binance.request_quotes(list(self._symbol_rows.keys()))
+
     def _add_binance_symol(self, event):
         symbol = event.widget.get()
 
-        if symbol in self.binance_symbols:
+        if symbol in self._binance.contracts:
             self._add_symbol(symbol, "Binance")
+            self._binance.request_quotes([symbol])
             event.widget.delete(0, tk.END)
 
+    def update_prices(self, symbol: str, bid: float, ask: float):
+        if symbol not in self._symbol_rows:
+            return
+
+        last_bid, last_ask = self._quotes.get(symbol, (None, None))
+
+        for b_index in self._symbol_rows[symbol]:
+            if bid != last_bid:
+                self.body_widgets['bid_var'][b_index].set(bid)
+
+            if ask != last_ask:
+                self.body_widgets['ask_var'][b_index].set(ask)
+
+        self._quotes[symbol] = (bid, ask)
+
     def _remove_symbol(self, b_index: int):
+        symbol = self.body_widgets['symbol'][b_index].cget('text')
+        self._symbol_rows[symbol].discard(b_index)
+
+        if len(self._symbol_rows[symbol]) == 0:
+            del self._symbol_rows[symbol]
+            self._quotes.pop(symbol, None)
+
+        # Destroyed, not only hidden: grid_forget keeps the widget and its Tcl variables alive
         for h in self._headers:
-            self.body_widgets[h][b_index].grid_forget()
-            del self.body_widgets[h][b_index]
+            self.body_widgets[h].pop(b_index).destroy()
+
+        for var in ["bid_var", "ask_var"]:
+            del self.body_widgets[var][b_index]
 
     def _add_symbol(self, symbol: str, exchange: str):
         b_index = self._body_index
@@ -110,4 +148,10 @@ class WatchList(tk.Frame):
                                                          font=GLOBAL_FONT, command=lambda: self._remove_symbol(b_index))
         self.body_widgets['remove'][b_index].grid(row=b_index, column=4)
 
+        self._symbol_rows.setdefault(symbol, set()).add(b_index)
+
+        if symbol in self._quotes:
+            self.body_widgets['bid_var'][b_index].set(self._quotes[symbol][0])
+            self.body_widgets['ask_var'][b_index].set(self._quotes[symbol][1])
+
         self._body_index += 1
@@ -0,0 +1,70 @@
+import collections
+import itertools
+import threading
+import time
+import typing
+
+
+class RingLog:
+    def __init__(self, maxlen: int = 1000, spill_path: typing.Optional[str] = None):
+        self._entries: typing.Deque[typing.Tuple[int, str]] = collections.deque(maxlen=maxlen)
+        self._maxlen = maxlen
+        self._next_seq = 0
+        self._cursors: typing.Dict[str, int] = dict()
+        self._lock = threading.Lock()
+
+        self._spill_file = None
+
+        if spill_path is not None:
+            self._spill_file = open(spill_path, "a", encoding="utf-8", buffering=1)
+
+    def append(self, msg: str):
+        timestamp = int(time.time() * 1000)
+
+        with self._lock:
+            if self._spill_file is not None and len(self._entries) == self._maxlen:
+                evicted_ts, evicted_msg = self._entries[0]
+                self._spill_file.write(f"{evicted_ts}\t{evicted_msg}\n")
+
+            self._entries.append((timestamp, msg))
+            self._next_seq += 1
+
+    def resize(self, maxlen: int) -> int:
+        # Returns the number of entries dropped
+        with self._lock:
+            if maxlen == self._maxlen:
+                return 0
+
+            dropped = max(len(self._entries) - maxlen, 0)
+
+            if self._spill_file is not None:
+                for evicted_ts, evicted_msg in itertools.islice(self._entries, dropped):
+                    self._spill_file.write(f"{evicted_ts}\t{evicted_msg}\n")
+
+            self._entries = collections.deque(self._entries, maxlen=maxlen)
+            self._maxlen = maxlen
+
+        return dropped
+
+    def read_new(self, consumer: str) -> typing.List[str]:
+        with self._lock:
+            first_seq = self._next_seq - len(self._entries)
+            cursor = max(self._cursors.get(consumer, 0), first_seq)
+
+            # New entries are at the right end of the deque, walk them from there so a read costs O(new entries)
+            new_entries = list(itertools.islice(reversed(self._entries), self._next_seq - cursor))
+            self._cursors[consumer] = self._next_seq
+
+        return [msg for timestamp, msg in reversed(new_entries)]
+
+    def entries(self) -> typing.List[typing.Tuple[int, str]]:
+        with self._lock:
+            return list(self._entries)
+
+    def close(self):
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
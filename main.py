@@ -1,7 +1,8 @@
-import tkinter as tk
+import argparse
 import logging
 from connectors.binance_futures import BinanceFuturesClient
-from interface.root_component import Root
+from risk import RiskLimits
+from strategies import TF_EQUIV
 
 binance_api_key = "yyy"
 binance_api_secret = "xxx"
@@ -23,8 +24,67 @@ logger.addHandler(stream_handler)
 logger.addHandler(file_handler)
 
 if __name__ == '__main__':
-    binance = BinanceFuturesClient(testnet=True, public_key=binance_api_key, secret_key=binance_api_secret)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--headless", action="store_true", help="run without the Tkinter interface")
+    parser.add_argument("--host", default="127.0.0.1", help="control server address in headless mode")
+    parser.add_argument("--port", type=int, default=8600, help="control server port in headless mode")
+    parser.add_argument("--no-autostart", action="store_true", help="do not start saved strategies in headless mode")
+    parser.add_argument("--strategy-module", action="append", default=[],
+                        help="module registering additional strategies, can be repeated")
+    parser.add_argument("--archive-ticks", metavar="DIR", help="archive trades and book ticks to this directory")
+    parser.add_argument("--paper", action="store_true", help="simulate orders against live market data")
+    parser.add_argument("--paper-balance", type=float, default=10000, help="initial USDT balance in paper mode")
+    parser.add_argument("--paper-latency", type=int, default=0, help="simulated order latency in ms in paper mode")
+    parser.add_argument("--scan", metavar="TIMEFRAME", choices=list(TF_EQUIV),
+                        help="scan every contract for signals on this timeframe")
+    parser.add_argument("--retention", metavar="NAME=COUNT", action="append", default=[],
+                        help="retention limit, e.g. candles=2000 or closed_trades=100, can be repeated")
+    parser.add_argument("--risk-max-position", type=float, help="max open notional per symbol, in USDT")
+    parser.add_argument("--risk-max-strategy-notional", type=float, help="max open notional per strategy, in USDT")
+    parser.add_argument("--risk-max-account-notional", type=float, help="max open notional of the account, in USDT")
+    parser.add_argument("--risk-max-open-trades", type=int, help="max number of open trades")
+    parser.add_argument("--risk-max-daily-loss", type=float, help="no new entry once the day's loss reaches this")
+    parser.add_argument("--risk-max-orders-per-minute", type=int, help="max orders sent per minute")
+    args = parser.parse_args()
 
-    root = Root(binance)
+    retention_limits = dict()
 
-    root.mainloop()
+    for limit in args.retention:
+        name, _, count = limit.partition("=")
+        retention_limits[name.strip()] = int(count)
+
+    risk_limits = RiskLimits(max_symbol_notional=args.risk_max_position,
+                             max_strategy_notional=args.risk_max_strategy_notional,
+                             max_account_notional=args.risk_max_account_notional,
+                             max_open_trades=args.risk_max_open_trades, max_daily_loss=args.risk_max_daily_loss,
+                             max_orders_per_minute=args.risk_max_orders_per_minute)
+
+    if len(args.strategy_module) > 0:
+        from strategies import load_strategy_plugins
+
+        load_strategy_plugins(args.strategy_module)
+
+    if args.paper:
+        from connectors.paper_trading import PaperTradingClient
+
+        binance = PaperTradingClient(initial_balance=args.paper_balance, latency_ms=args.paper_latency,
+                                     tick_archive_path=args.archive_ticks, retention_limits=retention_limits,
+                                     risk_limits=risk_limits)
+    else:
+        binance = BinanceFuturesClient(testnet=True, public_key=binance_api_key, secret_key=binance_api_secret,
+                                       tick_archive_path=args.archive_ticks, retention_limits=retention_limits,
+                                       risk_limits=risk_limits)
+
+    if args.scan is not None:
+        binance.start_scanner(args.scan)
+
+    if args.headless:
+        from headless import run_headless
+
+        run_headless(binance, args.host, args.port, autostart=not args.no_autostart)
+    else:
+        from interface.root_component import Root
+
+        root = Root(binance)
+
+        root.mainloop()
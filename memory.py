@@ -0,0 +1,167 @@
+import collections
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+import typing
+
+if typing.TYPE_CHECKING:
+    from connectors.binance_futures import BinanceFuturesClient
+
+logger = logging.getLogger()
+
+# Items kept per subsystem: candles and closed trades per strategy, log entries per log buffer,
+# finished executions, and the closed trades and log lines shown by the interface
+RETENTION_LIMITS = {"candles": 5000, "closed_trades": 500, "logs": 1000, "executions": 200, "ui_trades": 2000,
+                    "ui_log_lines": 500}
+MEMORY_CHECK_INTERVAL = 60
+TRACEMALLOC_TOP = 15
+
+
+def _object_size(obj: typing.Any) -> int:
+    size = sys.getsizeof(obj)
+
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__) + sum(sys.getsizeof(value) for value in obj.__dict__.values())
+
+    return size
+
+
+def _estimate_size(items: typing.Sequence) -> int:
+    # Estimated from one item, the items of a store all have the same shape
+    if len(items) == 0:
+        return sys.getsizeof(items)
+
+    return sys.getsizeof(items) + len(items) * _object_size(items[-1])
+
+
+class MemoryMonitor:
+    def __init__(self, client: "BinanceFuturesClient", limits: typing.Optional[typing.Dict[str, int]] = None,
+                 interval: float = MEMORY_CHECK_INTERVAL):
+        self.client = client
+        self.limits = dict(RETENTION_LIMITS)
+        self.limits.update(limits or dict())
+        self._interval = interval
+
+        self._snapshot: typing.Optional[tracemalloc.Snapshot] = None
+        self._running = False
+
+    def report(self, widgets: typing.Optional[typing.Dict[str, int]] = None) -> typing.Dict[str, typing.Dict]:
+        # Item counts and approximate sizes in bytes per subsystem.
+        # Widget counts can only be read on the Tk thread, the interface passes them in.
+        strategies = list(self.client.strategies.values())
+
+        candles = [len(strat.candles) for strat in strategies]
+        candle_bytes = sum(_estimate_size(strat.candles) for strat in strategies)
+        trades = [trade for strat in strategies for trade in list(strat.trades)]
+        log_buffers = [self.client.logs] + [strat.logs for strat in strategies]
+
+        threads = collections.Counter(thread.name.split("-")[0] for thread in threading.enumerate())
+
+        report = {
+            "candles": {"stores": len(candles), "items": sum(candles), "largest": max(candles, default=0),
+                        "bytes": candle_bytes},
+            "trades": {"items": len(trades), "open": sum(1 for trade in trades if trade.status == "open"),
+                       "bytes": _estimate_size(trades)},
+            "logs": {"buffers": len(log_buffers), "items": sum(len(log) for log in log_buffers),
+                     "bytes": sum(_estimate_size(log.entries()) for log in log_buffers)},
+            "order_books": {"books": len(self.client.order_books),
+                            "levels": sum(len(book.bids) + len(book.asks)
+                                          for book in list(self.client.order_books.values()))},
+            "executions": {"working": self.client.execution.working(),
+                           "history": len(self.client.execution.history)},
+            "ui_events": {"pending": len(self.client.ui_events)},
+            "threads": {"count": threading.active_count(), "by_name": dict(threads)},
+        }
+
+        if self.client.tick_archive is not None:
+            report["tick_archive"] = {"buffered": self.client.tick_archive.buffered()}
+
+        if widgets is not None:
+            report["widgets"] = widgets
+
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            report["tracemalloc"] = {"current": current, "peak": peak}
+
+        return report
+
+    def enforce(self) -> typing.Dict[str, int]:
+        # Drops what exceeds the retention limits, returns the number of items removed per subsystem
+        removed = collections.Counter()
+
+        for strat in list(self.client.strategies.values()):
+            with strat._lock:
+                excess = len(strat.candles) - self.limits['candles']
+                if excess > 0:
+                    del strat.candles[:excess]
+                    removed['candles'] += excess
+
+                # Open trades are always kept, only the oldest closed ones are dropped
+                closed = [trade for trade in strat.trades if trade.status == "closed"]
+                excess = len(closed) - self.limits['closed_trades']
+                if excess > 0:
+                    dropped = {trade.trade_id for trade in closed[:excess]}
+                    strat.trades[:] = [trade for trade in strat.trades if trade.trade_id not in dropped]
+                    removed['closed_trades'] += excess
+
+            removed['logs'] += strat.logs.resize(self.limits['logs'])
+
+        removed['logs'] += self.client.logs.resize(self.limits['logs'])
+        removed['executions'] += self.client.execution.resize_history(self.limits['executions'])
+
+        removed = {name: count for name, count in removed.items() if count > 0}
+
+        if len(removed) > 0:
+            logger.info("Retention limits enforced, items removed: %s", removed)
+
+        return removed
+
+    def snapshot(self, top: int = TRACEMALLOC_TOP) -> typing.List[str]:
+        # The first call starts tracing, each next call lists the allocations that grew the most since the previous
+        # one. Tracing slows every allocation down, stop_tracing ends it.
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._snapshot = None
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+
+        if self._snapshot is None:
+            stats = snapshot.statistics("lineno")
+        else:
+            stats = snapshot.compare_to(self._snapshot, "lineno")
+
+        self._snapshot = snapshot
+
+        return [str(stat) for stat in stats[:top]]
+
+    def stop_tracing(self) -> bool:
+        if not tracemalloc.is_tracing():
+            return False
+
+        tracemalloc.stop()
+        self._snapshot = None
+
+        return True
+
+    def start(self):
+        if self._running:
+            return
+
+        self._running = True
+
+        t = threading.Thread(target=self._run, name="memory", daemon=True)
+        t.start()
+
+    def stop(self):
+        self._running = False
+
+    def _run(self):
+        while self._running:
+            time.sleep(self._interval)
+
+            try:
+                self.enforce()
+            except Exception as e:
+                logger.error("Error while enforcing the retention limits: %s", e)
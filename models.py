@@ -1,3 +1,6 @@
+import uuid
+
+
 class Balance:
     def __init__(self, info):
         self.initial_margin = float(info['initialMargin'])
@@ -33,8 +36,18 @@ class Contract:
         self.quote_asset = contract_info['quoteAsset']
         self.price_decimals = contract_info['pricePrecision']
         self.quantity_decimals = contract_info['quantityPrecision']
-        self.tick_size = 1 / pow(10, contract_info['pricePrecision'])
-        self.lot_size = 1 / pow(10, contract_info['quantityPrecision'])
+        self.filters = {f['filterType']: f for f in contract_info.get('filters', [])}
+
+        if "PRICE_FILTER" in self.filters:
+            self.tick_size = float(self.filters['PRICE_FILTER']['tickSize'])
+        else:
+            self.tick_size = 1 / pow(10, contract_info['pricePrecision'])
+
+        if "LOT_SIZE" in self.filters:
+            self.lot_size = float(self.filters['LOT_SIZE']['stepSize'])
+        else:
+            self.lot_size = 1 / pow(10, contract_info['quantityPrecision'])
+
         self.exchange = exchange
 
 
@@ -43,10 +56,12 @@ class OrderStatus:
         self.order_id = order_info['orderId']
         self.status = order_info['status'].lower()
         self.avg_price = float(order_info['avgPrice'])
+        self.executed_qty = float(order_info.get('executedQty', 0))
 
 
 class Trade:
     def __init__(self, trade_info):
+        self.trade_id: str = trade_info.get('trade_id') or uuid.uuid4().hex
         self.time: int = trade_info['time']
         self.contract: Contract = trade_info['contract']
         self.strategy: str = trade_info['strategy']
@@ -0,0 +1,225 @@
+import bisect
+import collections
+import logging
+import threading
+import typing
+
+logger = logging.getLogger()
+
+# Diffs buffered while waiting for a snapshot, about 100 seconds of the 100ms stream
+ORDER_BOOK_BUFFER_LIMIT = 1000
+
+
+class BookSide:
+    def __init__(self, is_bid: bool):
+        # Prices are kept ascending with the best level last: bids as prices, asks as negated prices.
+        # Most updates happen near the top of the book, so inserts and deletes shift few elements.
+        self._sign = 1 if is_bid else -1
+        self._keys: typing.List[float] = []
+        self._qtys: typing.List[float] = []
+
+    def clear(self):
+        self._keys.clear()
+        self._qtys.clear()
+
+    def update(self, price: float, qty: float):
+        key = price * self._sign
+        idx = bisect.bisect_left(self._keys, key)
+
+        if idx < len(self._keys) and self._keys[idx] == key:
+            if qty == 0:
+                del self._keys[idx]
+                del self._qtys[idx]
+            else:
+                self._qtys[idx] = qty
+        elif qty != 0:
+            self._keys.insert(idx, key)
+            self._qtys.insert(idx, qty)
+
+    def best(self) -> typing.Optional[typing.Tuple[float, float]]:
+        if len(self._keys) == 0:
+            return None
+
+        return self._keys[-1] * self._sign, self._qtys[-1]
+
+    def levels(self, n: int) -> typing.List[typing.Tuple[float, float]]:
+        start = max(len(self._keys) - n, 0)
+
+        return [(self._keys[i] * self._sign, self._qtys[i]) for i in range(len(self._keys) - 1, start - 1, -1)]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class OrderBook:
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = BookSide(is_bid=True)
+        self.asks = BookSide(is_bid=False)
+
+        self.last_update_id = 0
+        self.synced = False
+        # Until a diff is applied after the snapshot, the next one must straddle lastUpdateId rather than chain on pu
+        self._first_pending = False
+
+        self._buffer: typing.Deque[typing.Dict] = collections.deque(maxlen=ORDER_BOOK_BUFFER_LIMIT)
+        self._lock = threading.Lock()
+
+    def load_snapshot(self, snapshot: typing.Dict) -> bool:
+        with self._lock:
+            self.bids.clear()
+            self.asks.clear()
+
+            for price, qty in snapshot['bids']:
+                self.bids.update(float(price), float(qty))
+            for price, qty in snapshot['asks']:
+                self.asks.update(float(price), float(qty))
+
+            self.last_update_id = snapshot['lastUpdateId']
+
+            buffered = [event for event in self._buffer if event['u'] >= self.last_update_id]
+
+            # The first applied diff must straddle the snapshot, later ones must chain on the previous one
+            if len(buffered) > 0 and buffered[0]['U'] > self.last_update_id:
+                logger.warning("%s order book snapshot is older than the buffered diffs", self.symbol)
+                return False
+
+            for idx, event in enumerate(buffered):
+                if idx > 0 and event['pu'] != buffered[idx - 1]['u']:
+                    logger.warning("%s order book gap in the buffered diffs", self.symbol)
+                    self._buffer = collections.deque(buffered[idx:], maxlen=ORDER_BOOK_BUFFER_LIMIT)
+                    return False
+
+                self._apply(event)
+
+            self._buffer.clear()
+            self._first_pending = len(buffered) == 0
+            self.synced = True
+
+            return True
+
+    def invalidate(self):
+        # Diffs are buffered again until the next snapshot is loaded
+        with self._lock:
+            self.synced = False
+            self._buffer.clear()
+
+    def on_diff(self, event: typing.Dict) -> bool:
+        # Returns False when the book needs a new snapshot: a sequence gap was detected, or no snapshot was loaded
+        # while the buffer filled up, because the bootstrap failed
+        with self._lock:
+            if not self.synced:
+                if len(self._buffer) == self._buffer.maxlen:
+                    logger.warning("%s order book still not synchronized after %s diffs", self.symbol,
+                                   len(self._buffer))
+                    self._buffer.clear()
+                    self._buffer.append(event)
+                    return False
+
+                self._buffer.append(event)
+                return True
+
+            if event['u'] < self.last_update_id:
+                return True
+
+            if self._first_pending:
+                if event['U'] > self.last_update_id:
+                    logger.warning("%s order book snapshot %s is older than the first diff %s", self.symbol,
+                                   self.last_update_id, event['U'])
+                    self.synced = False
+                    self._buffer.clear()
+                    self._buffer.append(event)
+                    return False
+
+                self._first_pending = False
+                self._apply(event)
+                return True
+
+            if event['pu'] != self.last_update_id:
+                logger.warning("%s order book out of sync: expected pu %s, got %s", self.symbol,
+                               self.last_update_id, event['pu'])
+                self.synced = False
+                self._buffer.clear()
+                self._buffer.append(event)
+                return False
+
+            self._apply(event)
+
+            return True
+
+    def _apply(self, event: typing.Dict):
+        for price, qty in event['b']:
+            self.bids.update(float(price), float(qty))
+        for price, qty in event['a']:
+            self.asks.update(float(price), float(qty))
+
+        self.last_update_id = event['u']
+
+    def best_bid(self) -> typing.Optional[typing.Tuple[float, float]]:
+        return self.bids.best()
+
+    def best_ask(self) -> typing.Optional[typing.Tuple[float, float]]:
+        return self.asks.best()
+
+    def depth(self, side: str, n: int) -> typing.List[typing.Tuple[float, float]]:
+        with self._lock:
+            return (self.bids if side == "bids" else self.asks).levels(n)
+
+    def expected_fill(self, side: str, quantity: float) -> typing.Optional[typing.Tuple[float, float]]:
+        # Average fill price and slippage (in % of the best price) of a market order walking the book,
+        # None if the book is not deep enough
+        with self._lock:
+            book_side = self.asks if side.lower() == "buy" else self.bids
+            levels = book_side.levels(len(book_side))
+
+        if len(levels) == 0:
+            return None
+
+        remaining = quantity
+        cost = 0
+
+        for price, qty in levels:
+            filled = min(qty, remaining)
+            cost += filled * price
+            remaining -= filled
+
+            if remaining <= 0:
+                avg_price = cost / quantity
+                return avg_price, abs(avg_price - levels[0][0]) / levels[0][0] * 100
+
+        return None
+
+    def max_quantity(self, side: str, max_slippage_pct: float) -> float:
+        # Largest market order quantity whose average fill stays within max_slippage_pct of the best price
+        with self._lock:
+            book_side = self.asks if side.lower() == "buy" else self.bids
+            levels = book_side.levels(len(book_side))
+
+        if len(levels) == 0:
+            return 0
+
+        best_price = levels[0][0]
+        limit = best_price * (1 + max_slippage_pct / 100) if side.lower() == "buy" \
+            else best_price * (1 - max_slippage_pct / 100)
+
+        quantity = 0
+        cost = 0
+
+        for price, qty in levels:
+            # Take as much of this level as keeps the average price within the limit
+            if (price - limit) * (1 if side.lower() == "buy" else -1) <= 0:
+                quantity += qty
+                cost += qty * price
+                continue
+
+            room = (limit * quantity - cost) / (price - limit)
+
+            if room >= qty:
+                quantity += qty
+                cost += qty * price
+                continue
+
+            quantity += max(room, 0)
+            break
+
+        return quantity
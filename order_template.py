@@ -0,0 +1,67 @@
+import decimal
+
+from decimal import Decimal
+
+from models import *
+
+QUANTITY_TOLERANCE = Decimal("1e-9")
+
+
+def _to_decimal(value: float) -> Decimal:
+    # Through the shortest repr, so 0.1 becomes Decimal("0.1") and not the exact binary expansion
+    return Decimal(repr(value))
+
+
+class OrderTemplate:
+    def __init__(self, contract: Contract):
+        # Exact filters from exchangeInfo, the precisions are a fallback for contracts built without filters
+        filters = contract.filters
+        price_filter = filters.get("PRICE_FILTER", dict())
+        lot_filter = filters.get("LOT_SIZE", dict())
+        market_lot_filter = filters.get("MARKET_LOT_SIZE", lot_filter)
+
+        self.symbol = contract.symbol
+        self.tick_size = Decimal(price_filter.get("tickSize", Decimal(1).scaleb(-contract.price_decimals))).normalize()
+        self.min_price = Decimal(price_filter.get("minPrice", 0))
+
+        self.step_size = Decimal(lot_filter.get("stepSize", Decimal(1).scaleb(-contract.quantity_decimals))).normalize()
+        self.min_qty = Decimal(lot_filter.get("minQty", 0))
+        self.max_qty = Decimal(lot_filter.get("maxQty", "Infinity"))
+
+        self.market_step_size = Decimal(market_lot_filter.get("stepSize", self.step_size)).normalize()
+        self.market_min_qty = Decimal(market_lot_filter.get("minQty", self.min_qty))
+        self.market_max_qty = Decimal(market_lot_filter.get("maxQty", self.max_qty))
+
+        self.min_notional = Decimal(filters.get("MIN_NOTIONAL", dict()).get("notional", 0))
+
+    def quantize_quantity(self, quantity: float, market: bool = False) -> Decimal:
+        # Rounded down to the step size, so the order never exceeds the requested size.
+        # 0 when below the minimum quantity.
+        step, min_qty, max_qty = (self.market_step_size, self.market_min_qty, self.market_max_qty) if market \
+            else (self.step_size, self.min_qty, self.max_qty)
+
+        units = _to_decimal(quantity) / step
+        nearest = units.to_integral_value(decimal.ROUND_HALF_EVEN)
+
+        # A float a hair below a whole number of steps (0.0029999999999999996) is not rounded down a full step
+        if abs(units - nearest) < QUANTITY_TOLERANCE:
+            quantity = nearest * step
+        else:
+            quantity = units.to_integral_value(decimal.ROUND_DOWN) * step
+        quantity = min(quantity, (max_qty / step).to_integral_value(decimal.ROUND_DOWN) * step)
+
+        if quantity < min_qty:
+            return Decimal(0)
+
+        return quantity
+
+    def quantize_price(self, price: float, rounding: str = decimal.ROUND_HALF_UP) -> Decimal:
+        return max((_to_decimal(price) / self.tick_size).to_integral_value(rounding) * self.tick_size, self.min_price)
+
+    def meets_notional(self, quantity: Decimal, price: float) -> bool:
+        return quantity * _to_decimal(price) >= self.min_notional
+
+    @staticmethod
+    def format(value: Decimal) -> str:
+        # Plain notation, str() would give 1E-5 for small values
+        return format(value, "f")
@@ -0,0 +1,245 @@
+import collections
+import logging
+import threading
+import time
+import typing
+
+import numpy as np
+
+from models import *
+
+if typing.TYPE_CHECKING:
+    from events import UiEventQueue
+
+logger = logging.getLogger()
+
+PNL_INTERVAL = 0.5
+TAKER_FEE_RATE = 0.0004
+
+
+class PnlEngine:
+    def __init__(self, prices: typing.Dict[str, typing.Dict[str, float]], ui_events: "UiEventQueue",
+                 fee_rate: float = TAKER_FEE_RATE, interval: float = PNL_INTERVAL):
+        self._prices = prices
+        self._ui_events = ui_events
+        self.fee_rate = fee_rate
+        self._interval = interval
+
+        # Per symbol, updated in place by the markPrice stream
+        self._symbols: typing.Dict[str, int] = dict()
+        self._mark = np.full(0, np.nan)
+        self._funding_rate = np.zeros(0)
+        self._next_funding = np.zeros(0, dtype=np.int64)
+
+        # Per open trade, one slot in each array. Closed slots are reused.
+        self._strategies: typing.Dict[str, int] = dict()
+        self._strategy_names: typing.List[str] = []
+        self._slot_sym = np.zeros(0, dtype=np.int64)
+        self._slot_strat = np.zeros(0, dtype=np.int64)
+        self._slot_sign = np.zeros(0)
+        self._slot_qty = np.zeros(0)
+        self._slot_entry = np.zeros(0)
+        self._slot_fees = np.zeros(0)
+        self._slot_funding = np.zeros(0)
+        self._slot_opened = np.zeros(0, dtype=np.int64)
+        self._slot_open = np.zeros(0, dtype=bool)
+        self._slot_pnl = np.zeros(0)
+        self._trades: typing.List[typing.Optional[Trade]] = []
+        self._slot_of: typing.Dict[str, int] = dict()
+        self._free: typing.List[int] = []
+
+        self.realized: typing.Dict[str, float] = collections.defaultdict(float)
+        self.fees_paid: typing.Dict[str, float] = collections.defaultdict(float)
+        self.funding_paid: typing.Dict[str, float] = collections.defaultdict(float)
+
+        self._lock = threading.Lock()
+        self._running = False
+
+    def _symbol_index(self, symbol: str) -> int:
+        idx = self._symbols.get(symbol)
+
+        if idx is None:
+            idx = len(self._symbols)
+            self._symbols[symbol] = idx
+            self._mark = np.append(self._mark, np.nan)
+            self._funding_rate = np.append(self._funding_rate, 0)
+            self._next_funding = np.append(self._next_funding, 0)
+
+        return idx
+
+    def _strategy_index(self, strategy: str) -> int:
+        idx = self._strategies.get(strategy)
+
+        if idx is None:
+            idx = len(self._strategy_names)
+            self._strategies[strategy] = idx
+            self._strategy_names.append(strategy)
+
+        return idx
+
+    def _new_slot(self) -> int:
+        if len(self._free) > 0:
+            return self._free.pop()
+
+        size = len(self._trades)
+        capacity = max(2 * size, 16)
+
+        for name in ("_slot_sym", "_slot_strat", "_slot_sign", "_slot_qty", "_slot_entry", "_slot_fees",
+                     "_slot_funding", "_slot_opened", "_slot_open", "_slot_pnl"):
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:size] = array
+            setattr(self, name, grown)
+
+        self._trades.extend([None] * (capacity - size))
+        self._free.extend(range(capacity - 1, size, -1))
+
+        return size
+
+    def on_mark_price(self, symbol: str, mark_price: float, funding_rate: float, next_funding_time: int,
+                      timestamp: int):
+        with self._lock:
+            idx = self._symbol_index(symbol)
+
+            # The next funding time moved forward: the previous one was settled at the last known rate
+            if 0 < self._next_funding[idx] < next_funding_time and self._next_funding[idx] <= timestamp:
+                self._settle_funding(idx)
+
+            self._mark[idx] = mark_price
+            self._funding_rate[idx] = funding_rate
+            self._next_funding[idx] = next_funding_time
+
+    def _settle_funding(self, idx: int):
+        settled = self._slot_open & (self._slot_sym == idx) & (self._slot_opened < self._next_funding[idx])
+
+        if not np.any(settled) or np.isnan(self._mark[idx]):
+            return
+
+        # Longs pay shorts when the rate is positive
+        payments = self._slot_sign[settled] * self._slot_qty[settled] * self._mark[idx] * self._funding_rate[idx]
+        self._slot_funding[settled] += payments
+
+        for slot, payment in zip(np.flatnonzero(settled), payments):
+            self.funding_paid[self._strategy_names[self._slot_strat[slot]]] += float(payment)
+
+    def open_trade(self, trade: Trade, strategy: str):
+        with self._lock:
+            if trade.trade_id in self._slot_of or trade.entry_prize is None:
+                return
+
+            slot = self._new_slot()
+            fee = trade.quantity * trade.entry_prize * self.fee_rate
+
+            self._slot_sym[slot] = self._symbol_index(trade.contract.symbol)
+            self._slot_strat[slot] = self._strategy_index(strategy)
+            self._slot_sign[slot] = 1 if trade.side == "long" else -1
+            self._slot_qty[slot] = trade.quantity
+            self._slot_entry[slot] = trade.entry_prize
+            self._slot_fees[slot] = fee
+            self._slot_funding[slot] = 0
+            self._slot_opened[slot] = trade.time
+            self._slot_open[slot] = True
+            self._slot_pnl[slot] = -fee
+            self._trades[slot] = trade
+            self._slot_of[trade.trade_id] = slot
+
+            self.fees_paid[strategy] += fee
+
+    def close_trade(self, trade: Trade, exit_price: float) -> float:
+        # Realized PnL of the trade, net of the entry and exit fees and of the funding paid while it was open
+        with self._lock:
+            slot = self._slot_of.pop(trade.trade_id, None)
+
+            if slot is None:
+                return trade.pnl
+
+            strategy = self._strategy_names[self._slot_strat[slot]]
+            exit_fee = float(self._slot_qty[slot] * exit_price * self.fee_rate)
+
+            pnl = float(self._slot_sign[slot] * self._slot_qty[slot] * (exit_price - self._slot_entry[slot])
+                        - self._slot_fees[slot] - exit_fee - self._slot_funding[slot])
+
+            self.realized[strategy] += pnl
+            self.fees_paid[strategy] += exit_fee
+
+            self._slot_open[slot] = False
+            self._trades[slot] = None
+            self._free.append(slot)
+
+        return pnl
+
+    def _marks(self) -> np.ndarray:
+        marks = self._mark.copy()
+
+        # Until the first markPrice message of a symbol, its mid price is used
+        for symbol, idx in self._symbols.items():
+            if np.isnan(marks[idx]) and symbol in self._prices:
+                marks[idx] = (self._prices[symbol]['bid'] + self._prices[symbol]['ask']) / 2
+
+        return marks
+
+    def update(self):
+        with self._lock:
+            open_slots = np.flatnonzero(self._slot_open)
+
+            if len(open_slots) == 0:
+                return
+
+            marks = self._marks()[self._slot_sym[open_slots]]
+            pnl = self._slot_sign[open_slots] * self._slot_qty[open_slots] * (marks - self._slot_entry[open_slots]) \
+                - self._slot_fees[open_slots] - self._slot_funding[open_slots]
+            pnl = np.where(np.isnan(pnl), self._slot_pnl[open_slots], pnl)
+
+            changed = open_slots[pnl != self._slot_pnl[open_slots]]
+            self._slot_pnl[open_slots] = pnl
+
+            # Written under the lock, so a trade closed meanwhile keeps the realized PnL set by close_trade
+            trades = []
+            for slot, slot_pnl in zip(changed, self._slot_pnl[changed]):
+                trade = self._trades[slot]
+                trade.pnl = float(slot_pnl)
+                trades.append(trade)
+
+        # Only the trades whose PnL moved are sent to the UI
+        for trade in trades:
+            if trade.trade_id in self._slot_of:
+                self._ui_events.push_latest("trade", trade.trade_id, trade)
+
+    def strategy_pnl(self) -> typing.Dict[str, typing.Dict[str, float]]:
+        with self._lock:
+            unrealized = np.bincount(self._slot_strat, weights=np.where(self._slot_open, self._slot_pnl, 0),
+                                     minlength=len(self._strategy_names))
+
+            return {name: {"unrealized": float(unrealized[idx]), "realized": self.realized[name],
+                           "fees": self.fees_paid[name], "funding": self.funding_paid[name]}
+                    for idx, name in enumerate(self._strategy_names)}
+
+    def account(self) -> typing.Dict[str, float]:
+        totals = {"unrealized": 0.0, "realized": 0.0, "fees": 0.0, "funding": 0.0}
+
+        for values in self.strategy_pnl().values():
+            for key in totals:
+                totals[key] += values[key]
+
+        return totals
+
+    def start(self):
+        if self._running:
+            return
+
+        self._running = True
+
+        t = threading.Thread(target=self._run, name="pnl", daemon=True)
+        t.start()
+
+    def stop(self):
+        self._running = False
+
+    def _run(self):
+        while self._running:
+            try:
+                self.update()
+            except Exception as e:
+                logger.error("Error while updating the PnL: %s", e)
+
+            time.sleep(self._interval)
@@ -0,0 +1,164 @@
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+import typing
+
+logger = logging.getLogger()
+
+PROFILE_INTERVAL = 0.005
+MAX_STACK_DEPTH = 100
+
+# Thread name -> group, the threads of the same job share a name
+THREAD_GROUPS = {"websocket": "websocket", "bar-clock": "bar-clock", "bar-close": "bar-close", "execution": "execution",
+                 "pnl": "pnl", "order-status": "order-status"}
+PROFILE_GROUPS = ("websocket", "bar-clock", "bar-close", "execution", "pnl", "order-status", "ui")
+
+
+def _thread_group(thread: typing.Optional[threading.Thread]) -> str:
+    if thread is None:
+        return "other"
+    if thread is threading.main_thread():
+        return "ui"
+
+    # Pool threads are numbered: bar-close_0, bar-close_1...
+    return THREAD_GROUPS.get(thread.name.split("_")[0], "other")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = PROFILE_INTERVAL,
+                 groups: typing.Iterable[str] = PROFILE_GROUPS):
+        self.interval = interval
+        self.groups = set(groups)
+
+        # Nothing is hooked into the profiled threads: when the profiler is off there is no cost at all,
+        # when it is on a single background thread reads the other threads' stacks every interval
+        self._stacks: typing.Dict[typing.Tuple[str, ...], int] = collections.Counter()
+        self.samples = 0
+        self.started_at: typing.Optional[float] = None
+        self.duration = 0.0
+
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread: typing.Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> bool:
+        if self._running:
+            return False
+
+        self.reset()
+        self._running = True
+        self.started_at = time.time()
+
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+        logger.info("Sampling profiler started (interval %s ms)", self.interval * 1000)
+
+        return True
+
+    def stop(self) -> bool:
+        if not self._running:
+            return False
+
+        self._running = False
+        self._thread.join()
+        self.duration = time.time() - self.started_at
+
+        logger.info("Sampling profiler stopped: %s samples in %.1f s", self.samples, self.duration)
+
+        return True
+
+    def reset(self):
+        with self._lock:
+            self._stacks = collections.Counter()
+            self.samples = 0
+
+    def _run(self):
+        own_id = threading.get_ident()
+
+        while self._running:
+            threads = {t.ident: t for t in threading.enumerate()}
+            sampled = []
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+
+                group = _thread_group(threads.get(thread_id))
+                if group not in self.groups:
+                    continue
+
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+
+                stack.append(group)
+                stack.reverse()
+                sampled.append(tuple(stack))
+
+            with self._lock:
+                for stack in sampled:
+                    self._stacks[stack] += 1
+                self.samples += 1
+
+            time.sleep(self.interval)
+
+    def collapsed(self) -> typing.List[str]:
+        # One "root;caller;callee count" line per distinct stack, the input format of flamegraph.pl and speedscope
+        with self._lock:
+            stacks = list(self._stacks.items())
+
+        return [f"{';'.join(stack)} {count}" for stack, count in sorted(stacks)]
+
+    def summary(self, top: int = 20) -> typing.List[typing.Tuple[str, int, int]]:
+        # (function, self samples, total samples), the functions where the profiled threads spend most time first
+        self_counts = collections.Counter()
+        total_counts = collections.Counter()
+
+        with self._lock:
+            stacks = list(self._stacks.items())
+
+        for stack, count in stacks:
+            frames = stack[1:]
+            if len(frames) == 0:
+                continue
+
+            self_counts[frames[-1]] += count
+            # Recursive functions are counted once per sample
+            for label in set(frames):
+                total_counts[label] += count
+
+        ranked = sorted(total_counts, key=lambda label: (self_counts[label], total_counts[label]), reverse=True)
+
+        return [(label, self_counts[label], total_counts[label]) for label in ranked[:top]]
+
+    def dump(self, path_prefix: str = "profile") -> typing.Tuple[str, str]:
+        folded_path = f"{path_prefix}.folded"
+        summary_path = f"{path_prefix}.txt"
+
+        with open(folded_path, "w") as f:
+            f.write("\n".join(self.collapsed()) + "\n")
+
+        with open(summary_path, "w") as f:
+            f.write(f"{self.samples} samples every {self.interval * 1000:.1f} ms over {self.duration:.1f} s\n\n")
+            f.write(f"{'self':>8} {'total':>8}  function\n")
+
+            for label, self_count, total_count in self.summary(top=50):
+                f.write(f"{self_count:>8} {total_count:>8}  {label}\n")
+
+        logger.info("Profile written to %s and %s", folded_path, summary_path)
+
+        return folded_path, summary_path
@@ -0,0 +1,157 @@
+import collections
+import datetime
+import threading
+import time
+import typing
+import uuid
+
+
+class RiskLimits:
+    def __init__(self, max_symbol_notional: typing.Optional[float] = None,
+                 max_strategy_notional: typing.Optional[float] = None,
+                 max_account_notional: typing.Optional[float] = None,
+                 max_open_trades: typing.Optional[int] = None,
+                 max_daily_loss: typing.Optional[float] = None,
+                 max_orders_per_minute: typing.Optional[int] = None):
+        self.max_symbol_notional = max_symbol_notional
+        self.max_strategy_notional = max_strategy_notional
+        self.max_account_notional = max_account_notional
+        self.max_open_trades = max_open_trades
+        self.max_daily_loss = max_daily_loss
+        self.max_orders_per_minute = max_orders_per_minute
+
+
+class RiskEngine:
+    def __init__(self, limits: typing.Optional[RiskLimits] = None):
+        self.limits = limits if limits is not None else RiskLimits()
+
+        # Counters are updated when trades open and close, so a check never iterates over trades or strategies
+        self.symbol_exposure: typing.Dict[str, float] = collections.defaultdict(float)
+        self.strategy_exposure: typing.Dict[str, float] = collections.defaultdict(float)
+        self.account_exposure = 0.0
+        self.open_trades = 0
+        self.daily_pnl = 0.0
+
+        self._day = datetime.datetime.utcnow().date()
+        self._trades: typing.Dict[str, typing.Tuple[str, str, float]] = dict()
+        # Entries allowed but not filled yet, keyed by reservation id, already counted in the exposure
+        self._reservations: typing.Dict[str, typing.Tuple[str, str, float]] = dict()
+        self._order_times: typing.Deque[float] = collections.deque()
+        self._lock = threading.Lock()
+
+    def _roll_day(self):
+        today = datetime.datetime.utcnow().date()
+
+        if today != self._day:
+            self._day = today
+            self.daily_pnl = 0.0
+
+    def _prune_orders(self, now: float):
+        while len(self._order_times) > 0 and self._order_times[0] <= now - 60:
+            self._order_times.popleft()
+
+    def status(self) -> typing.Dict:
+        with self._lock:
+            return {"limits": dict(vars(self.limits)), "account_exposure": self.account_exposure,
+                    "symbol_exposure": dict(self.symbol_exposure), "strategy_exposure": dict(self.strategy_exposure),
+                    "open_trades": self.open_trades, "reserved_entries": len(self._reservations),
+                    "daily_pnl": self.daily_pnl}
+
+    def _add_exposure(self, strategy: str, symbol: str, notional: float, trades: int):
+        self.symbol_exposure[symbol] += notional
+        self.strategy_exposure[strategy] += notional
+        self.account_exposure += notional
+        self.open_trades += trades
+
+    def check_entry(self, strategy: str, symbol: str, notional: float,
+                    count_order: bool = True) -> typing.Tuple[typing.Optional[str], str]:
+        # Returns a reservation id, or None and the reason of the rejection. The exposure and the open trade are
+        # reserved under the same lock as the checks, so entries checked at the same time cannot exceed the limits
+        # together. The reservation is then confirmed with the trade or released if nothing filled.
+        # count_order: False when the orders are counted one by one as they are sent, see record_order.
+        limits = self.limits
+        now = time.monotonic()
+
+        with self._lock:
+            self._roll_day()
+
+            if limits.max_daily_loss is not None and self.daily_pnl <= -limits.max_daily_loss:
+                return None, f"daily loss limit reached ({self.daily_pnl:.2f})"
+
+            if limits.max_open_trades is not None and self.open_trades >= limits.max_open_trades:
+                return None, f"max open trades reached ({self.open_trades})"
+
+            if limits.max_symbol_notional is not None \
+                    and self.symbol_exposure[symbol] + notional > limits.max_symbol_notional:
+                return None, f"{symbol} exposure limit reached ({self.symbol_exposure[symbol]:.2f})"
+
+            if limits.max_strategy_notional is not None \
+                    and self.strategy_exposure[strategy] + notional > limits.max_strategy_notional:
+                return None, f"{strategy} exposure limit reached ({self.strategy_exposure[strategy]:.2f})"
+
+            if limits.max_account_notional is not None \
+                    and self.account_exposure + notional > limits.max_account_notional:
+                return None, f"account exposure limit reached ({self.account_exposure:.2f})"
+
+            self._prune_orders(now)
+
+            if limits.max_orders_per_minute is not None and len(self._order_times) >= limits.max_orders_per_minute:
+                return None, f"order rate limit reached ({len(self._order_times)} orders in the last minute)"
+
+            if count_order:
+                self._order_times.append(now)
+
+            reservation_id = uuid.uuid4().hex
+            self._reservations[reservation_id] = (strategy, symbol, notional)
+            self._add_exposure(strategy, symbol, notional, 1)
+
+        return reservation_id, ""
+
+    def confirm_entry(self, reservation_id: str, trade_id: str, notional: float):
+        # The trade replaces the reservation, with the notional that actually filled
+        with self._lock:
+            reservation = self._reservations.pop(reservation_id, None)
+
+            if reservation is None:
+                return
+
+            strategy, symbol, reserved = reservation
+            self._trades[trade_id] = (strategy, symbol, notional)
+            self._add_exposure(strategy, symbol, notional - reserved, 0)
+
+    def release_entry(self, reservation_id: str):
+        with self._lock:
+            reservation = self._reservations.pop(reservation_id, None)
+
+            if reservation is None:
+                return
+
+            strategy, symbol, reserved = reservation
+            self._add_exposure(strategy, symbol, -reserved, -1)
+
+    def record_order(self):
+        # Exits and the child orders of executions are never blocked, they only count towards the order rate
+        now = time.monotonic()
+
+        with self._lock:
+            self._prune_orders(now)
+            self._order_times.append(now)
+
+    def on_trade_opened(self, trade_id: str, strategy: str, symbol: str, notional: float):
+        with self._lock:
+            if trade_id in self._trades:
+                return
+
+            self._trades[trade_id] = (strategy, symbol, notional)
+            self._add_exposure(strategy, symbol, notional, 1)
+
+    def on_trade_closed(self, trade_id: str, pnl: float):
+        with self._lock:
+            if trade_id not in self._trades:
+                return
+
+            strategy, symbol, notional = self._trades.pop(trade_id)
+            self._add_exposure(strategy, symbol, -notional, -1)
+
+            self._roll_day()
+            self.daily_pnl += pnl
@@ -0,0 +1,110 @@
+import bisect
+import collections
+import math
+import typing
+
+
+class RollingMax:
+    def __init__(self, window: int):
+        self.window = window
+        self._count = 0
+        # (index, value) with decreasing values, the maximum of the window is always the first element.
+        # Every value enters and leaves the deque once, so an update is O(1) amortized.
+        self._deque: typing.Deque[typing.Tuple[int, float]] = collections.deque()
+
+    def _dominates(self, kept: float, new: float) -> bool:
+        return kept > new
+
+    def update(self, value: float):
+        while len(self._deque) > 0 and not self._dominates(self._deque[-1][1], value):
+            self._deque.pop()
+
+        self._deque.append((self._count, value))
+        self._count += 1
+
+        if self._deque[0][0] <= self._count - 1 - self.window:
+            self._deque.popleft()
+
+    def value(self) -> typing.Optional[float]:
+        if len(self._deque) == 0:
+            return None
+
+        return self._deque[0][1]
+
+    def __len__(self) -> int:
+        return min(self._count, self.window)
+
+
+class RollingMin(RollingMax):
+    def _dominates(self, kept: float, new: float) -> bool:
+        return kept < new
+
+
+class RollingStats:
+    def __init__(self, window: int):
+        self.window = window
+        self._values: typing.Deque[float] = collections.deque()
+
+        # Welford's running mean and sum of squared deviations, with the value leaving the window removed,
+        # avoids the cancellation of the naive sum of squares on large prices
+        self.sum = 0.0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, value: float):
+        self._values.append(value)
+        self.sum += value
+
+        count = len(self._values)
+        delta = value - self.mean
+        self.mean += delta / count
+        self._m2 += delta * (value - self.mean)
+
+        if count > self.window:
+            old = self._values.popleft()
+            self.sum -= old
+
+            count -= 1
+            delta = old - self.mean
+            self.mean -= delta / count
+            self._m2 -= delta * (old - self.mean)
+
+    def variance(self) -> float:
+        # Sample variance of the window
+        if len(self._values) < 2:
+            return 0.0
+
+        return max(self._m2, 0.0) / (len(self._values) - 1)
+
+    def std(self) -> float:
+        return math.sqrt(self.variance())
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+class RollingPercentile:
+    def __init__(self, window: int):
+        self.window = window
+        self._values: typing.Deque[float] = collections.deque()
+        self._sorted: typing.List[float] = []
+
+    def update(self, value: float):
+        self._values.append(value)
+        bisect.insort(self._sorted, value)
+
+        if len(self._values) > self.window:
+            old = self._values.popleft()
+            del self._sorted[bisect.bisect_left(self._sorted, old)]
+
+    def percentile(self, pct: float) -> typing.Optional[float]:
+        # Nearest-rank percentile, pct between 0 and 100
+        if len(self._sorted) == 0:
+            return None
+
+        rank = max(math.ceil(pct / 100 * len(self._sorted)) - 1, 0)
+
+        return self._sorted[rank]
+
+    def __len__(self) -> int:
+        return len(self._values)
@@ -0,0 +1,204 @@
+import logging
+import threading
+import typing
+import warnings
+
+import numpy as np
+
+from models import *
+
+if typing.TYPE_CHECKING:
+    from connectors.binance_futures import BinanceFuturesClient
+
+logger = logging.getLogger()
+
+
+class ScanSignal:
+    def __init__(self, symbol: str, kind: str, direction: int, score: float, close: float):
+        self.symbol = symbol
+        self.kind = kind
+        self.direction = direction
+        self.score = score
+        self.close = close
+
+
+class MarketScanner:
+    def __init__(self, symbols: typing.List[str], timeframe: str, window: int = 1000, ema_fast: int = 12,
+                 ema_slow: int = 26, ema_signal: int = 9, rsi_length: int = 14, breakout_lookback: int = 20,
+                 min_volume: float = 0):
+        self.symbols = list(symbols)
+        self.tf = timeframe
+        self._index = {symbol: idx for idx, symbol in enumerate(self.symbols)}
+
+        self._ema_fast = ema_fast
+        self._ema_slow = ema_slow
+        self._ema_signal = ema_signal
+        self._rsi_length = rsi_length
+        self._breakout_lookback = breakout_lookback
+        self._min_volume = min_volume
+
+        # symbol x time, the most recent closed bar is the last column
+        shape = (len(self.symbols), window)
+        self.opens = np.full(shape, np.nan)
+        self.highs = np.full(shape, np.nan)
+        self.lows = np.full(shape, np.nan)
+        self.closes = np.full(shape, np.nan)
+        self.volumes = np.full(shape, np.nan)
+
+        # Indicator state is carried from bar to bar, so each bar costs one vector update per indicator
+        nb_symbols = len(self.symbols)
+        self._fast = np.full(nb_symbols, np.nan)
+        self._slow = np.full(nb_symbols, np.nan)
+        self._signal = np.full(nb_symbols, np.nan)
+        self._avg_gain = np.full(nb_symbols, np.nan)
+        self._avg_loss = np.full(nb_symbols, np.nan)
+        self._prev_close = np.full(nb_symbols, np.nan)
+
+        self.macd = np.full(nb_symbols, np.nan)
+        self.macd_signal = np.full(nb_symbols, np.nan)
+        self.rsi = np.full(nb_symbols, np.nan)
+
+        self._pending_ts: typing.Optional[int] = None
+        self._last_closed_ts = -1
+        self._pending = np.full((5, nb_symbols), np.nan)
+        self._pending_count = 0
+        self._lock = threading.Lock()
+
+        self.last_signals: typing.List[ScanSignal] = []
+
+    @staticmethod
+    def _ema_step(state: np.ndarray, values: np.ndarray, alpha: float) -> np.ndarray:
+        return np.where(np.isnan(state), values, state + alpha * (values - state))
+
+    def _update_indicators(self, closes: np.ndarray):
+        valid = ~np.isnan(closes)
+
+        fast = self._ema_step(self._fast, closes, 2 / (self._ema_fast + 1))
+        slow = self._ema_step(self._slow, closes, 2 / (self._ema_slow + 1))
+        self._fast = np.where(valid, fast, self._fast)
+        self._slow = np.where(valid, slow, self._slow)
+
+        macd = self._fast - self._slow
+        signal = self._ema_step(self._signal, macd, 2 / (self._ema_signal + 1))
+        self._signal = np.where(valid, signal, self._signal)
+
+        delta = closes - self._prev_close
+        has_delta = valid & ~np.isnan(delta)
+        gain = np.where(has_delta, np.maximum(delta, 0), np.nan)
+        loss = np.where(has_delta, np.maximum(-delta, 0), np.nan)
+
+        alpha = 1 / self._rsi_length
+        self._avg_gain = np.where(has_delta, self._ema_step(self._avg_gain, gain, alpha), self._avg_gain)
+        self._avg_loss = np.where(has_delta, self._ema_step(self._avg_loss, loss, alpha), self._avg_loss)
+        self._prev_close = np.where(valid, closes, self._prev_close)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = self._avg_gain / self._avg_loss
+            self.rsi = np.where(self._avg_loss == 0, 100.0, 100 - 100 / (1 + rs))
+
+        self.macd = macd
+        self.macd_signal = self._signal
+
+    def load_history(self, symbol: str, candles: typing.List[Candle]):
+        idx = self._index[symbol]
+        candles = candles[-self.closes.shape[1]:]
+        start = self.closes.shape[1] - len(candles)
+
+        for name, matrix in (("open", self.opens), ("high", self.highs), ("low", self.lows),
+                             ("close", self.closes), ("volume", self.volumes)):
+            matrix[idx, start:] = [getattr(candle, name) for candle in candles]
+
+    def warm_up(self):
+        # Replays the loaded history column by column: one vectorized step per bar for the whole universe
+        for col in range(self.closes.shape[1]):
+            self._update_indicators(self.closes[:, col])
+
+    def on_kline(self, symbol: str, open_time: int, open_price: float, high: float, low: float, close: float,
+                 volume: float) -> typing.Optional[typing.List[ScanSignal]]:
+        if symbol not in self._index or open_time <= self._last_closed_ts:
+            return None
+
+        signals = None
+
+        with self._lock:
+            if self._pending_ts is not None and open_time > self._pending_ts:
+                signals = self._close_bar()
+
+            if self._pending_ts is None or open_time > self._pending_ts:
+                self._pending_ts = open_time
+
+            if open_time == self._pending_ts:
+                idx = self._index[symbol]
+                if np.isnan(self._pending[3, idx]):
+                    self._pending_count += 1
+                self._pending[:, idx] = (open_price, high, low, close, volume)
+
+            # The bar is complete as soon as every symbol reported, no need to wait for the next one
+            if self._pending_count == len(self.symbols):
+                signals = self._close_bar()
+
+        return signals
+
+    def _close_bar(self) -> typing.List[ScanSignal]:
+        pending = self._pending
+
+        # Symbols without a trade during the bar keep their previous close
+        missing = np.isnan(pending[3])
+        last_close = self.closes[:, -1]
+        for row in range(4):
+            pending[row] = np.where(missing, last_close, pending[row])
+        pending[4] = np.where(missing, 0, pending[4])
+
+        for row, matrix in enumerate((self.opens, self.highs, self.lows, self.closes, self.volumes)):
+            matrix[:, :-1] = matrix[:, 1:]
+            matrix[:, -1] = pending[row]
+
+        self._update_indicators(self.closes[:, -1])
+
+        self._pending = np.full(pending.shape, np.nan)
+        self._pending_count = 0
+        self._last_closed_ts = self._pending_ts
+        self._pending_ts = None
+
+        self.last_signals = self.scan()
+
+        return self.last_signals
+
+    def scan(self) -> typing.List[ScanSignal]:
+        closes = self.closes[:, -1]
+
+        technical = np.zeros(len(self.symbols), dtype=int)
+        technical[(self.rsi < 30) & (self.macd > self.macd_signal)] = 1
+        technical[(self.rsi > 70) & (self.macd < self.macd_signal)] = -1
+        technical_score = np.where(technical == 1, 30 - self.rsi, self.rsi - 70)
+
+        lookback = slice(-self._breakout_lookback - 1, -1)
+        with warnings.catch_warnings():
+            # Symbols without history yet are all-NaN rows
+            warnings.simplefilter("ignore", RuntimeWarning)
+            prev_high = np.nanmax(self.highs[:, lookback], axis=1)
+            prev_low = np.nanmin(self.lows[:, lookback], axis=1)
+
+        volume_ok = self.volumes[:, -1] > self._min_volume
+        breakout = np.zeros(len(self.symbols), dtype=int)
+        breakout[(closes > prev_high) & volume_ok] = 1
+        breakout[(closes < prev_low) & volume_ok] = -1
+        breakout_score = np.where(breakout == 1, closes / prev_high - 1, prev_low / closes - 1) * 100
+
+        signals = []
+
+        for kind, directions, scores in (("technical", technical, technical_score),
+                                         ("breakout", breakout, breakout_score)):
+            for idx in np.flatnonzero(directions):
+                signals.append(ScanSignal(self.symbols[idx], kind, int(directions[idx]), float(scores[idx]),
+                                          float(closes[idx])))
+
+        signals.sort(key=lambda s: s.score, reverse=True)
+
+        return signals
+
+    def load(self, client: "BinanceFuturesClient"):
+        for symbol in self.symbols:
+            self.load_history(symbol, client.get_historical_candles(client.contracts[symbol], self.tf))
+
+        self.warm_up()
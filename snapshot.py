@@ -0,0 +1,117 @@
+import array
+import logging
+import os
+import pickle
+import time
+import typing
+import zlib
+
+from models import *
+
+if typing.TYPE_CHECKING:
+    from connectors.binance_futures import BinanceFuturesClient
+    from strategies import Strategy
+
+logger = logging.getLogger()
+
+SNAPSHOT_VERSION = 2
+SNAPSHOT_INTERVAL = 60
+CONTRACTS_MAX_AGE = 24 * 3600 * 1000
+
+CANDLE_FIELDS = ("timestamp", "open", "high", "low", "close", "volume")
+
+
+def _pack_candles(candles: typing.List[Candle]) -> bytes:
+    values = array.array("d")
+
+    for candle in candles:
+        values.extend((candle.timestamp, candle.open, candle.high, candle.low, candle.close, candle.volume))
+
+    return values.tobytes()
+
+
+def _unpack_candles(data: bytes, timeframe: str) -> typing.List[Candle]:
+    values = array.array("d")
+    values.frombytes(data)
+
+    candles = []
+    width = len(CANDLE_FIELDS)
+
+    for i in range(0, len(values), width):
+        candle_info = {"ts": int(values[i]), "open": values[i + 1], "high": values[i + 2], "low": values[i + 3],
+                       "close": values[i + 4], "volume": values[i + 5]}
+        candles.append(Candle(candle_info, timeframe, "parse_trade"))
+
+    return candles
+
+
+def _strategy_key(strat: "Strategy") -> typing.Tuple[str, str, str]:
+    return strat.strat_name, strat.contract.symbol, strat.tf
+
+
+class StateSnapshot:
+    def __init__(self, timestamp: int, contracts: typing.Dict[str, Contract],
+                 strategies: typing.Dict[typing.Tuple[str, str, str], typing.Dict]):
+        self.timestamp = timestamp
+        self.contracts = contracts
+        self.strategies = strategies
+
+    @classmethod
+    def capture(cls, client: "BinanceFuturesClient") -> "StateSnapshot":
+        strategies = dict()
+
+        for b_index, strat in list(client.strategies.items()):
+            open_trades = [trade for trade in strat.trades if trade.status == "open"]
+
+            strategies[_strategy_key(strat)] = {
+                "candles": _pack_candles(list(strat.candles)),
+                "trades": open_trades,
+                "state": strat.snapshot_state(),
+            }
+
+        return cls(int(time.time() * 1000), client.contracts, strategies)
+
+    def save(self, path: str):
+        payload = {"version": SNAPSHOT_VERSION, "timestamp": self.timestamp, "contracts": self.contracts,
+                   "strategies": self.strategies}
+        data = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+
+        # Written next to the target then renamed, so a crash mid-write never leaves a truncated snapshot
+        tmp_path = path + ".tmp"
+
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> typing.Optional["StateSnapshot"]:
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                payload = pickle.loads(zlib.decompress(f.read()))
+        except Exception as e:
+            logger.error("Error while loading state snapshot %s: %s", path, e)
+            return None
+
+        if payload.get("version") != SNAPSHOT_VERSION:
+            logger.warning("Ignoring state snapshot %s with version %s", path, payload.get("version"))
+            return None
+
+        return cls(payload["timestamp"], payload["contracts"], payload["strategies"])
+
+    def contracts_fresh(self) -> bool:
+        return int(time.time() * 1000) - self.timestamp < CONTRACTS_MAX_AGE
+
+    def strategy_state(self, strat: "Strategy") -> typing.Optional[typing.Dict]:
+        state = self.strategies.get(_strategy_key(strat))
+
+        if state is None:
+            return None
+
+        return {"candles": _unpack_candles(state["candles"], strat.tf), "trades": state["trades"],
+                "state": state["state"]}
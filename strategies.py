@@ -1,11 +1,14 @@
+import copy
+import importlib
 import logging
 import time
 from typing import *
-from threading import Timer
-
-import pandas as pd
+from threading import RLock, Thread
 
 from models import *
+from execution import DONE_STATUSES, EXECUTION_ALGOS, Execution
+from log_buffer import RingLog
+from rolling import RollingMax, RollingMin, RollingPercentile
 
 if TYPE_CHECKING:
     from connectors.binance_futures import BinanceFuturesClient
@@ -15,9 +18,50 @@ logger = logging.getLogger()
 TF_EQUIV = {'1m': 60, '5m': 300, '15m': 900, '30m': 1800, '1h': 3600, '4h': 14400}
 
 
+class StrategyParam:
+    def __init__(self, code_name: str, name: str, data_type: type, default: Any = None):
+        self.code_name = code_name
+        self.name = name
+        self.data_type = data_type
+        # Parameters without a default are required
+        self.default = default
+
+
+# How entries are sent, common to every strategy. Exits stay market orders.
+EXECUTION_PARAMETERS = [
+    StrategyParam("execution", "Execution (market, twap, iceberg, post_only)", str, "market"),
+    StrategyParam("execution_duration", "Execution Duration (s)", float, 60),
+    StrategyParam("execution_slices", "TWAP Slices", int, 5),
+    StrategyParam("iceberg_clip_pct", "Iceberg Clip %", float, 20),
+]
+
+STRATEGY_REGISTRY: Dict[str, Type["Strategy"]] = dict()
+
+
+def register_strategy(cls: Type["Strategy"]) -> Type["Strategy"]:
+    cls.parameters = cls.parameters + [param for param in EXECUTION_PARAMETERS if param not in cls.parameters]
+    STRATEGY_REGISTRY[cls.name] = cls
+    return cls
+
+
+def load_strategy_plugins(module_names: List[str]):
+    # Plugin modules register their strategies with @register_strategy when they are imported
+    for module_name in module_names:
+        importlib.import_module(module_name)
+
+
 class Strategy:
+    name = ""
+    parameters: List[StrategyParam] = []
+    # Indicator name -> parameters passed to it, computed through the client's shared indicator cache
+    indicators: Dict[str, Tuple[str, ...]] = dict()
+    timeframes: List[str] = list(TF_EQUIV)
+    # "tick": called on every trade, "bar": called only when a new candle starts
+    events: Tuple[str, ...] = ("tick",)
+
     def __init__(self, client: "BinanceFuturesClient", contract: Contract, exchange: str, timeframe: str,
-                 balance_pct: float, take_profit: float, stop_loss: float, strat_name: str):
+                 balance_pct: float, take_profit: float, stop_loss: float, other_params: Dict):
+        strat_name = self.name
 
         self.client = client
         self.contract = contract
@@ -29,17 +73,185 @@ class Strategy:
         self.stop_loss = stop_loss
         self.is_open_position = False
         self.strat_name = strat_name
+        self.params = {param.code_name: param.default for param in self.parameters}
+        self.params.update({key: value for key, value in other_params.items() if value is not None})
+        self.risk_key = f"{strat_name}_{contract.symbol}_{timeframe}"
 
         self.candles: List[Candle] = []
         self.trades: List[Trade] = []
-        self.logs = []
+        self.logs = RingLog()
+        self.late_trades = 0
+
+        # Trades arrive on the websocket thread and bar closes on the bar clock thread
+        self._lock = RLock()
+
+    @classmethod
+    def check_config(cls, timeframe: str, other_params: Dict) -> Optional[str]:
+        if timeframe not in cls.timeframes:
+            return f"{cls.name} strategy does not support the {timeframe} timeframe"
+
+        for param in cls.parameters:
+            if other_params.get(param.code_name) is None and param.default is None:
+                return f"Missing {param.code_name} parameter"
+
+        if other_params.get("execution") not in (None, "") and other_params["execution"] not in EXECUTION_ALGOS:
+            return f"Unknown execution algo {other_params['execution']}"
+
+        return None
+
+    def wants(self, tick_type: str) -> bool:
+        return "tick" in self.events or (tick_type == "new_candle" and "bar" in self.events)
+
+    def indicator(self, name: str):
+        params = tuple(self.params[code_name] for code_name in self.indicators[name])
+        return self.client.indicators.get(self.contract.symbol, self.tf, self.candles, name, params)
 
     def _add_logs(self, msg: str):
         logger.info("%s", msg)
-        self.logs.append({"log": msg, "displayed": False})
+        self.logs.append(msg)
+
+    def _publish_trade(self, trade: Trade):
+        self.client.ui_events.push_latest("trade", trade.trade_id, trade)
+        self.client.journal.record_trade(trade, self.tf)
+
+    def start(self, b_index: int) -> bool:
+        saved = None
+
+        if self.client.snapshot is not None:
+            saved = self.client.snapshot.strategy_state(self)
+
+        if saved is not None and len(saved['candles']) > 0:
+            self.candles = saved['candles']
+            self._sync_candles()
+            self.restore_state(saved['state'])
+        else:
+            self.candles = self.client.get_historical_candles(self.contract, self.tf)
+
+        if len(self.candles) == 0:
+            logger.warning("No historical data retrived for %s", self.contract.symbol)
+            return False
+
+        if self.exchange == "Binance":
+            # Before the trades are restored, their PnL is tracked from the start
+            self.client.subscribe_mark_price(self.contract)
+
+        self.restore_open_trades(saved['trades'] if saved is not None else None)
+        self._reconcile_pending_entries()
+
+        if self.exchange == "Binance":
+            self.client.subscribe_channel([self.contract], "aggTrade")
+            self.client.subscribe_order_book(self.contract)
+
+        self.client.strategies[b_index] = self
+
+        return True
+
+    def stop(self, b_index: int):
+        del self.client.strategies[b_index]
+
+    def _sync_candles(self):
+        # Only the candles after the last saved one are downloaded, the last saved candle may have been incomplete
+        last_ts = self.candles[-1].timestamp
+        new_candles = self.client.get_historical_candles(self.contract, self.tf, start_time=last_ts)
+
+        if len(new_candles) == 0:
+            # Failed request: the saved candles are kept rather than losing the last one
+            logger.warning("No candles retrieved to update %s %s, keeping the %s saved ones", self.contract.symbol,
+                           self.tf, len(self.candles))
+            return
+
+        if len(new_candles) >= 1000:
+            latest = self.client.get_historical_candles(self.contract, self.tf)
+            if len(latest) > 0:
+                self.candles = latest
+            return
+
+        self.candles = [candle for candle in self.candles if candle.timestamp < last_ts] + new_candles
+
+    def backfill(self):
+        # After a websocket outage: the candles built from the missed trades are downloaded again
+        with self._lock:
+            self._sync_candles()
+
+    def snapshot_state(self) -> Dict:
+        # Strategy state pickled with the snapshot, called from the snapshot thread.
+        # Indicators recomputed from the candles, like those of the Technical strategy, need none.
+        return dict()
+
+    def restore_state(self, state: Dict):
+        pass
+
+    def _resume_trade(self, trade: Trade):
+        self.trades.append(trade)
+        self.is_open_position = True
+
+        entry_price = trade.entry_prize if trade.entry_prize is not None else self.candles[-1].close
+        self.client.risk.on_trade_opened(trade.trade_id, self.risk_key, self.contract.symbol,
+                                         trade.quantity * entry_price)
+
+        self._add_logs(f"Recovered open {trade.side} trade on {self.contract.symbol} {self.tf}")
+        self.client.ui_events.push_latest("trade", trade.trade_id, trade)
+
+        if trade.entry_prize is None:
+            self._check_order_status(trade.entry_id)
+        else:
+            self.client.pnl.open_trade(trade, self.risk_key)
+
+    def restore_open_trades(self, saved_trades: Optional[List[Trade]] = None):
+        journal_ids = set()
+
+        for row in self.client.journal.get_open_trades(self.strat_name, self.contract.symbol, self.tf):
+            journal_ids.add(row['trade_id'])
+            self._resume_trade(Trade({"trade_id": row['trade_id'], "time": row['time'], 'contract': self.contract,
+                                      'strategy': self.strat_name, 'side': row['side'],
+                                      'entry_prize': row['entry_price'], 'status': row['status'], 'pnl': row['pnl'],
+                                      'quantity': row['quantity'], 'entry_id': row['entry_id']}))
+
+        # The journal is authoritative, a snapshot trade is only used if its journal write never reached the disk
+        for trade in saved_trades or []:
+            if trade.trade_id not in journal_ids and not self.client.journal.has_trade(trade.trade_id):
+                trade.contract = self.contract
+                self._resume_trade(trade)
+                self._publish_trade(trade)
+
+    def _reconcile_pending_entries(self):
+        # Entry orders sent before the restart whose fill was never seen are checked against the exchange
+        for trade in [trade for trade in self.trades if trade.entry_prize is None and trade.entry_id is not None]:
+            order_status = self.client.get_order_status(self.contract, trade.entry_id)
+
+            if order_status is None or not self._on_entry_status(trade.entry_id, order_status):
+                self._check_order_status(trade.entry_id)
+
+    def on_trade(self, price: float, size: float, timestamp: int):
+        with self._lock:
+            res = self.parse_trades(price, size, timestamp)
+
+            if res != "late_trade" and self.wants(res):
+                self.check_trade(res)
+
+    def on_bar_close(self, timestamp: int):
+        # Called by the bar clock at the timeframe boundary, timestamp is the open time of the new candle
+        with self._lock:
+            last_candle = self.candles[-1]
+
+            if last_candle.timestamp >= timestamp:
+                # The first trade of the new period arrived before the clock and already opened the candle
+                return
+
+            while last_candle.timestamp < timestamp:
+                canlde_info = {"ts": last_candle.timestamp + self.tf_equiv, "open": last_candle.close,
+                               "high": last_candle.close, "low": last_candle.close, "close": last_candle.close,
+                               "volume": 0}
+                last_candle = Candle(canlde_info, self.tf, "parse_trade")
+                self.candles.append(last_candle)
+
+            logger.info(f"{self.exchange}: New candle for {self.contract.symbol} {self.tf}")
+
+            if self.wants("new_candle"):
+                self.check_trade("new_candle")
 
     def parse_trades(self, price: float, size: float, timestamp: int) -> str:
-        timestamp_diff = int(time.time() * 1000) - timestamp
+        timestamp_diff = self.client.time_sync.now_ms() - timestamp
 
         if timestamp_diff >= 2000:
             logger.warning("%s %s: %s milliseconds of difference between the current time and the trade time",
@@ -47,8 +259,36 @@ class Strategy:
 
         last_candle = self.candles[-1]
 
-        if timestamp < last_candle.timestamp + self.tf_equiv:
+        if timestamp < last_candle.timestamp:
+            # LATE TRADE: belongs to a candle the bar clock already closed
+            self.late_trades += 1
+
+            if len(self.candles) >= 2 and timestamp >= self.candles[-2].timestamp:
+                closed_candle = self.candles[-2]
+
+                if closed_candle.volume == 0:
+                    closed_candle.open = price
+                    closed_candle.high = price
+                    closed_candle.low = price
+
+                closed_candle.close = price
+                closed_candle.volume += size
+                closed_candle.high = max(closed_candle.high, price)
+                closed_candle.low = min(closed_candle.low, price)
+
+            logger.debug("%s %s: late trade for the candle closed at %s", self.exchange, self.contract.symbol,
+                         last_candle.timestamp)
+
+            return "late_trade"
+
+        elif timestamp < last_candle.timestamp + self.tf_equiv:
             # SAME CANDLE
+            if last_candle.volume == 0:
+                # Candle opened by the bar clock, its prices were placeholders until the first trade
+                last_candle.open = price
+                last_candle.high = price
+                last_candle.low = price
+
             last_candle.close = price
             last_candle.volume += size
 
@@ -100,35 +340,78 @@ class Strategy:
             return "new_candle"
 
     def _check_order_status(self, order_id: int):
-        order_status = self.client.get_order_status(self.contract, order_id)
+        # One thread per pending order polls until the fill, instead of a new Timer thread every poll
+        t = Thread(target=self._poll_order_status, args=(order_id,), name="order-status", daemon=True)
+        t.start()
 
-        if order_status is not None:
-            logger.info("%s order status: %s", self.exchange, order_status.status)
+    def _poll_order_status(self, order_id: int):
+        while True:
+            order_status = self.client.get_order_status(self.contract, order_id)
 
-            if order_status.status == "filled":
-                for trade in self.trades:
-                    if trade.entry_id == order_id:
-                        trade.entry_prize = order_status.avg_price
-                        break
-                return
+            if order_status is not None:
+                logger.info("%s order status: %s", self.exchange, order_status.status)
 
-        t = Timer(2.0, lambda: self._check_order_status(order_id))
-        t.start()
+                if self._on_entry_status(order_id, order_status):
+                    return
+
+            time.sleep(2.0)
+
+    def _on_entry_status(self, order_id: int, order_status: OrderStatus) -> bool:
+        # Returns True once the entry order is done
+        trade = next((trade for trade in self.trades if trade.entry_id == order_id), None)
+
+        if order_status.status == "filled":
+            if trade is not None:
+                trade.entry_prize = order_status.avg_price
+                self.client.pnl.open_trade(trade, self.risk_key)
+                self._publish_trade(trade)
+            return True
+
+        if order_status.status not in DONE_STATUSES:
+            return False
+
+        # Canceled, expired or rejected: the order will never fill, its trade is dropped
+        self._add_logs(f"Entry order {order_id} on {self.contract.symbol} {order_status.status}")
+
+        if trade is not None and trade.status == "open":
+            trade.status = "closed"
+            self.client.risk.on_trade_closed(trade.trade_id, 0)
+            self.is_open_position = False
+            self._publish_trade(trade)
+
+        return True
 
     def _open_position(self, signal_result: int):
-        trazde_size = self.client.get_trade_size(self.contract, self.candles[-1].close, self.balance_pct)
+        order_side = "buy" if signal_result == 1 else "sell"
 
-        if trazde_size is None:
+        trazde_size = self.client.get_trade_size(self.contract, self.candles[-1].close, self.balance_pct, order_side)
+
+        if trazde_size is None or trazde_size == 0:
             return
 
-        order_side = "buy" if signal_result == 1 else "sell"
         position_side = "long" if signal_result == 1 else "short"
 
         self._add_logs(f"{position_side} signal on {self.contract.symbol} {self.tf}")
 
+        notional = trazde_size * self.candles[-1].close
+        # Executions count their child orders as they send them
+        use_execution = self.params['execution'] not in ("market", "")
+        reservation_id, risk_reason = self.client.risk.check_entry(self.risk_key, self.contract.symbol, notional,
+                                                                   count_order=not use_execution)
+
+        if reservation_id is None:
+            self._add_logs(f"{position_side} signal on {self.contract.symbol} {self.tf} rejected: {risk_reason}")
+            return
+
+        if use_execution:
+            self._execute_entry(position_side, order_side, trazde_size, reservation_id)
+            return
+
         order_status = self.client.place_order(self.contract, "MARKET", trazde_size, order_side)
 
-        if order_status is not None:
+        if order_status is None:
+            self.client.risk.release_entry(reservation_id)
+        else:
             self._add_logs(f"{order_side.capitalize()} order placed on {self.exchange} | Status: {order_status.status}")
 
             self.is_open_position = True
@@ -137,14 +420,50 @@ class Strategy:
 
             if order_status.status == 'filled':
                 avg_fill_price = order_status.avg_price
-            else:
-                t = Timer(2.0, lambda: self._check_order_status(order_status.order_id))
-                t.start()
 
-            new_trade = Trade({"time": int(time.time() * 1000), 'contract': self.contract,
+            new_trade = Trade({"time": self.client.time_sync.now_ms(), 'contract': self.contract,
                                'strategy': self.strat_name, 'side': position_side, 'entry_prize': avg_fill_price,
                                'status': "open", 'pnl': 0, 'quantity': trazde_size, 'entry_id': order_status.order_id})
             self.trades.append(new_trade)
+            self.client.risk.confirm_entry(reservation_id, new_trade.trade_id, notional)
+            self.client.pnl.open_trade(new_trade, self.risk_key)
+            self._publish_trade(new_trade)
+
+            # Polled once the trade exists, an immediate fill must find it to set its entry price
+            if avg_fill_price is None:
+                self._check_order_status(order_status.order_id)
+
+    def _execute_entry(self, position_side: str, order_side: str, quantity: float, reservation_id: str):
+        # No new signal is taken while the execution is working, the trade is created with what actually filled
+        self.is_open_position = True
+
+        self.client.execution.submit(self.contract, order_side, quantity, self.params['execution'],
+                                     lambda execution: self._on_entry_executed(execution, position_side,
+                                                                               reservation_id),
+                                     duration=self.params['execution_duration'],
+                                     slices=self.params['execution_slices'], clip_pct=self.params['iceberg_clip_pct'])
+
+        self._add_logs(f"{self.params['execution']} {order_side} execution started on {self.contract.symbol} {self.tf}")
+
+    def _on_entry_executed(self, execution: Execution, position_side: str, reservation_id: str):
+        if execution.filled_qty == 0:
+            self._add_logs(f"{execution.algo} execution on {self.contract.symbol} {self.tf} did not fill "
+                           f"({execution.status})")
+            self.client.risk.release_entry(reservation_id)
+            self.is_open_position = False
+            return
+
+        self._add_logs(f"{execution.algo} execution on {self.contract.symbol} {self.tf} filled {execution.filled_qty} "
+                       f"at {execution.avg_price:.{self.contract.price_decimals}f} "
+                       f"(slippage {execution.slippage_bps or 0:.1f} bps)")
+
+        new_trade = Trade({"time": execution.start_ms, 'contract': self.contract, 'strategy': self.strat_name,
+                           'side': position_side, 'entry_prize': execution.avg_price, 'status': "open", 'pnl': 0,
+                           'quantity': execution.filled_qty, 'entry_id': None})
+        self.trades.append(new_trade)
+        self.client.risk.confirm_entry(reservation_id, new_trade.trade_id, execution.filled_qty * execution.avg_price)
+        self.client.pnl.open_trade(new_trade, self.risk_key)
+        self._publish_trade(new_trade)
 
     def _check_tp_sl(self, trade: Trade):
         tp_triggered = False
@@ -173,6 +492,7 @@ class Strategy:
 
             order_side = "SELL" if trade.side == 'long' else 'BUY'
 
+            self.client.risk.record_order()
             order_status = self.client.place_order(self.contract, 'MARKET', trade.quantity, order_side)
 
             if order_status is not None:
@@ -180,61 +500,41 @@ class Strategy:
                 trade.status = 'closed'
                 self.is_open_position = False
 
-class TechnicalStrategy(Strategy):
-    def __init__(self, client, contract: Contract, exchange: str, timeframe: str, balance_pct: float,
-                 take_profit: float, stop_loss: float, other_params: Dict):
-        super().__init__(client, contract, exchange, timeframe, balance_pct, take_profit, stop_loss, "Technical")
-
-        self._ema_fast = other_params['ema_fast']
-        self._ema_slow = other_params['ema_slow']
-        self._ema_signal = other_params['ema_signal']
-
-        self._rsi_length = other_params['rsi_length']
-
-    def _rsi(self):
-        close_list = []
-        for candle in self.candles:
-            close_list.append(candle.close)
+                # The fill price when known, fees and funding included
+                exit_price = price
+                if order_status.status == "filled" and order_status.avg_price > 0:
+                    exit_price = order_status.avg_price
+                trade.pnl = self.client.pnl.close_trade(trade, exit_price)
 
-        closes = pd.Series(close_list)
+                self.client.risk.on_trade_closed(trade.trade_id, trade.pnl)
+                self._publish_trade(trade)
 
-        delta = closes.diff().dropna()
-
-        up, down = delta.copy(), delta.copy()
-
-        up[up < 0] = 0
-        down[down > 0] = 0
-
-        avg_gain = up.ewm(com=(self._rsi_length - 1), min_periods=self._rsi_length).mean()
-        avg_loss = down.abs().ewm(com=(self._rsi_length - 1), min_periods=self._rsi_length).mean()
-
-        rs = avg_gain / avg_loss
-
-        rsi = 100 - 100 / (1 + rs)
-        rsi = rsi.round(2)
-
-        return rsi.iloc[-2]
-
-    def _macd(self) -> Tuple[float, float]:
-
-        close_list = []
-        for candle in self.candles:
-            close_list.append(candle.close)
-
-        closes = pd.Series(close_list)
+@register_strategy
+class TechnicalStrategy(Strategy):
+    name = "Technical"
+    parameters = [
+        StrategyParam("rsi_length", "RSI Periods", int),
+        StrategyParam("ema_fast", "MACD Fast Length", int),
+        StrategyParam("ema_slow", "MACD Slow Length", int),
+        StrategyParam("ema_signal", "MACD Signal Length", int),
+    ]
+    indicators = {"rsi": ("rsi_length",), "macd": ("ema_fast", "ema_slow", "ema_signal")}
+    events = ("bar",)
 
-        ema_fast = closes.ewm(span=self._ema_fast).mean()
-        ema_slow = closes.ewm(span=self._ema_slow).mean()
+    def __init__(self, client, contract: Contract, exchange: str, timeframe: str, balance_pct: float,
+                 take_profit: float, stop_loss: float, other_params: Dict):
+        super().__init__(client, contract, exchange, timeframe, balance_pct, take_profit, stop_loss, other_params)
 
-        macd_line = ema_fast - ema_slow
-        macd_signal = macd_line.ewm(span=self._ema_signal).mean()
+        # The indicator kernels are loaded (and compiled when Numba is installed) when the strategy is created
+        # rather than at startup or on the first candle
+        from indicator_kernels import warm_up
 
-        return macd_line.iloc[-2], macd_signal.iloc[-2]
+        warm_up()
 
     def _check_signal(self):
 
-        macd_line, macd_signal = self._macd()
-        rsi = self._rsi()
+        macd_line, macd_signal = self.indicator("macd")
+        rsi = self.indicator("rsi")
 
         if rsi < 30 and macd_line > macd_signal:
             return 1
@@ -251,22 +551,86 @@ class TechnicalStrategy(Strategy):
                 self._open_position(signal_result)
 
 
+@register_strategy
 class BreakoutStrategy(Strategy):
+    name = "Breakout"
+    parameters = [
+        StrategyParam("min_volume", "Minimum Volume", float),
+        StrategyParam("lookback", "Lookback Candles", int, 1),
+        StrategyParam("volume_percentile", "Volume Percentile", float, 0),
+    ]
+
     def __init__(self, client, contract: Contract, exchange: str, timeframe: str, balance_pct: float,
                  take_profit: float, stop_loss: float, other_params: Dict):
-        super().__init__(client, contract, exchange, timeframe, balance_pct, take_profit, stop_loss, "Breakout")
+        super().__init__(client, contract, exchange, timeframe, balance_pct, take_profit, stop_loss, other_params)
+
+        self._min_volume = self.params['min_volume']
+        self._lookback = max(self.params['lookback'], 1)
+        self._volume_percentile = self.params['volume_percentile']
 
-        self._min_volume = other_params['min_volume']
+        # Highs, lows and volumes of the last closed candles, updated once per candle instead of slicing self.candles
+        self._highs = RollingMax(self._lookback)
+        self._lows = RollingMin(self._lookback)
+        self._volumes = RollingPercentile(self._lookback)
+        self._window_ts: Optional[int] = None
+
+    def _update_windows(self):
+        last_closed = len(self.candles) - 2
+
+        # Most ticks: the last closed candle is already in the windows
+        if last_closed < 0 or (self._window_ts is not None and self.candles[last_closed].timestamp <= self._window_ts):
+            return
+
+        # Walks back by index over the closed candles not yet added, usually one, several if candles were missing.
+        # Never more than the window size, older candles would be evicted right away.
+        first = last_closed
+        while first > 0 and last_closed - first + 1 < self._lookback \
+                and (self._window_ts is None or self.candles[first - 1].timestamp > self._window_ts):
+            first -= 1
+
+        for idx in range(first, last_closed + 1):
+            candle = self.candles[idx]
+            self._highs.update(candle.high)
+            self._lows.update(candle.low)
+            self._volumes.update(candle.volume)
+            self._window_ts = candle.timestamp
+
+    def snapshot_state(self) -> Dict:
+        # Copied under the lock, the snapshot is pickled on another thread while the windows keep moving
+        with self._lock:
+            return {"lookback": self._lookback, "window_ts": self._window_ts,
+                    "windows": copy.deepcopy((self._highs, self._lows, self._volumes))}
+
+    def restore_state(self, state: Dict):
+        # Windows saved with another lookback are rebuilt from the candles instead
+        if state.get("lookback") != self._lookback:
+            return
+
+        self._highs, self._lows, self._volumes = state["windows"]
+        self._window_ts = state["window_ts"]
 
     def _check_signal(self) -> int:
-        if self.candles[-1].close > self.candles[-2].high and self.candles[-1].volume > self._min_volume:
+        if len(self._highs) == 0:
+            return 0
+
+        candle = self.candles[-1]
+
+        if candle.volume <= self._min_volume:
+            return 0
+
+        if self._volume_percentile > 0 and candle.volume < self._volumes.percentile(self._volume_percentile):
+            return 0
+
+        if candle.close > self._highs.value():
             return 1
-        elif self.candles[-1].close < self.candles[-2].high and self.candles[-1].volume > self._min_volume:
+        elif candle.close < self._lows.value():
             return -1
         else:
             return 0
 
     def check_trade(self, tick_type: str):
+        self._update_windows()
+
         if not self.is_open_position:
             signal_result = self._check_signal()
 
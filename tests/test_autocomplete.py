@@ -0,0 +1,43 @@
+import types
+
+import pytest
+
+pytest.importorskip("tkinter")
+
+from interface.autocomplete_widget import SymbolIndex
+
+
+def _contract(base: str, quote: str = "USDT"):
+    return types.SimpleNamespace(symbol=base + quote, base_asset=base, quote_asset=quote)
+
+
+class CountingList(list):
+    # Counts the symbols read, to check that a search does not go through all of them
+    reads = 0
+
+    def __getitem__(self, key):
+        CountingList.reads += 1
+        return super().__getitem__(key)
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+
+def test_fuzzy_matches_are_limited_to_the_first_character():
+    index = SymbolIndex([_contract(base) for base in ("BTC", "BNB", "ETH", "ETC", "SOL", "XRP")])
+
+    assert index.search("BT")[0] == "BTCUSDT"
+    assert index.search("BCU") == ["BTCUSDT"]
+    assert "ETHUSDT" not in index.search("TH")
+
+
+def test_search_does_not_scan_every_symbol():
+    bases = [f"{chr(ord('A') + i % 26)}{i:04d}" for i in range(2000)]
+    index = SymbolIndex([_contract(base) for base in bases])
+    index._symbols = CountingList(index._symbols)
+
+    CountingList.reads = 0
+    index.search("Q9")
+
+    assert CountingList.reads < 200
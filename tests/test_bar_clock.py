@@ -0,0 +1,39 @@
+import threading
+import types
+
+from bar_clock import BarClock
+
+
+class FakeStrategy:
+    def __init__(self, symbol: str, release: threading.Event):
+        self.contract = types.SimpleNamespace(symbol=symbol)
+        self.tf = "1m"
+        self.tf_equiv = 60000
+        self.closed = threading.Event()
+        self._release = release
+
+    def on_bar_close(self, timestamp: int):
+        self.closed.set()
+        self._release.wait(30)
+
+
+def test_slow_strategy_does_not_delay_the_others():
+    release = threading.Event()
+    slow = FakeStrategy("BTCUSDT", release)
+    fast = FakeStrategy("ETHUSDT", threading.Event())
+    fast._release.set()
+
+    # The clock starts 10ms before a minute boundary
+    times = iter([59990])
+    time_sync = types.SimpleNamespace(now_ms=lambda: next(times, 60010))
+    client = types.SimpleNamespace(strategies={1: slow, 2: fast}, time_sync=time_sync)
+
+    clock = BarClock(client)
+    clock.start()
+
+    try:
+        assert slow.closed.wait(5)
+        assert fast.closed.wait(2)
+    finally:
+        release.set()
+        clock.stop()
@@ -0,0 +1,94 @@
+import pickle
+import types
+
+from models import Candle
+from strategies import BreakoutStrategy
+
+
+class NoSliceList(list):
+    # Fails the test if the strategy copies the candle list with a slice
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            raise AssertionError("candles sliced")
+        return super().__getitem__(key)
+
+
+def _candle(ts: int, high: float, low: float, volume: float = 1) -> Candle:
+    return Candle({"ts": ts, "open": low, "high": high, "low": low, "close": low, "volume": volume}, "1m",
+                  "parse_trade")
+
+
+def _strategy(lookback: int) -> BreakoutStrategy:
+    contract = types.SimpleNamespace(symbol="BTCUSDT", price_decimals=1, quantity_decimals=3)
+    return BreakoutStrategy(None, contract, "Binance", "1m", 10, 1, 1, {"min_volume": 0, "lookback": lookback})
+
+
+def test_windows_follow_closed_candles_without_slicing():
+    strategy = _strategy(3)
+    strategy.candles = NoSliceList(_candle(i * 60000, 100 + i, 50 - i) for i in range(10))
+
+    strategy._update_windows()
+    # Candles 6 to 8 are the last 3 closed ones, candle 9 is still open
+    assert strategy._highs.value() == 108
+    assert strategy._lows.value() == 42
+
+    # Same closed candles on the next ticks: nothing changes
+    strategy._update_windows()
+    assert len(strategy._highs) == 3
+
+    # Two new candles at once, as after missing candles
+    strategy.candles.append(_candle(10 * 60000, 90, 60))
+    strategy.candles.append(_candle(11 * 60000, 95, 70))
+    strategy._update_windows()
+
+    closed = list.__getitem__(strategy.candles, slice(-4, -1))
+    assert strategy._highs.value() == max(candle.high for candle in closed)
+    assert strategy._lows.value() == min(candle.low for candle in closed)
+    assert strategy._window_ts == 10 * 60000
+
+
+def test_windows_need_a_closed_candle():
+    strategy = _strategy(2)
+    strategy.candles = NoSliceList([_candle(0, 100, 90)])
+
+    strategy._update_windows()
+
+    assert len(strategy._highs) == 0
+
+
+def test_failed_candle_sync_keeps_the_saved_candles():
+    strategy = _strategy(2)
+    strategy.client = types.SimpleNamespace(get_historical_candles=lambda contract, tf, start_time=None: [])
+    strategy.candles = [_candle(i * 60000, 100, 90) for i in range(5)]
+
+    strategy._sync_candles()
+
+    assert len(strategy.candles) == 5
+
+
+def test_windows_survive_a_snapshot():
+    strategy = _strategy(3)
+    strategy.candles = [_candle(i * 60000, 100 + i, 50 - i) for i in range(10)]
+    strategy._update_windows()
+
+    state = pickle.loads(pickle.dumps(strategy.snapshot_state()))
+
+    restored = _strategy(3)
+    restored.restore_state(state)
+    restored.candles = NoSliceList(strategy.candles + [_candle(10 * 60000, 90, 60)])
+    restored._update_windows()
+
+    assert restored._highs.value() == 109
+    assert restored._lows.value() == 41
+    assert len(restored._volumes) == 3
+
+
+def test_windows_of_another_lookback_are_not_restored():
+    strategy = _strategy(3)
+    strategy.candles = [_candle(i * 60000, 100 + i, 50 - i) for i in range(10)]
+    strategy._update_windows()
+
+    restored = _strategy(5)
+    restored.restore_state(strategy.snapshot_state())
+
+    assert len(restored._highs) == 0
@@ -0,0 +1,75 @@
+import types
+
+from execution import EXECUTION_MAX_FAILURES, ExecutionEngine
+from order_template import OrderTemplate
+from models import OrderStatus
+from risk import RiskEngine
+
+
+class FailingClient:
+    def __init__(self):
+        self.prices = {"BTCUSDT": {"bid": 100, "ask": 101}}
+        self.time_sync = types.SimpleNamespace(now_ms=lambda: 0)
+        self.journal = types.SimpleNamespace(record_execution=lambda execution: None)
+        self.risk = RiskEngine()
+        self.orders = 0
+
+    def order_template(self, contract) -> OrderTemplate:
+        return OrderTemplate(contract)
+
+    def place_order(self, contract, order_type: str, quantity: float, side: str, price=None, tif=None):
+        self.orders += 1
+        return None
+
+
+def test_market_execution_fails_after_repeated_order_errors():
+    client = FailingClient()
+    engine = ExecutionEngine(client)
+    engine.start = lambda: None
+    contract = types.SimpleNamespace(symbol="BTCUSDT", price_decimals=1, quantity_decimals=3, filters=dict())
+    done = []
+
+    execution = engine.submit(contract, "BUY", 1.0, "market", on_done=done.append)
+
+    for _ in range(EXECUTION_MAX_FAILURES + 2):
+        engine._step(execution)
+
+    assert client.orders == EXECUTION_MAX_FAILURES
+    assert execution.status == "failed"
+    assert done == [execution]
+    assert engine.working() == 0
+
+
+class RestingClient(FailingClient):
+    def __init__(self):
+        super().__init__()
+        self.quantities = []
+
+    def place_order(self, contract, order_type: str, quantity: float, side: str, price=None, tif=None):
+        self.quantities.append(quantity)
+        return OrderStatus({"orderId": len(self.quantities), "status": "NEW", "avgPrice": 0})
+
+
+def test_iceberg_clip_is_raised_to_the_minimum_quantity():
+    client = RestingClient()
+    engine = ExecutionEngine(client)
+    engine.start = lambda: None
+    contract = types.SimpleNamespace(symbol="BTCUSDT", price_decimals=1, quantity_decimals=3,
+                                     filters={"LOT_SIZE": {"stepSize": "0.001", "minQty": "0.01"}})
+
+    execution = engine.submit(contract, "BUY", 0.02, "iceberg", clip_pct=10)
+    engine._step(execution)
+
+    assert client.quantities == [0.01]
+    assert execution.status == "working"
+
+
+def test_stop_waits_for_the_engine_thread():
+    client = RestingClient()
+    engine = ExecutionEngine(client, tick=0.01)
+    engine.start()
+    thread = engine._thread
+
+    engine.stop()
+
+    assert not thread.is_alive()
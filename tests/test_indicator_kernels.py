@@ -0,0 +1,35 @@
+import importlib.util
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import indicator_kernels
+
+
+def _backends():
+    backends = ["numpy", "python"]
+
+    if importlib.util.find_spec("numba") is not None:
+        backends.append("numba")
+
+    return backends
+
+
+@pytest.mark.parametrize("backend", _backends())
+@pytest.mark.parametrize("adjust", [True, False])
+def test_ewm_mean_empty_and_single_value(backend, adjust):
+    assert len(indicator_kernels.ewm_mean([], 0.5, adjust=adjust, backend=backend)) == 0
+
+    result = indicator_kernels.ewm_mean([42.0], 0.5, adjust=adjust, backend=backend)
+    assert result.tolist() == [42.0]
+
+
+@pytest.mark.parametrize("backend", _backends())
+def test_indicators_empty_and_single_close(backend):
+    for closes in ([], [100.0]):
+        assert len(indicator_kernels.ema(closes, 12, backend)) == len(closes)
+        assert len(indicator_kernels.rsi_series(closes, 14, backend)) == max(len(closes) - 1, 0)
+
+        macd_line, signal_line = indicator_kernels.macd_series(closes, 12, 26, 9, backend)
+        assert len(macd_line) == len(signal_line) == len(closes)
@@ -0,0 +1,35 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from indicators import IndicatorCache
+from models import Candle
+
+
+def _candles(count: int, first_ts: int = 0) -> list:
+    return [Candle({"ts": first_ts + i * 60000, "open": 100, "high": 101, "low": 99, "close": 100 + i % 7,
+                    "volume": 1}, "1m", "parse_trade") for i in range(count)]
+
+
+def test_histories_of_different_lengths_share_the_value():
+    cache = IndicatorCache()
+    long_history = _candles(3000)
+    short_history = long_history[-1500:]
+
+    first = cache.get("BTCUSDT", "1m", long_history, "rsi", (14,))
+    second = cache.get("BTCUSDT", "1m", short_history, "rsi", (14,))
+
+    assert first == second
+    assert cache.hits == 1 and cache.misses == 1
+
+
+def test_new_completed_candle_is_recomputed():
+    cache = IndicatorCache()
+    candles = _candles(100)
+
+    cache.get("BTCUSDT", "1m", candles, "macd", (12, 26, 9))
+    candles.append(Candle({"ts": 100 * 60000, "open": 100, "high": 100, "low": 100, "close": 100, "volume": 0},
+                          "1m", "parse_trade"))
+    cache.get("BTCUSDT", "1m", candles, "macd", (12, 26, 9))
+
+    assert cache.misses == 2
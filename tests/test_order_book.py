@@ -0,0 +1,54 @@
+from order_book import ORDER_BOOK_BUFFER_LIMIT, OrderBook
+
+
+def _diff(update_id: int) -> dict:
+    return {"U": update_id, "u": update_id, "pu": update_id - 1, "b": [["100", "1"]], "a": [["101", "1"]]}
+
+
+def test_unsynced_buffer_overflow_asks_for_resync():
+    book = OrderBook("BTCUSDT")
+
+    for update_id in range(1, ORDER_BOOK_BUFFER_LIMIT + 1):
+        assert book.on_diff(_diff(update_id))
+
+    assert not book.on_diff(_diff(ORDER_BOOK_BUFFER_LIMIT + 1))
+    assert len(book._buffer) == 1
+
+
+def test_snapshot_replays_buffer_after_overflow():
+    book = OrderBook("BTCUSDT")
+
+    for update_id in range(1, ORDER_BOOK_BUFFER_LIMIT + 3):
+        book.on_diff(_diff(update_id))
+
+    snapshot = {"lastUpdateId": ORDER_BOOK_BUFFER_LIMIT + 1, "bids": [["99", "2"]], "asks": [["102", "2"]]}
+
+    assert book.load_snapshot(snapshot)
+    assert book.synced
+    assert len(book._buffer) == 0
+    assert book.on_diff(_diff(ORDER_BOOK_BUFFER_LIMIT + 3))
+
+
+def test_snapshot_newer_than_the_buffered_diffs():
+    book = OrderBook("BTCUSDT")
+
+    for update_id in range(1, 6):
+        book.on_diff(_diff(update_id))
+
+    assert book.load_snapshot({"lastUpdateId": 10, "bids": [["99", "2"]], "asks": [["102", "2"]]})
+
+    # Live diffs older than the snapshot are dropped, the first one straddling it is applied without chaining on pu
+    assert book.on_diff({"U": 7, "u": 9, "pu": 6, "b": [], "a": []})
+    assert book.on_diff({"U": 10, "u": 12, "pu": 9, "b": [["99", "3"]], "a": []})
+    assert book.synced
+    assert book.last_update_id == 12
+    assert book.on_diff({"U": 13, "u": 13, "pu": 12, "b": [], "a": []})
+
+
+def test_first_diff_after_the_snapshot_must_straddle_it():
+    book = OrderBook("BTCUSDT")
+
+    assert book.load_snapshot({"lastUpdateId": 10, "bids": [["99", "2"]], "asks": [["102", "2"]]})
+
+    assert not book.on_diff({"U": 12, "u": 14, "pu": 11, "b": [], "a": []})
+    assert not book.synced
@@ -0,0 +1,45 @@
+import types
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("websocket")
+
+from connectors.paper_trading import PaperTradingClient
+
+
+def _client() -> PaperTradingClient:
+    # Only the order matching state, the constructor connects to the exchange
+    client = PaperTradingClient.__new__(PaperTradingClient)
+    client.prices = {"BTCUSDT": {"bid": 100.0, "ask": 101.0}}
+    client.order_books = dict()
+    client._open_orders = {"BTCUSDT": [1]}
+    return client
+
+
+def _order(side: str, price: float) -> dict:
+    contract = types.SimpleNamespace(symbol="BTCUSDT", lot_size=0.001)
+    return {"order_id": 1, "contract": contract, "side": side, "type": "LIMIT", "quantity": 1.0, "price": price,
+            "tif": "GTX", "status": "NEW", "avg_price": 0, "executed_qty": 0}
+
+
+@pytest.mark.parametrize("side, price", [("BUY", 101.0), ("SELL", 100.0)])
+def test_crossing_post_only_order_expires(side, price):
+    client = _client()
+    order = _order(side, price)
+
+    client._try_fill(order, aggressive=True)
+
+    assert order['status'] == "EXPIRED"
+    assert client._open_orders["BTCUSDT"] == []
+
+
+@pytest.mark.parametrize("side, price", [("BUY", 100.0), ("SELL", 101.0)])
+def test_passive_post_only_order_rests(side, price):
+    client = _client()
+    order = _order(side, price)
+
+    client._try_fill(order, aggressive=True)
+
+    assert order['status'] == "NEW"
+    assert client._open_orders["BTCUSDT"] == [1]
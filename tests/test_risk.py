@@ -0,0 +1,112 @@
+import types
+
+from models import Candle, OrderStatus, Trade
+from risk import RiskEngine, RiskLimits
+from strategies import BreakoutStrategy
+
+
+class FakeClient:
+    def __init__(self, risk: RiskEngine):
+        self.risk = risk
+        self.orders = []
+
+    def get_trade_size(self, contract, price: float, balance_pct: float, side=None) -> float:
+        return 1.0
+
+    def place_order(self, contract, order_type: str, quantity: float, side: str, price=None, tif=None):
+        self.orders.append((order_type, quantity, side))
+        return None
+
+
+def _strategy(client: FakeClient) -> BreakoutStrategy:
+    contract = types.SimpleNamespace(symbol="BTCUSDT", price_decimals=1, quantity_decimals=3)
+    strategy = BreakoutStrategy(client, contract, "Binance", "1m", 10, 1, 1, {"min_volume": 0})
+    strategy.candles = [Candle({"ts": 0, "open": 100, "high": 100, "low": 100, "close": 100, "volume": 1},
+                               "1m", "parse_trade")]
+    return strategy
+
+
+def test_symbol_limit_rejects_entry():
+    client = FakeClient(RiskEngine(RiskLimits(max_symbol_notional=50)))
+
+    _strategy(client)._open_position(1)
+
+    assert client.orders == []
+
+
+def test_entry_within_limits_is_sent():
+    client = FakeClient(RiskEngine(RiskLimits(max_symbol_notional=500)))
+
+    _strategy(client)._open_position(1)
+
+    assert client.orders == [("MARKET", 1.0, "buy")]
+
+
+def test_daily_loss_limit_rejects_entry():
+    risk = RiskEngine(RiskLimits(max_daily_loss=10))
+    risk.on_trade_opened("t1", "Breakout_BTCUSDT_1m", "BTCUSDT", 100)
+    risk.on_trade_closed("t1", -15)
+    client = FakeClient(risk)
+
+    _strategy(client)._open_position(-1)
+
+    assert client.orders == []
+
+
+def test_reservations_count_against_the_limits():
+    risk = RiskEngine(RiskLimits(max_symbol_notional=150, max_open_trades=2))
+
+    first, _ = risk.check_entry("Breakout_BTCUSDT_1m", "BTCUSDT", 100)
+    second, reason = risk.check_entry("Technical_BTCUSDT_1m", "BTCUSDT", 100)
+
+    assert first is not None
+    assert second is None and "exposure" in reason
+
+    risk.release_entry(first)
+    assert risk.symbol_exposure["BTCUSDT"] == 0
+    assert risk.open_trades == 0
+
+
+def test_confirmed_reservation_uses_the_filled_notional():
+    risk = RiskEngine()
+
+    reservation_id, _ = risk.check_entry("Breakout_BTCUSDT_1m", "BTCUSDT", 100)
+    risk.confirm_entry(reservation_id, "t1", 60)
+
+    assert risk.account_exposure == 60
+    assert risk.open_trades == 1
+
+    risk.on_trade_closed("t1", 5)
+    assert risk.account_exposure == 0
+    assert risk.open_trades == 0
+
+
+def test_failed_entry_order_releases_the_reservation():
+    client = FakeClient(RiskEngine(RiskLimits(max_symbol_notional=500)))
+
+    _strategy(client)._open_position(1)
+
+    assert client.risk.open_trades == 0
+    assert client.risk.account_exposure == 0
+
+
+def test_canceled_pending_entry_is_dropped_on_restart():
+    risk = RiskEngine()
+    client = FakeClient(risk)
+    client.get_order_status = lambda contract, order_id: OrderStatus({"orderId": order_id, "status": "CANCELED",
+                                                                      "avgPrice": 0})
+    client.ui_events = types.SimpleNamespace(push_latest=lambda *args: None)
+    client.journal = types.SimpleNamespace(record_trade=lambda trade, tf: None)
+    strategy = _strategy(client)
+
+    trade = Trade({"time": 0, "contract": strategy.contract, "strategy": "Breakout", "side": "long",
+                   "entry_prize": None, "status": "open", "pnl": 0, "quantity": 1.0, "entry_id": 7})
+    strategy.trades.append(trade)
+    strategy.is_open_position = True
+    risk.on_trade_opened(trade.trade_id, strategy.risk_key, "BTCUSDT", 100)
+
+    strategy._reconcile_pending_entries()
+
+    assert trade.status == "closed"
+    assert not strategy.is_open_position
+    assert risk.open_trades == 0
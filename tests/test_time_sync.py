@@ -0,0 +1,36 @@
+import time
+
+from time_sync import JUMP_THRESHOLD_MS, TimeSync
+
+
+def _time_sync(offsets: list) -> TimeSync:
+    # Each fetch returns the local time shifted by the next offset
+    return TimeSync(lambda: int(time.time() * 1000 + offsets.pop(0)))
+
+
+def test_small_deviations_are_smoothed():
+    time_sync = _time_sync([0, 100])
+
+    time_sync.sample()
+    time_sync.sample()
+
+    assert 0 < time_sync.offset_ms < 100
+
+
+def test_clock_jump_resets_the_offset():
+    jump = JUMP_THRESHOLD_MS * 4
+    time_sync = _time_sync([0, jump])
+
+    time_sync.sample()
+    time_sync.sample()
+
+    assert abs(time_sync.offset_ms - jump) < 50
+
+
+def test_rejected_timestamp_resets_the_offset():
+    time_sync = _time_sync([0, 200])
+
+    time_sync.sample()
+    time_sync.sample(reset=True)
+
+    assert abs(time_sync.offset_ms - 200) < 50
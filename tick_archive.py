@@ -0,0 +1,290 @@
+import collections
+import datetime
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import typing
+import zlib
+
+import numpy as np
+
+from models import *
+
+logger = logging.getLogger()
+
+CHUNK_MAGIC = b"TCK1"
+ARCHIVE_FLUSH_INTERVAL = 5
+ARCHIVE_CHUNK_SIZE = 100000
+
+# Column name, scale source, delta encoded. Prices and quantities are stored as integers scaled by the contract
+# precision, timestamps and prices as differences from the previous row, which are small and compress well.
+ARCHIVE_COLUMNS = {
+    "trades": [("timestamp", None, True), ("price", "price", True), ("quantity", "quantity", False),
+               ("is_buyer_maker", None, False)],
+    "book": [("timestamp", None, True), ("bid", "price", True), ("ask", "price", True),
+             ("bid_quantity", "quantity", False), ("ask_quantity", "quantity", False)],
+}
+
+
+def _day(timestamp: int) -> str:
+    return datetime.datetime.utcfromtimestamp(timestamp / 1000).strftime("%Y-%m-%d")
+
+
+def _encode_segment(kind: str, rows: typing.List[typing.Tuple], scales: typing.Dict[str, int]) -> bytes:
+    columns = list(zip(*rows))
+    header_columns = []
+    blocks = []
+    offset = 0
+
+    for (name, scale_source, delta), values in zip(ARCHIVE_COLUMNS[kind], columns):
+        scale = scales[scale_source] if scale_source is not None else 1
+        data = np.rint(np.asarray(values, dtype=np.float64) * scale).astype(np.int64)
+
+        if delta:
+            data = np.diff(data, prepend=0)
+
+        block = zlib.compress(data.tobytes())
+        header_columns.append({"name": name, "scale": scale, "delta": delta, "offset": offset, "size": len(block)})
+        blocks.append(block)
+        offset += len(block)
+
+    header = json.dumps({"kind": kind, "count": len(rows), "start": int(rows[0][0]), "end": int(rows[-1][0]),
+                         "columns": header_columns}).encode()
+
+    return CHUNK_MAGIC + struct.pack("<I", len(header)) + header + b"".join(blocks)
+
+
+def _segment_at(mm: mmap.mmap, offset: int) -> typing.Optional[typing.Tuple[typing.Dict, int, int]]:
+    # Header, start of the column blocks and end of the segment at offset.
+    # None at the end of the file or when the segment is incomplete.
+    if offset + 8 > len(mm) or mm[offset:offset + 4] != CHUNK_MAGIC:
+        return None
+
+    header_size = struct.unpack("<I", mm[offset + 4:offset + 8])[0]
+    data_start = offset + 8 + header_size
+
+    if data_start > len(mm):
+        return None
+
+    header = json.loads(mm[offset + 8:data_start])
+    segment_end = data_start + sum(column["size"] for column in header["columns"])
+
+    if segment_end > len(mm):
+        return None
+
+    return header, data_start, segment_end
+
+
+def _read_segment(mm: mmap.mmap, header: typing.Dict, data_start: int,
+                  columns: typing.Optional[typing.List[str]] = None) -> typing.Dict[str, np.ndarray]:
+    # Only the blocks of the requested columns are decompressed
+    result = dict()
+
+    for column in header["columns"]:
+        if columns is not None and column["name"] not in columns and column["name"] != "timestamp":
+            continue
+
+        start = data_start + column["offset"]
+        values = np.frombuffer(zlib.decompress(mm[start:start + column["size"]]), dtype=np.int64)
+
+        if column["delta"]:
+            values = np.cumsum(values)
+
+        if column["name"] == "timestamp":
+            result["timestamp"] = values
+        elif column["scale"] == 1:
+            result[column["name"]] = values.astype(np.float64)
+        else:
+            result[column["name"]] = values / column["scale"]
+
+    return result
+
+
+def _read_day_file(path: str, start: int, end: int,
+                   columns: typing.Optional[typing.List[str]] = None) -> typing.List[typing.Dict[str, np.ndarray]]:
+    if os.path.getsize(path) == 0:
+        return []
+
+    parts = []
+
+    # The file is memory-mapped, segments whose time bounds are outside the range are skipped from their header
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        offset = 0
+
+        while True:
+            segment = _segment_at(mm, offset)
+
+            if segment is None:
+                break
+
+            header, data_start, offset = segment
+
+            if header["end"] >= start and header["start"] < end:
+                parts.append(_read_segment(mm, header, data_start, columns))
+
+    return parts
+
+
+def _complete_length(path: str) -> int:
+    # Size of the file up to the end of its last complete segment
+    if os.path.getsize(path) == 0:
+        return 0
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        offset = 0
+
+        while True:
+            segment = _segment_at(mm, offset)
+
+            if segment is None:
+                return offset
+
+            offset = segment[2]
+
+
+class TickArchive:
+    def __init__(self, directory: str = "ticks", flush_interval: float = ARCHIVE_FLUSH_INTERVAL,
+                 chunk_size: int = ARCHIVE_CHUNK_SIZE):
+        self.directory = directory
+        self._flush_interval = flush_interval
+        self._chunk_size = chunk_size
+
+        # The websocket thread only appends a tuple to a list, encoding and disk writes happen on the writer thread
+        self._buffers: typing.Dict[typing.Tuple[str, str], typing.List[typing.Tuple]] = collections.defaultdict(list)
+        self._scales: typing.Dict[str, typing.Dict[str, int]] = dict()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._checked_paths: typing.Set[str] = set()
+        self._running = True
+
+        self._writer = threading.Thread(target=self._write_loop, name="tick-archive", daemon=True)
+        self._writer.start()
+
+    def _append(self, kind: str, contract: Contract, row: typing.Tuple):
+        if contract.symbol not in self._scales:
+            self._scales[contract.symbol] = {"price": 10 ** contract.price_decimals,
+                                             "quantity": 10 ** contract.quantity_decimals}
+
+        with self._lock:
+            buffer = self._buffers[(kind, contract.symbol)]
+            buffer.append(row)
+
+        if len(buffer) >= self._chunk_size:
+            self._wake.set()
+
+    def append_trade(self, contract: Contract, timestamp: int, price: float, quantity: float, is_buyer_maker: bool):
+        self._append("trades", contract, (timestamp, price, quantity, is_buyer_maker))
+
+    def append_book_tick(self, contract: Contract, timestamp: int, bid: float, ask: float, bid_quantity: float,
+                         ask_quantity: float):
+        self._append("book", contract, (timestamp, bid, ask, bid_quantity, ask_quantity))
+
+    def buffered(self) -> int:
+        with self._lock:
+            return sum(len(buffer) for buffer in self._buffers.values())
+
+    def _write_loop(self):
+        while self._running:
+            self._wake.wait(self._flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            buffers = self._buffers
+            self._buffers = collections.defaultdict(list)
+
+        for (kind, symbol), rows in buffers.items():
+            rows.sort(key=lambda row: row[0])
+
+            # A chunk never spans two days
+            days = collections.defaultdict(list)
+            for row in rows:
+                days[_day(row[0])].append(row)
+
+            for day, day_rows in days.items():
+                try:
+                    self._write_segment(kind, symbol, day, day_rows)
+                except Exception as e:
+                    logger.error("Error while archiving %s %s ticks: %s", symbol, kind, e)
+
+    def _write_segment(self, kind: str, symbol: str, day: str, rows: typing.List[typing.Tuple]):
+        # One file per kind, symbol and day, every flush appends a self-delimiting compressed segment to it
+        symbol_dir = os.path.join(self.directory, kind, symbol)
+        os.makedirs(symbol_dir, exist_ok=True)
+
+        path = os.path.join(symbol_dir, f"{day}.tck")
+
+        if path not in self._checked_paths:
+            # A crash during an append leaves a partial segment at the end, cut so the next ones stay readable
+            if os.path.exists(path):
+                length = _complete_length(path)
+                if length < os.path.getsize(path):
+                    logger.warning("Truncating the incomplete last segment of %s", path)
+                    os.truncate(path, length)
+            self._checked_paths.add(path)
+
+        with open(path, "ab") as f:
+            f.write(_encode_segment(kind, rows, self._scales[symbol]))
+
+    def close(self):
+        self._running = False
+        self._wake.set()
+        self._writer.join()
+        self.flush()
+
+    def read(self, kind: str, symbol: str, start: int, end: int,
+             columns: typing.Optional[typing.List[str]] = None) -> typing.Dict[str, np.ndarray]:
+        # Ticks with start <= timestamp < end, as one array per column sorted by timestamp
+        parts = []
+
+        day = datetime.datetime.utcfromtimestamp(start / 1000).date()
+        last_day = datetime.datetime.utcfromtimestamp(max(end - 1, start) / 1000).date()
+
+        while day <= last_day:
+            path = os.path.join(self.directory, kind, symbol, day.strftime("%Y-%m-%d") + ".tck")
+
+            if os.path.exists(path):
+                parts.extend(_read_day_file(path, start, end, columns))
+
+            day += datetime.timedelta(days=1)
+
+        names = [name for name, _, _ in ARCHIVE_COLUMNS[kind] if columns is None or name in columns
+                 or name == "timestamp"]
+
+        if len(parts) == 0:
+            return {name: np.empty(0, dtype=np.int64 if name == "timestamp" else np.float64) for name in names}
+
+        result = {name: np.concatenate([part[name] for part in parts]) for name in names}
+
+        order = np.argsort(result["timestamp"], kind="stable")
+        mask = (result["timestamp"][order] >= start) & (result["timestamp"][order] < end)
+        selected = order[mask]
+
+        return {name: values[selected] for name, values in result.items()}
+
+
+def resample_candles(trades: typing.Dict[str, np.ndarray], timeframe_ms: int) -> typing.Dict[str, np.ndarray]:
+    # Aggregates archived trades into OHLCV candles of any timeframe, only periods with trades are returned
+    timestamps = trades["timestamp"]
+
+    if len(timestamps) == 0:
+        return {name: np.empty(0) for name in ("timestamp", "open", "high", "low", "close", "volume")}
+
+    periods = timestamps - timestamps % timeframe_ms
+    starts = np.flatnonzero(np.diff(periods, prepend=periods[0] - 1))
+    ends = np.append(starts[1:], len(periods)) - 1
+
+    prices = trades["price"]
+
+    return {
+        "timestamp": periods[starts],
+        "open": prices[starts],
+        "high": np.maximum.reduceat(prices, starts),
+        "low": np.minimum.reduceat(prices, starts),
+        "close": prices[ends],
+        "volume": np.add.reduceat(trades["quantity"], starts),
+    }
@@ -0,0 +1,79 @@
+import logging
+import threading
+import time
+import typing
+
+logger = logging.getLogger()
+
+# A sample this far from the smoothed offset is a clock jump, not noise: the offset is reset to it
+JUMP_THRESHOLD_MS = 500
+
+
+class TimeSync:
+    def __init__(self, fetch_server_time: typing.Callable[[], typing.Optional[int]], interval: float = 60,
+                 alpha: float = 0.2):
+        self._fetch_server_time = fetch_server_time
+        self._interval = interval
+        self._alpha = alpha
+
+        self.offset_ms = 0.0
+        self.rtt_ms: typing.Optional[float] = None
+        self.last_sample_offset_ms: typing.Optional[float] = None
+        self.samples = 0
+
+        self._lock = threading.Lock()
+        self._running = False
+
+    def sample(self, reset: bool = False) -> bool:
+        # reset: the exchange rejected a timestamp, the new offset is taken as is rather than smoothed
+        t0 = time.time() * 1000
+        server_time = self._fetch_server_time()
+        t1 = time.time() * 1000
+
+        if server_time is None:
+            return False
+
+        rtt = t1 - t0
+        # The server read its clock roughly half way through the round trip
+        offset = server_time - (t0 + rtt / 2)
+
+        with self._lock:
+            if self.samples == 0:
+                self.offset_ms = offset
+                self.rtt_ms = rtt
+            elif reset or abs(offset - self.offset_ms) > JUMP_THRESHOLD_MS:
+                logger.info("Server time offset reset from %.1f ms to %.1f ms", self.offset_ms, offset)
+                self.offset_ms = offset
+                self.rtt_ms = rtt
+            else:
+                # Samples taken during a slow round trip carry a larger error, they are given less weight
+                weight = self._alpha if rtt <= 2 * self.rtt_ms else self._alpha / 4
+                self.offset_ms += weight * (offset - self.offset_ms)
+                self.rtt_ms += self._alpha * (rtt - self.rtt_ms)
+
+            self.last_sample_offset_ms = offset
+            self.samples += 1
+
+        logger.debug("Server time offset %.1f ms (sample %.1f ms, rtt %.1f ms)", self.offset_ms, offset, rtt)
+
+        return True
+
+    def now_ms(self) -> int:
+        return int(time.time() * 1000 + self.offset_ms)
+
+    def start(self):
+        if self._running:
+            return
+
+        self._running = True
+
+        t = threading.Thread(target=self._run, daemon=True)
+        t.start()
+
+    def stop(self):
+        self._running = False
+
+    def _run(self):
+        while self._running:
+            time.sleep(self._interval)
+            self.sample()